@@ -4,10 +4,16 @@ XR 生態系統完整整合測試
 測試所有模組的協同運作
 """
 
+import os
 import random
+import struct
+import sys
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "xrbus"))
+from xrbus_frame import FRAME_BYTES, XRBusFrameView, alloc_frames, pack_frame_into
+
 class XREcosystemTest:
     def __init__(self):
         self.modules = {
@@ -58,14 +64,17 @@ class XREcosystemTest:
         
         # 2. XR-BUS 傳輸
         print("\n[1.2] XR-BUS Transport:")
-        xrbus_frame = {
-            "timestamp": time.time(),
-            "source": "xsm",
-            "payload": raw_signals,
-            "trace_id": random.getrandbits(128)
-        }
-        print(f"  Frame created: trace_id=0x{xrbus_frame['trace_id']:032x}")
-        print(f"  Payload size: {len(str(xrbus_frame))} bytes")
+        # 12 通道以 milli 單位 32-bit 整數打包進 payload
+        payload = struct.pack("<12I", *(int(s["value"] * 1000) for s in raw_signals))
+        timestamp = int(time.time() * 1e6)
+        trace_id = random.getrandbits(128)
+        xrbus_frame = alloc_frames(1)
+        pack_frame_into(xrbus_frame, 0, 0x0001, 0x0000, 0x01,
+                        timestamp, timestamp, timestamp,
+                        trace_id, 0, 0x9e107d9d, payload)
+        frame_view = XRBusFrameView(xrbus_frame)
+        print(f"  Frame created: trace_id=0x{frame_view.trace_id:032x}")
+        print(f"  Frame size: {FRAME_BYTES} bytes (payload {frame_view.payload_len} bytes)")
         
         # 3. XENOA 語義化
         print("\n[1.3] XENOA Semantic Processing:")
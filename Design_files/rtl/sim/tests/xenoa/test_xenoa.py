@@ -4,11 +4,26 @@ XENOA 測試平台
 測試語義標準化、時序對齊、邊界映射和推理基質
 """
 
+import os
 import random
 import hashlib
 import struct
+import sys
+import time
+from collections import deque
 from datetime import datetime
 
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "xrbus"))
+from xrbus_capture import replay_capture
+from xenoa_boundary_map import BoundaryMapper, contract_values
+from xenoa_pattern import PatternHashService, md5_pattern, tensor_key
+from xenoa_reasoning import (TensorBuilder, TrendEngine, benchmark_tensor_stage, format_log,
+                             tensor_slice, tensor_to_int, trend_code_of)
+from xenoa_semantic import SEMANTIC_TABLE, semanticize, semanticize_scalar
+from xenoa_temporal import TemporalAligner
+
 class XENOATestBench:
     def __init__(self):
         self.signal_types = {
@@ -62,38 +77,57 @@ class XENOATestBench:
             (5, (0, 1, "none"), "Micro-event")
         ]
         
-        for signal_type, (min_val, max_val, unit), name in test_cases:
-            signal = self.generate_signal(signal_type, (min_val, max_val, unit))
-            
-            # 計算標準化值 (0-1000)
-            if signal['value'] < min_val:
-                normalized = 0
-                deviation = min_val - signal['value']
-                severity = 8  # 欠標
-            elif signal['value'] > max_val:
-                normalized = 1000
-                deviation = signal['value'] - max_val
-                severity = 12  # 過標
-            else:
-                normalized = int((signal['value'] - min_val) * 1000 / (max_val - min_val))
-                deviation = 0
-                severity = 0  # 正常
+        signals = [self.generate_signal(signal_type, value_range)
+                   for signal_type, value_range, _ in test_cases]
+        types = np.array([signal['type'] for signal in signals], dtype=np.uint8)
+        values = np.array([int(signal['value']) for signal in signals], dtype=np.uint32)
+        result = semanticize(types, values)
+        
+        for i, (signal_type, (min_val, max_val, unit), name) in enumerate(test_cases):
+            value = int(values[i])
+            normalized = int(result['normalized_value'][i])
+            deviation = int(result['deviation'][i])
+            severity = int(result['severity'][i])
             
             print(f"\n{name}:")
-            print(f"  Raw Value: {signal['value']:.2f} {unit}")
+            print(f"  Raw Value: {value} {unit}")
             print(f"  Nominal Range: {min_val} - {max_val} {unit}")
             print(f"  Normalized: {normalized}/1000")
-            print(f"  Deviation: {deviation:.2f} {unit}")
+            print(f"  Deviation: {deviation} {unit}")
             print(f"  Severity: {severity}")
             
             # 驗證
-            if signal['value'] < min_val:
-                assert deviation > 0, "Should detect under-range"
-            elif signal['value'] > max_val:
-                assert deviation > 0, "Should detect over-range"
+            assert (normalized, deviation, severity) == semanticize_scalar(signal_type, value), \
+                "Vector kernel disagrees with scalar model"
+            if value < min_val:
+                assert deviation > 0 and severity == 8, "Should detect under-range"
+            elif value > max_val:
+                assert deviation > 0 and severity == 12, "Should detect over-range"
             else:
                 assert 0 <= normalized <= 1000, "Normalized value out of range"
         
+        # 大批次遙測 (含未定義類型，沿用上一個範圍)
+        rng = np.random.default_rng(2026)
+        count = 2_000_000
+        types = rng.integers(0, 8, count, dtype=np.uint8)
+        values = rng.integers(0, 2000, count, dtype=np.uint32)
+        start = time.perf_counter()
+        result = semanticize(types, values)
+        elapsed = time.perf_counter() - start
+        
+        nominal = (0, 0)
+        for i in range(5000):
+            signal_type, value = int(types[i]), int(values[i])
+            expected = semanticize_scalar(signal_type, value, nominal)
+            actual = (int(result['normalized_value'][i]), int(result['deviation'][i]),
+                      int(result['severity'][i]))
+            assert actual == expected, f"Sample {i} mismatch: {actual} != {expected}"
+            if signal_type in SEMANTIC_TABLE:
+                nominal = SEMANTIC_TABLE[signal_type][2:]
+        
+        print(f"\nBatch semanticize: {count} samples in {elapsed * 1e3:.1f} ms "
+              f"({count / elapsed / 1e6:.1f} M samples/s)")
+        
         print("\n✅ Semantic standardization test PASSED")
     
     def test_temporal_alignment(self):
@@ -123,6 +157,57 @@ class XENOATestBench:
         
         print(f"\nDevice-Fabric Delta: {delta_df} ns ✓")
         print(f"Fabric-Cloud Delta: {delta_fc} ns ✓")
+        
+        # 多來源批次對齊 (xenoa_temporal.sv)
+        rng = np.random.default_rng(2026)
+        num_sources, count, interval = 64, 10000, 50000
+        steps = np.arange(count, dtype=np.int64) * interval
+        device = base_time + steps + rng.integers(0, 20, (num_sources, count))
+        ppm = rng.integers(-50, 50, (num_sources, 1))
+        fabric = device + steps * ppm // 1_000_000 + rng.integers(-100, 100, (num_sources, count))
+        cloud = fabric + rng.integers(-500, 500, (num_sources, count))
+        
+        aligner = TemporalAligner(num_sources, window_size)
+        start = time.perf_counter()
+        result = aligner.align(device[:, :count // 2], fabric[:, :count // 2], cloud[:, :count // 2])
+        second = aligner.align(device[:, count // 2:], fabric[:, count // 2:], cloud[:, count // 2:])
+        elapsed = time.perf_counter() - start
+        
+        # 逐拍參考模型 (單一來源)
+        last = [0, 0, 0]
+        acc = [0, 0, 0]
+        for i in range(count):
+            sample = (int(device[5, i]), int(fabric[5, i]), int(cloud[5, i]))
+            warning = any(a > 100 for a in acc)
+            for k in range(3):
+                if last[k] != 0:
+                    acc[k] = ((sample[k] - last[k]) % 2**64 * 1000000 % 2**64 // 1000) & 0xFFFFFFFF
+                last[k] = sample[k]
+            part, j = (result, i) if i < count // 2 else (second, i - count // 2)
+            assert (int(part.device_drift[5, j]), int(part.fabric_drift[5, j]),
+                    int(part.cloud_drift[5, j])) == tuple(acc), f"Drift mismatch at {i}"
+            assert bool(part.drift_warning[5, j]) == warning, f"drift_warning mismatch at {i}"
+            assert int(part.aligned[5, j]) == max(sample), f"Aligned timestamp mismatch at {i}"
+        
+        distance, expected = 0, []
+        for _ in range(count):
+            distance = 1000 if distance > 1000 else distance + 1
+            expected.append(distance)
+        assert second.causal_distance[0].tolist() == expected[count // 2:], "causal_distance mismatch"
+        
+        # 視窗分組: 每組樣本的視窗編號一致且涵蓋全部樣本
+        groups = result.groups
+        window = result.window.reshape(-1)
+        for window_id, members in groups:
+            assert (window[members] == window_id).all(), "Window group mismatch"
+        assert groups.counts.sum() == window.size, "Window groups must cover all samples"
+        per_window = groups.reduce(np.ones(window.size, dtype=np.int64))
+        
+        print(f"\nBatch alignment: {num_sources}x{count} samples in {elapsed * 1e3:.1f} ms")
+        print(f"Windows: {groups.windows.tolist()} samples/window: {per_window.tolist()}")
+        print(f"Fabric drift (source 5): {second.relative_ppm[0, 5]:.1f} ppm "
+              f"(configured {int(ppm[5, 0])} ppm)")
+        assert abs(second.relative_ppm[0, 5] - ppm[5, 0]) < 5, "Fabric drift estimate off"
         print("✅ Temporal alignment test PASSED")
         
         return current_window
@@ -134,16 +219,11 @@ class XENOATestBench:
         normalized_value = 500  # 中間值
         severity = 4
         
-        for boundary_type, name in self.boundaries.items():
-            # 邊界調整因子
-            if boundary_type == 0:
-                contract_value = normalized_value
-            elif boundary_type == 1:
-                contract_value = normalized_value * 2
-            elif boundary_type == 2:
-                contract_value = normalized_value * 5
-            else:
-                contract_value = normalized_value * 10
+        types = np.array(list(self.boundaries), dtype=np.uint8)
+        contract = contract_values(np.full(len(types), normalized_value), types)
+        
+        for i, (boundary_type, name) in enumerate(self.boundaries.items()):
+            contract_value = int(contract[i])
             
             print(f"\n{name} Boundary:")
             print(f"  Normalized Value: {normalized_value}")
@@ -151,9 +231,45 @@ class XENOATestBench:
             print(f"  Severity: {severity}")
             
             # 驗證
+            assert contract_value == normalized_value * [1, 2, 5, 10][boundary_type], "Boundary scaling incorrect"
             if boundary_type > 0:
                 assert contract_value > normalized_value, "Boundary scaling incorrect"
         
+        # 整批映射 (含未定義邊界類型)，audit_record 與 RTL 串接逐位元比對
+        rng = np.random.default_rng(2026)
+        count = 1_000_000
+        boundary_ids = rng.integers(0, 1 << 16, count, dtype=np.uint32)
+        boundary_types = rng.integers(0, 6, count, dtype=np.uint8)
+        contract_ids = rng.integers(0, 1 << 32, count, dtype=np.uint64)
+        sla_ids = rng.integers(0, 1 << 32, count, dtype=np.uint64)
+        tq_keys = rng.integers(0, 1 << 32, count, dtype=np.uint64)
+        normalized = rng.integers(0, 1500, count, dtype=np.uint32)
+        severities = rng.choice(np.array([0, 8, 12], dtype=np.uint8), count)
+        chains = rng.integers(0, 1 << 63, (count, 2), dtype=np.uint64)
+        
+        mapper = BoundaryMapper()
+        start = time.perf_counter()
+        mapped = mapper.map(boundary_ids, boundary_types, contract_ids, sla_ids,
+                            tq_keys, normalized, severities, chains)
+        elapsed = time.perf_counter() - start
+        
+        previous_key = 0
+        for i in range(200):
+            key = (int(boundary_ids[i]) << 16) | (int(tq_keys[i]) & 0xFFFF)
+            scale = [1, 2, 5, 10][boundary_types[i]] if boundary_types[i] < 4 else 1
+            record = ((int(boundary_ids[i]) << 180) | (int(boundary_types[i]) << 172) |
+                      (int(contract_ids[i]) << 140) | (int(sla_ids[i]) << 108) |
+                      (int(chains[i, 0]) << 44) | (previous_key << 12) | (int(severities[i]) << 8))
+            assert int(mapped['boundary_key'][i]) == key, f"boundary_key mismatch at {i}"
+            assert int(mapped['contract_bound_value'][i]) == int(normalized[i]) * scale, \
+                f"contract_bound_value mismatch at {i}"
+            assert sum(int(w) << (64 * k) for k, w in enumerate(mapped['audit_record'][i])) == record, \
+                f"audit_record mismatch at {i}"
+            previous_key = key
+        
+        print(f"\nBatch boundary mapping: {count} samples in {elapsed * 1e3:.1f} ms "
+              f"({count / elapsed / 1e6:.1f} M samples/s)")
+        
         print("\n✅ Boundary mapping test PASSED")
     
     def test_pattern_recognition(self):
@@ -169,26 +285,18 @@ class XENOATestBench:
             ([100, 50, 25, 10, 0], "Sharp Fall")
         ]
         
-        for values, trend_name in trends:
-            # 計算趨勢
-            deltas = [values[i+1] - values[i] for i in range(len(values)-1)]
-            avg_delta = sum(deltas) / len(deltas)
-            
-            if avg_delta > 20:
-                trend_code = 3  # 急遽上升
-                trend_desc = "Sharp Rise"
-            elif avg_delta > 5:
-                trend_code = 2  # 緩慢上升
-                trend_desc = "Gradual Rise"
-            elif avg_delta < -20:
-                trend_code = 13  # 急遽下降
-                trend_desc = "Sharp Fall"
-            elif avg_delta < -5:
-                trend_code = 12  # 緩慢下降
-                trend_desc = "Gradual Fall"
-            else:
-                trend_code = 0  # 平穩
-                trend_desc = "Stable"
+        # 以環形緩衝區趨勢引擎逐筆推入，視窗趨勢由執行中的變化量總和判斷
+        engine = TrendEngine(len(trends))
+        ids = np.arange(len(trends))
+        for step in range(len(trends[0][0])):
+            engine.update(ids, [values[step] for values, _ in trends])
+        descriptions = {3: "Sharp Rise", 2: "Gradual Rise", 13: "Sharp Fall",
+                        12: "Gradual Fall", 0: "Stable"}
+        
+        for i, (values, trend_name) in enumerate(trends):
+            avg_delta = engine.mean_step([i])[0]
+            trend_code = int(engine.window_trend[i])
+            trend_desc = descriptions[trend_code]
             
             print(f"\n{trend_name} Pattern:")
             print(f"  Values: {values}")
@@ -203,6 +311,139 @@ class XENOATestBench:
         
         print("\n✅ Pattern recognition test PASSED")
     
+    def test_trend_engine(self):
+        """測試環形緩衝區趨勢引擎 (xenoa_reasoning.sv history_buffer)"""
+        print("\n=== XENOA Trend Engine Test ===")
+        
+        # (數值, 名稱, 視窗趨勢, RTL trend_code, 有號比較 trend_code)
+        # RTL 以無號比較 32'd 常數: 負的 trend 編為 3，0..10 編為 13
+        trends = [
+            ([100, 102, 105, 110, 120], "Rising", 0, 13, 0),
+            ([100, 98, 95, 90, 80], "Falling", 0, 3, 0),
+            ([100, 101, 99, 102, 100], "Stable", 0, 3, 0),
+            ([100, 150, 200, 250, 300], "Sharp Rise", 3, 2, 2),
+            ([100, 50, 25, 10, 0], "Sharp Fall", 13, 3, 0),
+            ([100, 50, 25, 10, -1], "Sharp Fall", 13, 3, 12)
+        ]
+        
+        engine = TrendEngine(len(trends))
+        signed = TrendEngine(len(trends), unsigned_compare=False)
+        ids = np.arange(len(trends))
+        for step in range(5):
+            engine.update(ids, [row[0][step] for row in trends])
+            signed.update(ids, [row[0][step] for row in trends])
+        
+        for i, (values, trend_name, window, rtl, intent) in enumerate(trends):
+            code = int(engine.trend_indicator[i])
+            print(f"{trend_name:>10}: history={engine.history(i).tolist()} "
+                  f"mean={engine.mean([i])[0]:.1f} step={engine.mean_step([i])[0]:.1f} "
+                  f"window={engine.window_trend[i]} trend_code={code}")
+            assert engine.window_trend[i] == window, f"{trend_name}: expected window trend {window}"
+            assert code == rtl, f"{trend_name}: expected RTL code {rtl}, got {code}"
+            assert signed.trend_indicator[i] == intent, f"{trend_name}: expected signed code {intent}"
+        
+        # 大量並行信號，與逐筆 deque 參考模型比對
+        rng = np.random.default_rng(2026)
+        num_signals = 20000
+        engine = TrendEngine(num_signals)
+        reference = {i: deque(maxlen=16) for i in range(0, num_signals, 997)}
+        samples = 0
+        start = time.perf_counter()
+        for _ in range(64):
+            ids = rng.permutation(num_signals)[:num_signals // 2]
+            ids = np.concatenate([ids, ids[:100]])  # 同批重複出現的信號
+            values = rng.integers(-150, 150, len(ids)) + 1000
+            codes = engine.update(ids, values)
+            samples += len(ids)
+            for j in np.flatnonzero(ids % 997 == 0):
+                history = reference[int(ids[j])]
+                expected = trend_code_of(int(values[j]), history[-1]) if history else 0
+                assert codes[j] == expected, f"Signal {ids[j]} trend mismatch"
+                history.append(int(values[j]))
+        elapsed = time.perf_counter() - start
+        
+        for signal_id, history in reference.items():
+            assert engine.history(signal_id).tolist() == list(history), "History mismatch"
+            assert engine.mean([signal_id])[0] == (sum(history) / len(history) if history else 0.0)
+            steps = len(history) - 1
+            assert engine.mean_step([signal_id])[0] == \
+                ((history[-1] - history[0]) / steps if steps > 0 else 0.0), "Window step sum mismatch"
+        
+        print(f"Trend engine: {samples} samples over {num_signals} signals in {elapsed * 1e3:.1f} ms")
+        print("\n✅ Trend engine test PASSED")
+    
+    def test_semantic_tensor(self):
+        """測試語義張量串流組裝 (xenoa_reasoning.sv)"""
+        print("\n=== XENOA Semantic Tensor Test ===")
+        
+        rng = np.random.default_rng(2026)
+        count, batch_size = 20000, 4096
+        types = rng.integers(0, 6, count, dtype=np.uint8)
+        values = rng.integers(0, 1500, count, dtype=np.uint32)
+        semantic = semanticize(types, values)
+        mapped = BoundaryMapper().map(
+            np.full(count, 0x3000), rng.integers(0, 4, count, dtype=np.uint8),
+            np.full(count, 0xC0FFEE), np.full(count, 0x5A), semantic['semantic_key'],
+            semantic['normalized_value'], semantic['severity'],
+            rng.integers(0, 1 << 63, count, dtype=np.uint64))
+        
+        def batches():
+            for first in range(0, count, batch_size):
+                yield {name: column[first:first + batch_size] for name, column in mapped.items()}
+        
+        builder = TensorBuilder()
+        tensors = np.empty((count, 8), dtype=np.uint64)
+        logs = np.empty((count, 4), dtype=np.uint64)
+        hashes = np.empty(count, dtype=np.uint32)
+        position = 0
+        for batch in builder.stream(batches(), batch_size):
+            tensors[position:position + len(batch)] = batch.semantic_tensor
+            logs[position:position + len(batch)] = batch.interpretable_log
+            hashes[position:position + len(batch)] = batch.pattern_hash
+            position += len(batch)
+        
+        # 逐拍參考模型: RTL 串接後截斷為 512 位元
+        history = [0] * 16
+        history_valid = False
+        trend_reg = 0
+        for i in range(count):
+            key = int(mapped['boundary_key'][i])
+            contract = int(mapped['contract_bound_value'][i])
+            severity = int(mapped['boundary_severity'][i])
+            audit = sum(int(w) << (64 * k) for k, w in enumerate(mapped['audit_record'][i]))
+            code = trend_code_of(contract, history[0]) if history_valid else 0
+            
+            if i % 997 == 0 or i == count - 1:
+                tensor = ((key << 492) | (contract << 460) | (severity << 452) | (trend_reg << 448) |
+                          ((audit >> 128) << 320) | (history[0] << 288) | (history[1] << 256) |
+                          (history[2] << 224) | (history[3] << 192)) & ((1 << 512) - 1)
+                log = ((int.from_bytes(b"XENOA:", 'big') << 204) | (int.from_bytes(b"Key=", 'big') << 172) |
+                       ((key & 0xFFFF) << 156) | (int.from_bytes(b"Val=", 'big') << 124) |
+                       (contract << 92) | (int.from_bytes(b"Sev=", 'big') << 60) | (severity << 52) |
+                       (int.from_bytes(b"Trend=", 'big') << 4) | trend_reg)
+                assert tensor_to_int(tensors[i]) == tensor, f"semantic_tensor mismatch at {i}"
+                assert tensor_to_int(logs[i]) == log, f"interpretable_log mismatch at {i}"
+                assert int(hashes[i]) == key ^ contract ^ ((severity << 4) | trend_reg), \
+                    f"pattern_hash mismatch at {i}"
+            
+            trend_reg = code
+            history = [contract] + history[:-1]
+            history_valid = True
+        
+        # 零複製切片: 32-bit 通道對齊的欄位直接檢視緩衝區
+        padding = tensor_slice(tensors, 63, 32)
+        newest = tensor_slice(tensors, 319, 288)
+        assert np.shares_memory(newest, tensors), "Aligned slice should be a view"
+        assert not padding.any(), "semantic_tensor[63:32] is padding"
+        assert (newest[1:] == mapped['contract_bound_value'][:-1]).all(), "history[0] lane mismatch"
+        
+        built, elapsed, rate, mb_rate = benchmark_tensor_stage(count=1_000_000)
+        print(f"Log[0]: {format_log(logs[0])}")
+        print(f"Tensor[1]: 0x{tensor_to_int(tensors[1]):0128x}")
+        print(f"Tensor stage: {built} tensors in {elapsed * 1e3:.1f} ms "
+              f"({rate / 1e6:.2f} M tensors/s, {mb_rate:.0f} MB/s)")
+        print("\n✅ Semantic tensor test PASSED")
+    
     def test_cross_module_integration(self):
         """測試跨模組整合 (XR-BUS → XENOA → XRAS)"""
         print("\n=== Cross-Module Integration Test ===")
@@ -247,8 +488,9 @@ class XENOATestBench:
         print(f"  Contract Value: {contract_value}")
         
         # 產生語義張量
-        semantic_tensor = f"{test_signal['type']:02x}{severity:01x}{contract_value:04x}"
-        pattern_hash = hashlib.md5(semantic_tensor.encode()).hexdigest()[:8]
+        semantic_tensor = tensor_key(test_signal['type'], severity, contract_value)
+        service = PatternHashService(maxsize=2048)
+        pattern_hash = service.hash(test_signal['type'], severity, contract_value)
         
         print(f"\nSemantic Tensor: {semantic_tensor}")
         print(f"Pattern Hash: {pattern_hash}")
@@ -256,10 +498,72 @@ class XENOATestBench:
         # 驗證
         assert severity == 12, "Should detect over-temperature"
         assert contract_value == 10000, "Boundary scaling incorrect"
+        assert pattern_hash == hashlib.md5(semantic_tensor.encode()).hexdigest()[:8], "Pattern hash mismatch"
+        
+        # 重複出現的遙測組合: 批次去重 + LRU 快取
+        rng = np.random.default_rng(2026)
+        count = 1_000_000
+        types = rng.integers(0, 6, count)
+        severities = rng.choice(np.array([0, 8, 12]), count)
+        values = rng.integers(0, 200, count) * 50
+        start = time.perf_counter()
+        hashes = service.hash_batch(types, severities, values)
+        hashes = service.hash_batch(types, severities, values)
+        elapsed = time.perf_counter() - start
+        for i in rng.choice(count, 200, replace=False):
+            expected = md5_pattern(int(types[i]), int(severities[i]), int(values[i]))
+            assert f"{int(hashes[i]):08x}" == expected, f"Batch pattern hash mismatch at {i}"
+        
+        # 超出欄位寬度的鍵在單筆與批次路徑上須得到相同摘要
+        wide = (0x1FF, 0x1C, (1 << 32) + 7000)
+        assert service.hash(*wide) == f"{int(service.hash_batch(*([k] for k in wide))[0]):08x}", \
+            "Single and batch lookups disagree on out-of-range keys"
+        stats = service.stats()
+        assert stats['size'] <= 2048, "Cache exceeded its bound"
+        print(f"Pattern hash batch: 2x{count} lookups in {elapsed * 1e3:.1f} ms, "
+              f"{stats['batch_unique']} unique, cache hits={stats['hits']} misses={stats['misses']} "
+              f"size={stats['size']}/{stats['maxsize']}")
+        
+        # xenoa_reasoning.sv pattern_hash (trend_code 延遲一拍)
+        boundary_keys = (rng.integers(0, 4, count, dtype=np.uint32) << np.uint32(16)) | np.uint32(0x0001)
+        trends = rng.choice(np.array([0, 2, 3, 12, 13], dtype=np.uint8), count)
+        rtl_hashes = service.rtl_hash_batch(boundary_keys, values, severities, trends)
+        for i in (0, 1, 2, count - 1):
+            previous = int(trends[i - 1]) if i else 0
+            expected = int(boundary_keys[i]) ^ int(values[i]) ^ ((int(severities[i]) << 4) | previous)
+            assert int(rtl_hashes[i]) == expected, f"RTL pattern_hash mismatch at {i}"
+        print(f"RTL pattern_hash[0]: 0x{int(rtl_hashes[0]):08x}")
         
         print("\n✅ Cross-module integration test PASSED")
         return pattern_hash
     
+    def test_capture_replay(self):
+        """測試重播 XR-BUS 擷取檔的時序資料"""
+        print("\n=== XENOA Capture Replay Test ===")
+        
+        with replay_capture() as reader:
+            max_df = 0
+            max_fc = 0
+            for batch in reader.batches(4096):
+                device = batch['device_time'].astype(np.int64)
+                fabric = batch['fabric_time'].astype(np.int64)
+                cloud = batch['cloud_time'].astype(np.int64)
+                max_df = max(max_df, int(np.abs(device - fabric).max()))
+                max_fc = max(max_fc, int(np.abs(fabric - cloud).max()))
+            
+            middle = reader[len(reader) // 2]
+            assert reader.find(middle.trace_id) == len(reader) // 2, "Seek by trace_id failed"
+            
+            print(f"Replayed Frames: {len(reader)}")
+            print(f"Max Device-Fabric Delta: {max_df}")
+            print(f"Max Fabric-Cloud Delta: {max_fc}")
+            print(f"Frame {len(reader) // 2}: cloud_time={middle.cloud_time}")
+        
+        assert max_df < 1000, f"Device-Fabric delta too high: {max_df}"
+        assert max_fc < 1000, f"Fabric-Cloud delta too high: {max_fc}"
+        
+        print("\n✅ Capture replay test PASSED")
+    
     def run_all_tests(self):
         """執行所有測試"""
         print("XENOA Test Bench Started")
@@ -270,7 +574,10 @@ class XENOATestBench:
             self.test_temporal_alignment,
             self.test_boundary_mapping,
             self.test_pattern_recognition,
-            self.test_cross_module_integration
+            self.test_trend_engine,
+            self.test_semantic_tensor,
+            self.test_cross_module_integration,
+            self.test_capture_replay
         ]
         
         passed = 0
@@ -0,0 +1,122 @@
+"""
+XENOA 邊界語義映射模型
+依 xenoa_boundary_map.sv 整批產生 boundary_key、contract_bound_value 與 256-bit audit_record
+"""
+
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+AUDIT_WORDS = 4  # audit_record[255:0] 以 4 個 64-bit 字組表示 (字組 0 = [63:0])
+
+# 邊界類型 -> 合約數值倍率 (RACK / CLUSTER / DOMAIN / TENANT)，其餘類型為 1
+CONTRACT_SCALE = {0: 1, 1: 2, 2: 5, 3: 10}
+SCALE_TABLE = np.ones(256, dtype=np.uint32)
+for _type, _scale in CONTRACT_SCALE.items():
+    SCALE_TABLE[_type] = _scale
+
+# audit_record 欄位 (lsb, 位元寬): {boundary_id, boundary_type, contract_id, sla_id,
+# causal_chain_id[63:0], boundary_key, severity, 8'b0}，共 196 位元，零擴展至 256
+AUDIT_FIELDS = {
+    'severity': (8, 4),
+    'boundary_key': (12, 32),
+    'causal_chain': (44, 64),
+    'sla_id': (108, 32),
+    'contract_id': (140, 32),
+    'boundary_type': (172, 8),
+    'boundary_id': (180, 16),
+}
+
+
+def pack_fields(count, words, fields):
+    """
+    將多個欄位打包成 (count, words) uint64 位元向量 (字組 0 為最低位元)
+    fields 為 (values, lsb, width) 序列，width <= 64，可跨越字組邊界
+    """
+    out = np.zeros((count, words), dtype=np.uint64)
+    for values, lsb, width in fields:
+        v = np.asarray(values).astype(np.uint64)
+        if width < 64:
+            v = v & np.uint64((1 << width) - 1)
+        word, shift = divmod(lsb, 64)
+        out[:, word] |= v << np.uint64(shift)
+        if shift and shift + width > 64:
+            out[:, word + 1] |= v >> np.uint64(64 - shift)
+    return out
+
+
+def unpack_field(packed, lsb, width):
+    """由打包位元向量取出單一欄位 (width <= 64)"""
+    word, shift = divmod(lsb, 64)
+    v = packed[:, word] >> np.uint64(shift)
+    if shift and shift + width > 64:
+        v = v | (packed[:, word + 1] << np.uint64(64 - shift))
+    if width < 64:
+        v = v & np.uint64((1 << width) - 1)
+    return v
+
+
+def contract_values(normalized_values, boundary_types):
+    """contract_bound_value = normalized_value * 倍率 (32-bit 環繞)"""
+    types = np.asarray(boundary_types).astype(np.uint8, copy=False)
+    return np.asarray(normalized_values).astype(np.uint32) * SCALE_TABLE[types]
+
+
+def boundary_keys(boundary_ids, time_qualified_keys):
+    """boundary_key = {boundary_id[15:0], time_qualified_key[15:0]}"""
+    bid = np.asarray(boundary_ids).astype(np.uint32) & np.uint32(0xFFFF)
+    tqk = np.asarray(time_qualified_keys).astype(np.uint32) & np.uint32(0xFFFF)
+    return (bid << np.uint32(16)) | tqk
+
+
+class BoundaryMapper:
+    """
+    xenoa_boundary_map.sv 的批次模型 (每個樣本 = 一個 temporal_valid 週期)
+    audit_record 中的 boundary_key 讀取的是輸出暫存器的舊值 (上一拍的鍵值)；
+    sla_threshold / sla_penalty 在 RTL 中未被驅動，因此不建模
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        self.boundary_key = 0
+
+    def map(self, boundary_ids, boundary_types, contract_ids, sla_ids,
+            time_qualified_keys, normalized_values, severities, causal_chain_ids):
+        """
+        整批映射，回傳 dict of arrays:
+        boundary_key, contract_bound_value, boundary_severity, audit_record (N, 4) uint64
+        causal_chain_ids 可為 (N, 2) 的 (lo, hi) 字組或僅含低 64 位元的 (N,) 陣列
+        """
+        keys = boundary_keys(boundary_ids, time_qualified_keys)
+        n = len(keys)
+        severity = np.asarray(severities).astype(np.uint8) & np.uint8(0xF)
+
+        chain = np.asarray(causal_chain_ids)
+        if chain.ndim == 2:
+            chain = chain[:, 0]
+
+        previous = np.empty(n, dtype=np.uint32)
+        if n:
+            previous[0] = self.boundary_key
+            previous[1:] = keys[:-1]
+            self.boundary_key = int(keys[-1])
+
+        f = AUDIT_FIELDS
+        audit = pack_fields(n, AUDIT_WORDS, [
+            (severity, *f['severity']),
+            (previous, *f['boundary_key']),
+            (chain, *f['causal_chain']),
+            (sla_ids, *f['sla_id']),
+            (contract_ids, *f['contract_id']),
+            (boundary_types, *f['boundary_type']),
+            (boundary_ids, *f['boundary_id']),
+        ])
+
+        return {
+            'boundary_key': keys,
+            'contract_bound_value': contract_values(normalized_values, boundary_types),
+            'boundary_severity': severity,
+            'audit_record': audit,
+        }
@@ -0,0 +1,86 @@
+"""
+XENOA 模式雜湊服務
+以 (signal_type, severity, contract_value) 整數組為鍵的有界 LRU 快取，
+並提供批次 API 與 xenoa_reasoning.sv 的 32-bit pattern_hash 路徑
+"""
+
+import functools
+import hashlib
+
+import numpy as np
+
+from xenoa_reasoning import pattern_hash_stream
+
+DEFAULT_CACHE_SIZE = 65536
+
+
+def tensor_key(signal_type, severity, contract_value):
+    """測試平台的語義張量字串"""
+    return f"{signal_type:02x}{severity:01x}{contract_value:04x}"
+
+
+def md5_pattern(signal_type, severity, contract_value):
+    """語義張量字串 MD5 的前 8 個十六進位字元"""
+    return hashlib.md5(tensor_key(signal_type, severity, contract_value).encode()).hexdigest()[:8]
+
+
+def pack_keys(signal_types, severities, contract_values):
+    """將整數組打包為 uint64 鍵: type[43:36] | severity[35:32] | contract_value[31:0]"""
+    types = np.asarray(signal_types).astype(np.uint64) & np.uint64(0xFF)
+    sev = np.asarray(severities).astype(np.uint64) & np.uint64(0xF)
+    values = np.asarray(contract_values).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    return (types << np.uint64(36)) | (sev << np.uint64(32)) | values
+
+
+class PatternHashService:
+    """
+    有界 LRU 快取的模式雜湊服務
+    hash() 回傳 8 字元十六進位字串；hash_batch() 先去重再查快取，回傳 uint32 陣列
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lookup = functools.lru_cache(maxsize=maxsize)(md5_pattern)
+        self.batch_requests = 0
+        self.batch_unique = 0
+
+    def hash(self, signal_type, severity, contract_value):
+        """單筆查詢 (與 pack_keys 相同的 8/4/32 位元遮罩，確保與 hash_batch 一致)"""
+        return self._lookup(int(signal_type) & 0xFF, int(severity) & 0xF,
+                            int(contract_value) & 0xFFFFFFFF)
+
+    def hash_batch(self, signal_types, severities, contract_values):
+        """批次查詢，相同鍵只計算 (或查快取) 一次"""
+        keys = pack_keys(signal_types, severities, contract_values)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        digests = np.fromiter(
+            (int(self._lookup(int(k >> 36), int((k >> 32) & 0xF), int(k & 0xFFFFFFFF)), 16)
+             for k in unique.tolist()),
+            dtype=np.uint32, count=len(unique))
+        self.batch_requests += len(keys)
+        self.batch_unique += len(unique)
+        return digests[inverse.reshape(-1)]
+
+    def rtl_hash_batch(self, boundary_keys, contract_values, severities, trend_codes, carry=0):
+        """xenoa_reasoning.sv 的 32-bit pattern_hash (位元精確，不經快取)"""
+        return pattern_hash_stream(boundary_keys, contract_values, severities, trend_codes, carry)
+
+    def stats(self):
+        """快取命中與批次去重統計"""
+        info = self._lookup.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'batch_requests': self.batch_requests,
+            'batch_unique': self.batch_unique,
+        }
+
+    def clear(self):
+        """清空快取與統計"""
+        self._lookup.cache_clear()
+        self.batch_requests = 0
+        self.batch_unique = 0
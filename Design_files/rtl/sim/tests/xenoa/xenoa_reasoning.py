@@ -0,0 +1,437 @@
+"""
+XENOA 推理基質模型
+依 xenoa_reasoning.sv 的 16 筆 history_buffer 與 trend_code 規則，
+以陣列為底的環形緩衝區同時追蹤大量信號的趨勢，
+並串流組裝 512-bit semantic_tensor / interpretable_log / pattern_hash
+"""
+
+import time
+
+import numpy as np
+
+from xenoa_boundary_map import pack_fields, unpack_field
+
+HISTORY_DEPTH = 16
+
+TREND_STABLE = 0
+TREND_RISE = 2          # 緩慢上升
+TREND_SHARP_RISE = 3    # 急遽上升
+TREND_FALL = 12         # 緩慢下降
+TREND_SHARP_FALL = 13   # 急遽下降
+
+# 視窗趨勢門檻: 視窗內平均每步變化量 (同 test_pattern_recognition 的平均 delta 規則)
+WINDOW_SHARP_STEP = 20
+WINDOW_GRADUAL_STEP = 5
+
+
+def trend_codes(trend, unsigned_compare=True):
+    """
+    trend (int64 陣列) -> trend_code
+    預設依 Verilog 位寬規則逐位元重現 RTL: 32'd100 為無號常數，整個比較轉為無號，
+    因此負的 trend 落入急遽上升、0..10 落入急遽下降；
+    unsigned_compare=False 時依 `logic signed [31:0] trend` 的設計意圖做有號比較
+    """
+    trend = np.asarray(trend, dtype=np.int64)
+    if unsigned_compare:
+        u = trend & 0xFFFFFFFF
+        return np.select(
+            [u > 100, u > 10, u < 0xFFFFFF9C, u < 0xFFFFFFF6],
+            [TREND_SHARP_RISE, TREND_RISE, TREND_SHARP_FALL, TREND_FALL],
+            TREND_STABLE).astype(np.uint8)
+    t = trend.astype(np.int32).astype(np.int64)  # 32-bit 環繞
+    return np.select(
+        [t > 100, t > 10, t < -100, t < -10],
+        [TREND_SHARP_RISE, TREND_RISE, TREND_SHARP_FALL, TREND_FALL],
+        TREND_STABLE).astype(np.uint8)
+
+
+def trend_code_of(value, previous, unsigned_compare=True):
+    """單一樣本的參考模型 (previous 為前一筆數值，即 RTL 的 history_buffer[0])"""
+    trend = value - previous
+    if unsigned_compare:
+        u = trend & 0xFFFFFFFF
+        if u > 100:
+            return TREND_SHARP_RISE
+        if u > 10:
+            return TREND_RISE
+        if u < 0xFFFFFF9C:
+            return TREND_SHARP_FALL
+        if u < 0xFFFFFFF6:
+            return TREND_FALL
+        return TREND_STABLE
+    trend = ((trend + (1 << 31)) & 0xFFFFFFFF) - (1 << 31)  # 32-bit 環繞
+    if trend > 100:
+        return TREND_SHARP_RISE
+    if trend > 10:
+        return TREND_RISE
+    if trend < -100:
+        return TREND_SHARP_FALL
+    if trend < -10:
+        return TREND_FALL
+    return TREND_STABLE
+
+
+def window_trend_codes(step_total, steps):
+    """視窗內累計變化量 / 步數 -> trend_code (以整數比較，避免除法)"""
+    step_total = np.asarray(step_total, dtype=np.int64)
+    steps = np.asarray(steps, dtype=np.int64)
+    return np.select(
+        [step_total > WINDOW_SHARP_STEP * steps, step_total > WINDOW_GRADUAL_STEP * steps,
+         step_total < -WINDOW_SHARP_STEP * steps, step_total < -WINDOW_GRADUAL_STEP * steps],
+        [TREND_SHARP_RISE, TREND_RISE, TREND_SHARP_FALL, TREND_FALL],
+        TREND_STABLE).astype(np.uint8)
+
+
+class TrendEngine:
+    """
+    num_signals 個信號的環形 history_buffer (每個信號 depth 筆)
+    每筆新樣本皆為 O(1):
+      trend_indicator: trend = value - 前一筆數值 (xenoa_top 移位後的 history[0])，依 RTL 規則編碼
+      window_trend: 以執行中的每步變化量總和 (加入新一步、移除被擠出的一步) 判斷視窗趨勢
+    尚無歷史 (history_valid = 0) 的信號 trend_code 為 0
+    RTL 的 trend_indicator 由 trend_code 暫存器驅動，比輸入晚一個 boundary_valid 週期；
+    此處回傳的代碼已依樣本對齊
+    """
+
+    def __init__(self, num_signals, depth=HISTORY_DEPTH, unsigned_compare=True):
+        if depth < 2:
+            raise ValueError("depth must be >= 2")
+        self.num_signals = num_signals
+        self.depth = depth
+        self.unsigned_compare = unsigned_compare
+        self.buffer = np.zeros((num_signals, depth), dtype=np.int64)
+        self.head = np.zeros(num_signals, dtype=np.intp)    # 最舊一筆的位置
+        self.count = np.zeros(num_signals, dtype=np.intp)
+        self.total = np.zeros(num_signals, dtype=np.int64)
+        self.step_total = np.zeros(num_signals, dtype=np.int64)  # 視窗內相鄰樣本差的總和
+        self.trend_indicator = np.zeros(num_signals, dtype=np.uint8)
+        self.window_trend = np.zeros(num_signals, dtype=np.uint8)
+
+    def reset(self, signal_ids=None):
+        """清除指定信號 (預設全部) 的歷史"""
+        ids = slice(None) if signal_ids is None else np.asarray(signal_ids)
+        self.buffer[ids] = 0
+        self.head[ids] = 0
+        self.count[ids] = 0
+        self.total[ids] = 0
+        self.step_total[ids] = 0
+        self.trend_indicator[ids] = TREND_STABLE
+        self.window_trend[ids] = TREND_STABLE
+
+    def _update_unique(self, ids, values):
+        head = self.head[ids]
+        count = self.count[ids]
+        oldest = self.buffer[ids, head]
+        previous = self.buffer[ids, (head + count - 1) % self.depth]
+        has_history = count > 0
+        step = np.where(has_history, values - previous, 0)
+        codes = trend_codes(step, self.unsigned_compare)
+        codes[~has_history] = TREND_STABLE
+
+        # 緩衝區滿時擠出最舊一筆，視窗同時失去最舊的一步
+        full = count == self.depth
+        evicted_step = self.buffer[ids, (head + 1) % self.depth] - oldest
+        self.step_total[ids] += step - np.where(full, evicted_step, 0)
+        self.total[ids] += values - np.where(full, oldest, 0)
+        slot = np.where(full, head, (head + count) % self.depth)
+        self.buffer[ids, slot] = values
+        self.head[ids] = np.where(full, (head + 1) % self.depth, head)
+        count = np.minimum(count + 1, self.depth)
+        self.count[ids] = count
+        self.trend_indicator[ids] = codes
+        self.window_trend[ids] = window_trend_codes(self.step_total[ids], count - 1)
+        return codes
+
+    def update(self, signal_ids, values):
+        """
+        推入一批樣本並回傳各樣本的 trend_code
+        同一信號在批次中出現多次時依出現順序處理
+        """
+        ids = np.asarray(signal_ids, dtype=np.intp)
+        values = np.asarray(values, dtype=np.int64)
+        if len(ids) == 0:
+            return np.zeros(0, dtype=np.uint8)
+
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(ids)]))
+        rank = np.empty(len(ids), dtype=np.intp)
+        rank[order] = np.arange(len(ids)) - group_start
+
+        codes = np.empty(len(ids), dtype=np.uint8)
+        if rank.max() == 0:
+            codes[:] = self._update_unique(ids, values)
+            return codes
+        for level in range(rank.max() + 1):
+            sel = np.flatnonzero(rank == level)
+            codes[sel] = self._update_unique(ids[sel], values[sel])
+        return codes
+
+    def mean(self, signal_ids=None):
+        """視窗內平均值 (由執行中總和計算)"""
+        ids = slice(None) if signal_ids is None else np.asarray(signal_ids)
+        count = self.count[ids]
+        return np.where(count > 0, self.total[ids] / np.maximum(count, 1), 0.0)
+
+    def mean_step(self, signal_ids=None):
+        """視窗內平均每步變化量 (由執行中的變化量總和計算)"""
+        ids = slice(None) if signal_ids is None else np.asarray(signal_ids)
+        steps = self.count[ids] - 1
+        return np.where(steps > 0, self.step_total[ids] / np.maximum(steps, 1), 0.0)
+
+    def history(self, signal_id):
+        """依 history_buffer 順序 (最舊在前) 回傳單一信號的歷史"""
+        idx = (self.head[signal_id] + np.arange(self.count[signal_id])) % self.depth
+        return self.buffer[signal_id, idx].copy()
+
+
+def pattern_hash(boundary_key, contract_bound_value, boundary_severity, trend_code):
+    """
+    pattern_hash = boundary_key ^ contract_bound_value ^ {boundary_severity, trend_code}
+    (12-bit 串接零擴展至 32 位元)，可為純量或陣列
+    """
+    if np.isscalar(boundary_key):
+        return ((boundary_key ^ contract_bound_value ^
+                 (((boundary_severity & 0xFF) << 4) | (trend_code & 0xF))) & 0xFFFFFFFF)
+    bk = np.asarray(boundary_key).astype(np.uint32, copy=False)
+    cv = np.asarray(contract_bound_value).astype(np.uint32, copy=False)
+    sev = np.asarray(boundary_severity).astype(np.uint32, copy=False) & np.uint32(0xFF)
+    trend = np.asarray(trend_code).astype(np.uint32, copy=False) & np.uint32(0xF)
+    return bk ^ cv ^ ((sev << np.uint32(4)) | trend)
+
+
+def registered(codes, carry=0):
+    """
+    trend_code 為非阻塞指派，同一拍的 pattern_hash / 張量 / trend_indicator 讀到的是上一個
+    boundary_valid 週期的值；回傳延遲一拍後的代碼序列 (carry 為之前的暫存器值)
+    """
+    codes = np.asarray(codes)
+    out = np.empty_like(codes)
+    if len(codes):
+        out[0] = carry
+        out[1:] = codes[:-1]
+    return out
+
+
+def pattern_hash_stream(boundary_key, contract_bound_value, boundary_severity, trend_code, carry=0):
+    """單一 RTL 實例逐拍輸出的 pattern_hash (套用 trend_code 暫存器延遲)"""
+    return pattern_hash(boundary_key, contract_bound_value, boundary_severity,
+                        registered(trend_code, carry))
+
+
+TENSOR_WORDS = 8  # semantic_tensor[511:0]，字組 0 = [63:0]
+LOG_WORDS = 4     # interpretable_log[255:0]
+TENSOR_HISTORY = 4
+
+# semantic_tensor 欄位 (lsb, 位元寬)；524 位元串接截斷為 512，boundary_key 只留 [19:0]
+TENSOR_FIELDS = {
+    'history3': (192, 32),
+    'history2': (224, 32),
+    'history1': (256, 32),
+    'history0': (288, 32),
+    'audit_hi': (320, 128),   # audit_record[255:128]
+    'trend_code': (448, 4),
+    'severity': (452, 8),
+    'contract_bound_value': (460, 32),
+    'boundary_key': (492, 20),
+}
+
+# interpretable_log 欄位 (lsb, 位元寬)，252 位元零擴展至 256
+LOG_TEXT = {
+    'trend_tag': (4, b"Trend="),
+    'sev_tag': (60, b"Sev="),
+    'val_tag': (124, b"Val="),
+    'key_tag': (172, b"Key="),
+    'xenoa_tag': (204, b"XENOA:"),
+}
+LOG_FIELDS = {
+    'trend_code': (0, 4),
+    'severity': (52, 8),
+    'contract_bound_value': (92, 32),
+    'boundary_key': (156, 16),
+}
+
+
+def _ascii(text):
+    return int.from_bytes(text, 'big')
+
+
+class TensorBatch:
+    """一批 TensorBuilder 輸出 (皆為連續緩衝區的檢視)"""
+
+    __slots__ = ('semantic_tensor', 'interpretable_log', 'pattern_hash', 'trend_indicator')
+
+    def __init__(self, semantic_tensor, interpretable_log, pattern_hash, trend_indicator):
+        self.semantic_tensor = semantic_tensor
+        self.interpretable_log = interpretable_log
+        self.pattern_hash = pattern_hash
+        self.trend_indicator = trend_indicator
+
+    def __len__(self):
+        return len(self.semantic_tensor)
+
+
+def tensor_slice(tensors, msb, lsb):
+    """
+    取出 semantic_tensor[msb:lsb]
+    對齊 32 / 64 位元通道的欄位回傳零複製 (跨步) 檢視，其餘欄位回傳複本
+    """
+    width = msb - lsb + 1
+    if width == 64 and lsb % 64 == 0:
+        return tensors[:, lsb // 64]
+    if width == 32 and lsb % 32 == 0:
+        lanes = tensors.view('<u4')
+        return lanes[:, lsb // 32]
+    if width > 64:
+        raise ValueError("slices wider than 64 bits must be 32/64-bit lane aligned")
+    return unpack_field(tensors, lsb, width)
+
+
+def tensor_to_int(row):
+    """將一列張量或日誌字組轉回整數"""
+    return sum(int(w) << (64 * i) for i, w in enumerate(row))
+
+
+def format_log(row):
+    """將 interpretable_log 解碼為可讀字串"""
+    value = tensor_to_int(row)
+
+    def field(lsb, width):
+        return (value >> lsb) & ((1 << width) - 1)
+
+    return (f"XENOA:Key={field(*LOG_FIELDS['boundary_key']):04x}"
+            f" Val={field(*LOG_FIELDS['contract_bound_value'])}"
+            f" Sev={field(*LOG_FIELDS['severity'])}"
+            f" Trend={field(*LOG_FIELDS['trend_code'])}")
+
+
+class TensorBuilder:
+    """
+    xenoa_reasoning.sv 搭配 xenoa_top.sv history 移位暫存器的串流模型
+    (每個樣本 = 一個 boundary_valid 週期)
+    xenoa_top 在 boundary_valid 時執行 history[0] <= contract_bound_value 並向後移位，
+    推理層同一拍讀到的 history[k] 為 k+1 個週期前的 contract_bound_value，
+    因此 trend = contract_bound_value - 前一筆數值
+    trend_code 為非阻塞指派，張量、日誌、pattern_hash 與 trend_indicator 皆使用上一拍的代碼
+    """
+
+    def __init__(self, unsigned_compare=True):
+        self.unsigned_compare = unsigned_compare
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        self.history = np.zeros(TENSOR_HISTORY, dtype=np.uint32)  # history[0..3]
+        self.history_valid = False
+        self.trend_code = 0
+
+    @staticmethod
+    def alloc(count):
+        """配置張量、日誌、雜湊與趨勢輸出的連續緩衝區"""
+        return TensorBatch(np.zeros((count, TENSOR_WORDS), dtype=np.uint64),
+                           np.zeros((count, LOG_WORDS), dtype=np.uint64),
+                           np.zeros(count, dtype=np.uint32),
+                           np.zeros(count, dtype=np.uint8))
+
+    def build(self, mapped, out=None):
+        """
+        由 BoundaryMapper.map() 的輸出組裝一批張量
+        out 為 alloc() 配置的緩衝區 (長度 >= 批次) 時直接寫入並回傳其檢視
+        """
+        keys = np.asarray(mapped['boundary_key']).astype(np.uint32, copy=False)
+        contract = np.asarray(mapped['contract_bound_value']).astype(np.uint32, copy=False)
+        severity = np.asarray(mapped['boundary_severity']).astype(np.uint8, copy=False)
+        audit = mapped['audit_record']
+        n = len(keys)
+
+        # history[k] = k+1 拍前的 contract_bound_value
+        padded = np.concatenate([self.history[::-1], contract])
+        history = [padded[TENSOR_HISTORY - 1 - k:TENSOR_HISTORY - 1 - k + n]
+                   for k in range(TENSOR_HISTORY)]
+        valid = np.ones(n, dtype=bool)
+        if not self.history_valid and n:
+            valid[0] = False
+
+        trend = contract.astype(np.int64) - history[0].astype(np.int64)
+        codes = trend_codes(trend, self.unsigned_compare)
+        codes[~valid] = TREND_STABLE
+        code_reg = registered(codes, self.trend_code)
+
+        if out is None:
+            out = self.alloc(n)
+        batch = TensorBatch(out.semantic_tensor[:n], out.interpretable_log[:n],
+                            out.pattern_hash[:n], out.trend_indicator[:n])
+
+        f = TENSOR_FIELDS
+        batch.semantic_tensor[:] = pack_fields(n, TENSOR_WORDS, [
+            (history[3], *f['history3']),
+            (history[2], *f['history2']),
+            (history[1], *f['history1']),
+            (history[0], *f['history0']),
+            (code_reg, *f['trend_code']),
+            (severity, *f['severity']),
+            (contract, *f['contract_bound_value']),
+            (keys, *f['boundary_key']),
+        ])
+        batch.semantic_tensor[:, 5:7] = audit[:, 2:4]
+
+        g = LOG_FIELDS
+        log = pack_fields(n, LOG_WORDS, [
+            (code_reg, *g['trend_code']),
+            (severity, *g['severity']),
+            (contract, *g['contract_bound_value']),
+            (keys, *g['boundary_key']),
+        ] + [(np.full(n, _ascii(text), dtype=np.uint64), lsb, len(text) * 8)
+             for lsb, text in LOG_TEXT.values()])
+        batch.interpretable_log[:] = log
+
+        batch.pattern_hash[:] = pattern_hash(keys, contract, severity, code_reg)
+        batch.trend_indicator[:] = code_reg
+
+        if n:
+            self.history = padded[-TENSOR_HISTORY:][::-1].copy()
+            self.history_valid = True
+            self.trend_code = int(codes[-1])
+        return batch
+
+    def stream(self, batches, batch_size=65536):
+        """
+        產生器階段: 逐批組裝並產生 TensorBatch
+        輸出共用同一組緩衝區，下游若需保留須自行複製
+        """
+        out = self.alloc(batch_size)
+        for mapped in batches:
+            n = len(mapped['boundary_key'])
+            if n > batch_size:
+                out = self.alloc(n)
+                batch_size = n
+            yield self.build(mapped, out)
+
+
+def benchmark_tensor_stage(count=1_000_000, batch_size=65536, seed=2026):
+    """
+    量測 BoundaryMapper -> TensorBuilder 串流吞吐量
+    回傳 (張量數, 秒數, 張量/秒, MB/秒)
+    """
+    from xenoa_boundary_map import BoundaryMapper
+
+    rng = np.random.default_rng(seed)
+    mapper = BoundaryMapper()
+    builder = TensorBuilder()
+
+    def mapped_batches():
+        for first in range(0, count, batch_size):
+            n = min(batch_size, count - first)
+            yield mapper.map(rng.integers(0, 1 << 16, n), rng.integers(0, 4, n),
+                             rng.integers(0, 1 << 32, n), rng.integers(0, 1 << 32, n),
+                             rng.integers(0, 1 << 32, n), rng.integers(0, 1500, n),
+                             rng.choice(np.array([0, 8, 12]), n),
+                             rng.integers(0, 1 << 63, n, dtype=np.uint64))
+
+    batches = list(mapped_batches())
+    start = time.perf_counter()
+    built = sum(len(batch) for batch in builder.stream(batches, batch_size))
+    elapsed = time.perf_counter() - start
+    mb = built * (TENSOR_WORDS + LOG_WORDS) * 8 / 1e6
+    return built, elapsed, built / elapsed, mb / elapsed
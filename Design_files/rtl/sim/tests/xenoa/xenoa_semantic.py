@@ -0,0 +1,108 @@
+"""
+XENOA 語義標準化模型
+依 xenoa_semantic.sv 的 32-bit 整數運算整批計算 normalized_value / deviation / severity
+"""
+
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+
+SEVERITY_NORMAL = 0
+SEVERITY_UNDER = 8   # 欠標
+SEVERITY_OVER = 12   # 過標
+
+# 信號類型 -> (semantic_key, unit_code, nominal_min, nominal_max)
+SEMANTIC_TABLE = {
+    0: (0x0000_0001, 1, 1100, 1300),  # SI/PI drift (mV)
+    1: (0x0000_0002, 4, 25, 85),      # thermal decay (°C)
+    2: (0x0000_0003, 5, 100, 1000),   # SSD tail latency (µs)
+    3: (0x0000_0004, 7, 0, 1),        # firmware divergence (count)
+    4: (0x0000_0005, 5, 0, 1000),     # jitter accumulation (µs)
+    5: (0x0000_0006, 0, 0, 1),        # micro-event (none)
+}
+
+# 以 8-bit signal_type 直接索引的查找表；未定義類型的 known 為 False
+KEY_TABLE = np.zeros(256, dtype=np.uint32)
+UNIT_TABLE = np.zeros(256, dtype=np.uint8)
+MIN_TABLE = np.zeros(256, dtype=np.uint32)
+MAX_TABLE = np.zeros(256, dtype=np.uint32)
+KNOWN_TABLE = np.zeros(256, dtype=bool)
+for _type, (_key, _unit, _min, _max) in SEMANTIC_TABLE.items():
+    KEY_TABLE[_type] = _key
+    UNIT_TABLE[_type] = _unit
+    MIN_TABLE[_type] = _min
+    MAX_TABLE[_type] = _max
+    KNOWN_TABLE[_type] = True
+
+
+def nominal_ranges(signal_types, carry=(0, 0)):
+    """
+    各樣本使用的 (nominal_min, nominal_max)
+    RTL 的 default 分支不寫入 nominal 暫存器，未定義類型沿用上一個已知類型的範圍；
+    carry 為此段之前的暫存器值 (重置值為 0)
+    """
+    types = np.asarray(signal_types).astype(np.uint8, copy=False)
+    lo = MIN_TABLE[types]
+    hi = MAX_TABLE[types]
+    unknown = ~KNOWN_TABLE[types]
+    if unknown.any():
+        last = np.where(unknown, -1, np.arange(len(types)))
+        np.maximum.accumulate(last, out=last)
+        src = np.maximum(last, 0)
+        lo, hi = lo[src], hi[src]
+        leading = last < 0
+        lo[leading], hi[leading] = carry
+    return lo, hi
+
+
+def semanticize(signal_types, values, carry=(0, 0)):
+    """
+    整批語義標準化，回傳 dict of arrays:
+    semantic_key, unit_code, nominal_min, nominal_max, normalized_value, deviation, severity
+
+    算術與 RTL 相同 (32-bit 無號、環繞、整數除法截斷、不做夾制)，
+    因此超標值的 normalized_value 會大於 1000，欠標值會環繞成大數。
+    RTL 的計算使用上一拍登錄的 raw_signal 與 nominal 範圍，
+    deviation / normalized_value 比 semantic_key 晚一個 frame_valid 輸出；
+    此處回傳的各陣列已依樣本對齊。
+    範圍寬度為 0 (重置後尚未出現已知類型) 時 RTL 結果為 X，此處填 0。
+    """
+    types = np.asarray(signal_types).astype(np.uint8, copy=False)
+    raw = np.asarray(values).astype(np.uint32, copy=False)
+    lo, hi = nominal_ranges(types, carry)
+
+    under = raw < lo
+    over = raw > hi
+    deviation = np.where(under, lo - raw, np.where(over, raw - hi, np.uint32(0)))
+    severity = np.where(under, np.uint8(SEVERITY_UNDER),
+                        np.where(over, np.uint8(SEVERITY_OVER), np.uint8(SEVERITY_NORMAL)))
+
+    span = hi - lo
+    scaled = (raw - lo) * np.uint32(1000)
+    normalized = np.zeros(len(raw), dtype=np.uint32)
+    np.floor_divide(scaled, span, out=normalized, where=span != 0)
+
+    return {
+        'semantic_key': KEY_TABLE[types],
+        'unit_code': UNIT_TABLE[types],
+        'nominal_min': lo,
+        'nominal_max': hi,
+        'normalized_value': normalized,
+        'deviation': deviation.astype(np.uint32, copy=False),
+        'severity': severity.astype(np.uint8, copy=False),
+    }
+
+
+def semanticize_scalar(signal_type, value, nominal=(0, 0)):
+    """單一樣本的參考模型 (nominal 為未定義類型時沿用的範圍)"""
+    _, _, lo, hi = SEMANTIC_TABLE.get(signal_type, (0, 0) + tuple(nominal))
+    raw = value & MASK32
+    if raw < lo:
+        deviation, severity = lo - raw, SEVERITY_UNDER
+    elif raw > hi:
+        deviation, severity = raw - hi, SEVERITY_OVER
+    else:
+        deviation, severity = 0, SEVERITY_NORMAL
+    span = (hi - lo) & MASK32
+    normalized = (((raw - lo) & MASK32) * 1000 & MASK32) // span if span else 0
+    return normalized, deviation, severity
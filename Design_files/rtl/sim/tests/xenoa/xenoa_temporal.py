@@ -0,0 +1,163 @@
+"""
+XENOA 時序對齊模型
+依 xenoa_temporal.sv 整批計算多個來源的 aligned_timestamp、漂移累加器、
+drift_warning 與 causal_distance，並依時間視窗分組供後續逐窗彙總
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+DRIFT_THRESHOLD = 100        # 100 ppm
+MAX_CAUSAL_DISTANCE = 1000
+DEFAULT_WINDOW = 100_000_000  # 100ms
+
+TemporalResult = namedtuple('TemporalResult', [
+    'aligned', 'window', 'device_drift', 'fabric_drift', 'cloud_drift',
+    'drift_warning', 'causal_distance', 'relative_ppm', 'groups'])
+# relative_ppm: (2, S) fabric / cloud 相對裝置時間的頻率偏差估計
+
+
+class WindowGroups:
+    """
+    依視窗編號分組的索引: order 為穩定排序後的樣本位置，
+    第 k 組為 order[starts[k]:starts[k] + counts[k]]，視窗編號為 windows[k]
+    """
+
+    def __init__(self, window):
+        window = np.asarray(window).reshape(-1)
+        if len(window) and (window[1:] >= window[:-1]).all():
+            self.order = np.arange(len(window))  # 時間戳單調時免排序
+        else:
+            self.order = np.argsort(window, kind='stable')
+        ordered = window[self.order]
+        self.starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if len(window) else \
+            np.zeros(0, dtype=np.intp)
+        self.windows = ordered[self.starts]
+        self.counts = np.diff(np.r_[self.starts, len(window)])
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __iter__(self):
+        """依序產生 (視窗編號, 樣本位置陣列)"""
+        for window, start, count in zip(self.windows, self.starts, self.counts):
+            yield int(window), self.order[start:start + count]
+
+    def reduce(self, values, ufunc=np.add):
+        """對每個視窗做 ufunc.reduceat (例如 np.add / np.maximum)"""
+        values = np.asarray(values).reshape(-1)
+        if len(self.starts) == 0:
+            return values[:0]
+        return ufunc.reduceat(values[self.order], self.starts)
+
+
+def group_windows(window):
+    """依視窗編號分組"""
+    return WindowGroups(window)
+
+
+def causal_distance_after(steps, start=0):
+    """
+    chain_valid 連續 steps 次後的 causal_distance
+    RTL 先加 1，舊值 > 1000 時改寫為 1000，因此到達 1001 後在 1000/1001 間交替
+    """
+    steps = np.asarray(steps, dtype=np.int64)
+    if start > MAX_CAUSAL_DISTANCE + 1:
+        # 超出範圍的初值於下一次 chain_valid 直接變為 1000
+        return np.where(steps == 0, start,
+                        causal_distance_after(np.maximum(steps - 1, 0), MAX_CAUSAL_DISTANCE))
+    reach = MAX_CAUSAL_DISTANCE + 1 - start
+    extra = steps - reach
+    return np.where(extra <= 0, start + steps,
+                    MAX_CAUSAL_DISTANCE + 1 - (extra & 1)).astype(np.uint32)
+
+
+def fit_drift_ppm(device, other):
+    """
+    以最小平方法估計 other 時鐘相對裝置時間的頻率偏差 (ppm)
+    (other - device) 對 device 的斜率，沿最後一軸計算
+    """
+    device = np.asarray(device)
+    x = (device - device[..., :1]).astype(np.float64)
+    y = (np.asarray(other).astype(np.int64) - device.astype(np.int64)).astype(np.float64)
+    x = x - x.mean(axis=-1, keepdims=True)
+    y = y - y.mean(axis=-1, keepdims=True)
+    sxx = (x * x).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (x * y).sum(axis=-1) / sxx
+    return np.where(sxx > 0, slope * 1e6, 0.0)
+
+
+class TemporalAligner:
+    """
+    num_sources 個來源的時序對齊模型，跨批次保留各來源的暫存器
+    輸入陣列形狀為 (num_sources, n) 或單一來源的 (n,)，最後一軸為時間順序
+    回傳值為各樣本時脈緣後的暫存器內容；aligned_timestamp 由 temporal_base 驅動，
+    RTL 輸出比輸入晚一拍，此處已依樣本對齊
+    """
+
+    def __init__(self, num_sources=1, window_size=DEFAULT_WINDOW):
+        self.num_sources = num_sources
+        self.window_size = window_size
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        self.time_last = np.zeros((3, self.num_sources), dtype=np.uint64)
+        self.drift_acc = np.zeros((3, self.num_sources), dtype=np.uint32)
+        self.causal_distance = np.zeros(self.num_sources, dtype=np.uint32)
+
+    def _drift(self, ts):
+        """(3, S, n) 時間戳 -> (3, S, n) 漂移累加器與上一拍的累加器"""
+        n = ts.shape[-1]
+        prev = np.concatenate([self.time_last[..., None], ts[..., :-1]], axis=-1)
+        delta = ts - prev
+        value = ((delta * np.uint64(1_000_000)) // np.uint64(1000)) & np.uint64(MASK32)
+
+        # last == 0 時累加器不更新 (第一筆樣本)
+        idx = np.where(prev != 0, np.arange(n), -1)
+        np.maximum.accumulate(idx, axis=-1, out=idx)
+        acc = np.take_along_axis(value, np.maximum(idx, 0), axis=-1).astype(np.uint32)
+        held = idx < 0
+        acc[held] = np.broadcast_to(self.drift_acc[..., None], acc.shape)[held]
+
+        acc_old = np.concatenate([self.drift_acc[..., None], acc[..., :-1]], axis=-1)
+        return acc, acc_old
+
+    def align(self, device, fabric, cloud, chain_valid=True):
+        """處理一批時間戳，回傳 TemporalResult"""
+        single = np.ndim(device) == 1
+        ts = np.stack([np.atleast_2d(np.asarray(t, dtype=np.uint64))
+                       for t in (device, fabric, cloud)])
+        if ts.shape[1] != self.num_sources:
+            raise ValueError(f"expected {self.num_sources} sources, got {ts.shape[1]}")
+        n = ts.shape[-1]
+
+        aligned = ts.max(axis=0)
+        window = aligned // np.uint64(self.window_size)
+
+        acc, acc_old = self._drift(ts)
+        drift_warning = (acc_old > DRIFT_THRESHOLD).any(axis=0)
+
+        relative_ppm = fit_drift_ppm(ts[0], ts[1:])
+
+        valid = np.broadcast_to(np.asarray(chain_valid, dtype=bool), (self.num_sources, n))
+        steps = np.cumsum(valid, axis=-1)
+        causal = np.stack([causal_distance_after(steps[s], int(self.causal_distance[s]))
+                           for s in range(self.num_sources)])
+
+        if n:
+            self.time_last = ts[..., -1].copy()
+            self.drift_acc = acc[..., -1].copy()
+            self.causal_distance = causal[:, -1].copy()
+
+        result = TemporalResult(aligned, window, acc[0], acc[1], acc[2], drift_warning,
+                                causal, relative_ppm, group_windows(window))
+        if single:
+            result = result._replace(**{name: getattr(result, name)[..., 0, :]
+                                        for name in result._fields
+                                        if name not in ('groups', 'relative_ppm')},
+                                     relative_ppm=result.relative_ppm[:, 0])
+        return result
@@ -4,7 +4,21 @@ XRAS 測試平台
 測試 SLA 編排、政策執行、可靠性評分和結算整合
 """
 
+import os
 import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "xrbus"))
+from xrbus_capture import replay_capture
+from xras_evidence import (BUNDLE_BYTES, EvidenceBatch, EvidencePool, benchmark_handoff,
+                           bundle_from_int, bundle_to_int, bundles_view)
+from xras_policy_execution import execute_policies, penalty_of, registered_outputs
+from xras_reliability_scoring import ReliabilityScorer
+from xras_settlement_integration import SETTLEMENT_NAMES, SettlementReducer, settlement_type
+from xras_sla_orchestration import SLATree, benchmark_rollup
 
 class XRASTestBench:
     def __init__(self):
@@ -35,30 +49,61 @@ class XRASTestBench:
             (5, "Cloud", 999, 5, "Premium cloud SLA")
         ]
         
+        # 六層彙總樹: 每個 board 4 個裝置，其餘各層扇出 2 (共 64 個裝置)
+        tree = SLATree.regular(64, fanout=(4, 2, 2, 2))
+        for level, name, target, drift, desc in test_slas:
+            tree.set_sla(level, None, target, drift)
+        
+        # 裝置 0 的可靠性在容忍範圍內下降，只重算其祖先
+        device = 0
+        recomputed = tree.set_score(device, 990 - random.randint(0, 10))
+        path = [device] + tree.ancestors(device)
+        assert recomputed <= len(path), "Only ancestors should be recomputed"
+        
         for level, name, target, drift, desc in test_slas:
+            sla = tree.node(level, path[level])
             print(f"\n{name} SLA:")
             print(f"  Level: {level}")
             print(f"  Target Reliability: {target}/1000")
             print(f"  Tolerated Drift: {drift}")
             print(f"  Description: {desc}")
+            print(f"  Current Reliability: {sla['reliability']}/1000")
+            print(f"  Gap: {sla['gap']}")
+            print(f"  Status: {sla['status']}")
             
-            # 模擬可靠性計算
-            current = target - random.randint(0, drift)
-            gap = max(0, target - current)
-            
-            if current < target - drift:
-                status = "BREACHED"
-            elif current < target:
-                status = "WARNING"
-            else:
-                status = "ACTIVE"
-            
-            print(f"  Current Reliability: {current}/1000")
-            print(f"  Gap: {gap}")
-            print(f"  Status: {status}")
-            
-            assert current <= 1000, "Reliability must be ≤1000"
-            assert gap >= 0, "Gap must be non-negative"
+            assert sla['reliability'] <= 1000, "Reliability must be ≤1000"
+            assert sla['gap'] >= 0, "Gap must be non-negative"
+        
+        # 單一裝置嚴重劣化: 裝置本身 BREACHED，上層依子節點平均判斷
+        tree.set_score(5, 900)
+        assert tree.node(0, 5)['status'] == "BREACHED", "Degraded device should breach"
+        board = tree.node(1, tree.ancestors(5)[0])
+        assert board['reliability'] == (1000 * 3 + 900) // 4, "Board should average its devices"
+        
+        # 增量更新應與完整重算一致
+        rng = np.random.default_rng(2026)
+        for _ in range(20):
+            devices = rng.integers(0, 64, 8)
+            tree.update(devices, rng.integers(900, 1001, 8))
+        incremental = [r.copy() for r in tree.reliability]
+        tree.rollup()
+        assert all((a == b).all() for a, b in zip(incremental, tree.reliability)), "Incremental roll-up drifted"
+        
+        # 每層目標表可直接以 NumPy 陣列傳入
+        table = SLATree.regular(64, fanout=(4, 2, 2, 2),
+                                targets=np.array([990, 980, 950, 950, 990, 999]),
+                                tolerated=np.array([10, 20, 50, 50, 10, 5]))
+        assert int(table.target[2][0]) == 950 and int(table.tolerated[5][0]) == 5, "Array target table not applied"
+        
+        # 1M 裝置基準測試
+        bench = benchmark_rollup(num_devices=1_000_000)
+        print(f"\nRoll-up benchmark ({bench['devices']} devices, {bench['nodes']} SLA nodes):")
+        print(f"  Build: {bench['build_s'] * 1e3:.1f} ms, full roll-up: {bench['full_rollup_s'] * 1e3:.1f} ms")
+        print(f"  Single update: {bench['single_update_us']:.1f} µs "
+              f"({bench['single_nodes_per_update']:.2f} nodes recomputed)")
+        print(f"  Batch of {bench['batch_updates']}: {bench['batch_update_s'] * 1e3:.1f} ms "
+              f"({bench['batch_nodes']} nodes recomputed)")
+        print(f"  Status per level [active, warning, breached]: {bench['tree'].status_counts()}")
         
         print("\n✅ SLA Orchestration test PASSED")
         return True
@@ -76,32 +121,16 @@ class XRASTestBench:
             (4, "Fatal", 800, 160000, 4, 0, "Shutdown + $160000 penalty")
         ]
         
-        for event_type, name, severity, expected_penalty, expected_action, expected_credit, desc in test_events:
+        result = execute_policies([event[0] for event in test_events], [event[2] for event in test_events])
+        
+        for i, (event_type, name, severity, expected_penalty, expected_action, expected_credit, desc) in enumerate(test_events):
             print(f"\n{name} Event:")
             print(f"  Type: {event_type}")
             print(f"  Severity: {severity}")
             
-            # 計算罰款
-            if event_type == 0:
-                penalty = 0
-                credit = 100
-                action_code = 0
-            elif event_type == 1:
-                penalty = base_penalty * severity // 100
-                action_code = 1
-                credit = 0
-            elif event_type == 2:
-                penalty = base_penalty * severity // 50
-                action_code = 2
-                credit = 0
-            elif event_type == 3:
-                penalty = base_penalty * severity // 10
-                action_code = 3
-                credit = 0
-            else:
-                penalty = base_penalty * severity // 5
-                action_code = 4
-                credit = 0
+            penalty = int(result.penalty[i])
+            credit = int(result.credit[i])
+            action_code = int(result.action[i])
             
             print(f"  Penalty: ${penalty}")
             print(f"  Credit: ${credit}")
@@ -112,6 +141,37 @@ class XRASTestBench:
             assert credit == expected_credit, f"Credit should be ${expected_credit}"
             assert action_code == expected_action, f"Action code should be {expected_action}"
         
+        # 百萬筆事件重播 (含未定義類型與 32 位元環繞的大嚴重度)
+        rng = np.random.default_rng(2026)
+        count = 5_000_000
+        types = rng.integers(0, 7, count, dtype=np.uint8)
+        severities = rng.integers(0, 1000, count, dtype=np.uint32)
+        severities[::1000] = rng.integers(0, 1 << 32, len(severities[::1000]), dtype=np.uint64)
+        start = time.perf_counter()
+        result = execute_policies(types, severities)
+        elapsed = time.perf_counter() - start
+        
+        for i in rng.choice(count, 2000, replace=False):
+            assert int(result.penalty[i]) == penalty_of(int(types[i]), int(severities[i])), \
+                f"Penalty mismatch at {i}"
+        for row in result.totals:
+            mask = types == row['event_type'] if row['event_type'] < 5 else types >= 5
+            assert row['events'] == mask.sum(), "Event count mismatch"
+            assert row['penalty'] == result.penalty[mask].astype(np.int64).sum(), "Penalty total mismatch"
+            assert row['credit'] == result.credit[mask].astype(np.int64).sum(), "Credit total mismatch"
+            print(f"  type {row['event_type']:>3}: events={row['events']:>8} "
+                  f"penalty=${row['penalty']:>14} credit=${row['credit']:>9}")
+        
+        # RTL 暫存器保持語義: 正常事件後 penalty_amount 保持前一個值
+        penalty_reg, credit_reg = registered_outputs(types[:4], execute_policies(types[:4], severities[:4]))
+        for i in range(4):
+            writes = [j for j in range(i + 1) if types[j] != 0]
+            expected = penalty_of(int(types[writes[-1]]), int(severities[writes[-1]])) if writes else 0
+            assert int(penalty_reg[i]) == expected, f"penalty_amount register mismatch at {i}"
+        
+        print(f"Batch policy execution: {count} events in {elapsed * 1e3:.1f} ms "
+              f"({count / elapsed / 1e6:.1f} M events/s)")
+        
         print("\n✅ Policy Execution test PASSED")
         return True
     
@@ -129,60 +189,218 @@ class XRASTestBench:
             ("Recovery", 50, 950, 0, "STABLE")  # 接近歷史值
         ]
         
-        for name, drift, expected_score, impact, expected_trend in test_cases:
+        # 每個情境一個邊界，歷史固定 (history_valid 由外部提供)，管線填滿後讀取輸出
+        scorer = ReliabilityScorer(len(test_cases))
+        scorer.load_history(np.arange(len(test_cases)), [history] * len(test_cases))
+        drifts = np.array([case[1] for case in test_cases], dtype=np.uint32)
+        for _ in range(4):
+            outputs = scorer.tick(drifts, push=False)
+        trend_names = {0: "DOWN", 1: "STABLE", 2: "UP"}
+        
+        for i, (name, drift, expected_score, _, expected_trend) in enumerate(test_cases):
             print(f"\n{name} Scenario:")
             print(f"  Drift: {drift}")
             
-            score = 1000 - drift
+            score = int(outputs['reliability_index'][i])
+            trend = trend_names[int(outputs['reliability_trend'][i])]
+            impact = int(outputs['deviation_impact'][i])
             print(f"  Reliability Score: {score}/1000")
-            
-            # 趨勢判斷
-            if score > history[0] + 10:
-                trend = "UP"
-            elif score < history[0] - 10:
-                trend = "DOWN"
-            else:
-                trend = "STABLE"
-            
             print(f"  Trend: {trend}")
             print(f"  Impact: {impact}")
             
             assert score == expected_score, f"Score should be {expected_score}"
             assert trend == expected_trend, f"Trend should be {expected_trend}"
+            assert impact == max(history[0] - score, 0), "Impact should be history[0] - score"
+        
+        # 全機隊評分: 10 萬個邊界，每個 tick 一次向量化更新，與逐拍參考模型比對
+        rng = np.random.default_rng(2026)
+        num_boundaries, ticks = 100_000, 32
+        scorer = ReliabilityScorer(num_boundaries)
+        weights = rng.integers(50, 150, num_boundaries, dtype=np.uint32)
+        watched = rng.choice(num_boundaries, 8, replace=False)
+        reference = {int(b): {'drift': 0, 'score': 1000, 'impact': 0, 'trend': 1,
+                              'history': [1000] * 16} for b in watched}
+        elapsed = 0.0
+        for _ in range(ticks):
+            drift = rng.integers(0, 400, num_boundaries, dtype=np.uint32)
+            drift[rng.random(num_boundaries) < 0.2] = 0
+            valid = rng.random(num_boundaries) < 0.9
+            start = time.perf_counter()
+            scorer.tick(drift, weights, valid)
+            elapsed += time.perf_counter() - start
+            
+            for b, ref in reference.items():
+                if not valid[b]:
+                    continue
+                score, h0 = ref['score'], ref['history'][0]
+                expected = {
+                    'deviation_impact': ref['impact'],
+                    'reliability_trend': ref['trend'],
+                    'reliability_index': score,
+                    'boundary_score': score * int(weights[b]) // 100,
+                }
+                ref['impact'] = h0 - score if h0 > score else 0
+                ref['trend'] = 2 if score > h0 + 10 else 0 if score < h0 - 10 else 1
+                ref['score'] = 1000 - ref['drift'] if ref['drift'] > 0 else 1000
+                ref['drift'] = int(drift[b])
+                ref['history'] = [score] + ref['history'][:-1]
+                actual = {name: int(value[b]) for name, value in scorer.outputs().items()}
+                assert actual == expected, f"Boundary {b} mismatch: {actual} != {expected}"
+                assert scorer.historical_scores(b).tolist() == ref['history'], "History ring mismatch"
+        
+        print(f"\nFleet scoring: {num_boundaries} boundaries x {ticks} ticks in {elapsed * 1e3:.1f} ms "
+              f"({num_boundaries * ticks / elapsed / 1e6:.1f} M boundary-ticks/s)")
         
         print("\n✅ Reliability Scoring test PASSED")
         return True
     
+    def test_evidence_handoff(self):
+        """測試證據包打包與 XRAS → XRST 交接"""
+        print("\n=== XRAS Evidence Bundle Handoff Test ===")
+        
+        # 證據包暫存器與 RTL 位元串接一致: {boundary_id, current_score, drift_value, impact, trend, historical_scores[0]}
+        history = [950, 920, 880, 850]
+        drifts = np.array([0, 100, 300, 600, 50], dtype=np.uint32)
+        scorer = ReliabilityScorer(len(drifts), boundary_ids=0x7000 + np.arange(len(drifts)), evidence=True)
+        scorer.load_history(np.arange(len(drifts)), [history] * len(drifts))
+        for _ in range(3):
+            previous = {
+                'score': scorer.current_score.copy(),
+                'drift': scorer.drift_value.copy(),
+                'impact': scorer.impact.copy(),
+                'trend': scorer.trend.copy(),
+            }
+            scorer.tick(drifts, push=False)
+        
+        bundles = scorer.evidence_bundle
+        for i in range(len(drifts)):
+            expected = ((0x7000 + i) << 136 | int(previous['score'][i]) << 104 |
+                        int(previous['drift'][i]) << 72 | int(previous['impact'][i]) << 40 |
+                        int(previous['trend'][i]) << 32 | history[0])
+            assert bundle_to_int(bundles, i) == expected, f"Bundle {i} bit layout mismatch"
+            assert bundle_from_int(expected)[0] == bundles[i], "Round trip mismatch"
+        print(f"\nBundle 0x7003: score={int(bundles['score'][3])} drift={int(bundles['drift'][3])} "
+              f"impact={int(bundles['impact'][3])} trend={int(bundles['trend'][3])}")
+        
+        # 零複製解析: 位元組緩衝區直接以結構化 dtype 檢視
+        raw = bytearray(bundles.tobytes())
+        parsed = bundles_view(raw)
+        assert len(raw) == len(drifts) * BUNDLE_BYTES, "Bundles should be 1024 bits each"
+        assert np.shares_memory(parsed, np.frombuffer(raw, dtype=np.uint8)), "Parser should not copy"
+        assert (parsed == bundles).all(), "Parsed bundles mismatch"
+        
+        # 緩衝池: 區塊用盡時 acquire 阻塞，歸還後可重用
+        pool = EvidencePool(slots=2, capacity=8)
+        first = pool.acquire().copy_from(bundles)
+        second = pool.acquire()
+        assert pool.available() == 0, "Pool should be exhausted"
+        assert (first.bundles['boundary_id'] == 0x7000 + np.arange(len(drifts))).all(), "Slot contents mismatch"
+        first.release()
+        second.release()
+        assert pool.available() == 2 and len(first) == 0, "Slots should return to the pool"
+        
+        result = benchmark_handoff(total=2_000_000)
+        print(f"\nHandoff: {result['bundles']} bundles in {result['seconds'] * 1e3:.1f} ms "
+              f"({result['bundles_per_s'] / 1e6:.1f} M bundles/s, {result['mb_per_s']:.0f} MB/s)")
+        print(f"Dict baseline: {result['dict_bundles_per_s'] / 1e6:.2f} M bundles/s")
+        assert result['bundles'] == 2_000_000, "Every bundle should reach the consumer"
+        
+        # 生產者拋出例外時交接不得卡住，例外須在 join 後重新拋出
+        original_fill = EvidenceBatch.fill
+        def failing_fill(batch, *args):
+            raise RuntimeError("XRAS producer failed")
+        EvidenceBatch.fill = failing_fill
+        try:
+            benchmark_handoff(total=200_000, dict_baseline=100)
+        except RuntimeError as e:
+            error = e
+        else:
+            error = None
+        finally:
+            EvidenceBatch.fill = original_fill
+        assert error is not None and str(error) == "XRAS producer failed", "Producer error not propagated"
+        
+        print("\n✅ Evidence Handoff test PASSED")
+        return True
+    
     def test_settlement_integration(self):
         """測試結算整合層"""
         print("\n=== XRAS Settlement Integration Test ===")
         
+        # (名稱, credit, penalty, 淨額, 有號分類, RTL 分類, 說明)
+        # RTL 的 net_value 為 32 位元無號數，負淨額亦判為 CREDIT
         test_settlements = [
-            ("Credit", 200, 50, 150, 0, "Net credit"),
-            ("Penalty", 50, 200, -150, 1, "Net penalty"),
-            ("Neutral", 100, 100, 0, 2, "No net change")
+            ("Credit", 200, 50, 150, 0, 0, "Net credit"),
+            ("Penalty", 50, 200, -150, 1, 0, "Net penalty"),
+            ("Neutral", 100, 100, 0, 2, 2, "No net change")
         ]
         
-        for name, credit, penalty, net, expected_type, desc in test_settlements:
+        # 三個邊界各一筆事件，同一視窗關閉時整批分類
+        credits = [case[1] for case in test_settlements]
+        penalties = [case[2] for case in test_settlements]
+        reducer = SettlementReducer(len(test_settlements), unsigned_compare=False)
+        reducer.push(np.arange(len(test_settlements)), credits, penalties, 0)
+        rows = reducer.flush()
+        rtl = SettlementReducer(len(test_settlements))
+        rtl.push(np.arange(len(test_settlements)), credits, penalties, 0)
+        rtl_rows = rtl.flush()
+        
+        for row, rtl_row, (name, credit, penalty, net, expected_type, rtl_type, desc) in \
+                zip(rows, rtl_rows, test_settlements):
             print(f"\n{name} Case:")
             print(f"  Credits: ${credit}")
             print(f"  Penalties: ${penalty}")
-            print(f"  Net Settlement: ${net}")
-            
-            if net > 0:
-                result = "CREDIT"
-                calc_type = 0
-            elif net < 0:
-                result = "PENALTY"
-                calc_type = 1
-            else:
-                result = "ADJUSTMENT"
-                calc_type = 2
+            print(f"  Net Settlement: ${int(row['net'])}")
             
-            print(f"  Result: {result}")
+            calc_type = int(row['settlement_type'])
+            print(f"  Result: {SETTLEMENT_NAMES[calc_type]} "
+                  f"(RTL: {SETTLEMENT_NAMES[int(rtl_row['settlement_type'])]})")
             print(f"  Description: {desc}")
             
+            assert int(row['net']) == net, f"Net should be {net}"
             assert calc_type == expected_type, f"Type should be {expected_type}"
+            assert int(rtl_row['settlement_type']) == rtl_type, f"RTL type should be {rtl_type}"
+        
+        # 串流彙總: 1000 萬筆事件分批送入，狀態大小固定，結果與整批 np.unique 彙總一致
+        rng = np.random.default_rng(2026)
+        num_events, batch_size, num_boundaries = 10_000_000, 262_144, 4096
+        boundary = rng.integers(0, num_boundaries, num_events)
+        credit = rng.integers(0, 200, num_events, dtype=np.uint32)
+        penalty = rng.integers(0, 200, num_events, dtype=np.uint32)
+        window = np.sort(rng.integers(0, 400, num_events))
+        late = rng.random(num_events) < 0.001
+        window[late] = np.maximum(window[late] - 1, 0)  # 少量晚到事件
+        
+        reducer = SettlementReducer(num_boundaries)
+        state = sum(a.nbytes for a in vars(reducer).values() if isinstance(a, np.ndarray))
+        batches = ((boundary[i:i + batch_size], credit[i:i + batch_size],
+                    penalty[i:i + batch_size], window[i:i + batch_size])
+                   for i in range(0, num_events, batch_size))
+        start = time.perf_counter()
+        rows = np.concatenate(list(reducer.stream(batches)))
+        elapsed = time.perf_counter() - start
+        assert state == sum(a.nbytes for a in vars(reducer).values() if isinstance(a, np.ndarray)), \
+            "Reducer state should not grow with the stream"
+        
+        effective = np.maximum.accumulate(window)
+        keys, inverse = np.unique(effective * num_boundaries + boundary, return_inverse=True)
+        expected_net = (np.bincount(inverse, weights=credit) - np.bincount(inverse, weights=penalty)).astype(np.int64)
+        assert len(rows) == len(keys), "One settlement row per (window, boundary)"
+        assert (rows['window'] * num_boundaries + rows['boundary'] == keys).all(), "Row order mismatch"
+        assert (rows['net'] == expected_net).all(), "Window net mismatch"
+        assert (rows['settlement_type'] == settlement_type(expected_net)).all(), "Classification mismatch"
+        assert not (rows['settlement_type'] == 1).any(), "RTL never classifies a window as PENALTY"
+        assert (rows['settlement_id'] == np.arange(len(rows))).all(), "Settlement IDs should be sequential"
+        assert reducer.late_events == int((effective != window).sum()), "Late event count mismatch"
+        assert (reducer.net == np.bincount(boundary, weights=credit.astype(np.int64) - penalty,
+                                           minlength=num_boundaries)).all(), "Running net mismatch"
+        
+        counts = np.bincount(rows['settlement_type'], minlength=3)
+        print(f"\nStreamed {num_events} events in {elapsed * 1e3:.0f} ms "
+              f"({num_events / elapsed / 1e6:.1f} M events/s), state {state / 1024:.0f} KiB")
+        print(f"Closed windows: {len(np.unique(rows['window']))}, settlements: {len(rows)} "
+              f"(credit {counts[0]}, penalty {counts[1]}, adjustment {counts[2]}), "
+              f"late events: {reducer.late_events}")
         
         print("\n✅ Settlement Integration test PASSED")
         return True
@@ -236,6 +454,30 @@ class XRASTestBench:
         print("\n✅ End-to-End Reliability Service test PASSED")
         return True
     
+    def test_capture_replay(self):
+        """測試重播 XR-BUS 擷取檔作為可靠性事件來源"""
+        print("\n=== XRAS Capture Replay Test ===")
+        
+        with replay_capture() as reader:
+            per_boundary = np.zeros(1 << 16, dtype=np.int64)
+            for batch in reader.batches(4096):
+                per_boundary += np.bincount(batch['boundary_id'], minlength=1 << 16)
+            
+            # 依 trace_id 回溯結算所需的來源訊框
+            last = reader[len(reader) - 1]
+            source = reader.by_trace(last.parent_id)
+            
+            print(f"Replayed Frames: {len(reader)}")
+            for boundary in np.flatnonzero(per_boundary):
+                print(f"  Boundary 0x{boundary:04x}: {per_boundary[boundary]} events")
+            print(f"Last Event Parent: frame {reader.find(last.parent_id)}")
+            
+            assert per_boundary.sum() == len(reader), "Replay dropped events"
+            assert source is not None and source.trace_id == last.parent_id, "Parent frame not found"
+        
+        print("\n✅ Capture Replay test PASSED")
+        return True
+    
     def run_all_tests(self):
         """執行所有測試"""
         print("XRAS Test Bench Started")
@@ -245,8 +487,10 @@ class XRASTestBench:
             ("SLA Orchestration", self.test_sla_orchestration),
             ("Policy Execution", self.test_policy_execution),
             ("Reliability Scoring", self.test_reliability_scoring),
+            ("Evidence Handoff", self.test_evidence_handoff),
             ("Settlement Integration", self.test_settlement_integration),
-            ("End-to-End", self.test_end_to_end_reliability)
+            ("End-to-End", self.test_end_to_end_reliability),
+            ("Capture Replay", self.test_capture_replay)
         ]
         
         passed = 0
@@ -0,0 +1,210 @@
+"""
+XRAS 證據包模型
+xras_reliability_scoring.sv 的 1024-bit evidence_bundle 以固定 128-byte 記錄存放，
+透過共用緩衝池在 XRAS 與 XRST 模型之間零複製交接
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+BUNDLE_BITS = 1024
+BUNDLE_BYTES = BUNDLE_BITS // 8
+
+# evidence_bundle = {boundary_id, current_score, drift_value, impact, trend, historical_scores[0]}
+# 共 152 位元，全部落在位元組邊界上 (小端序: 第 n 個位元組 = bundle[8n+7:8n])
+#   history0        0  [31:0]
+#   trend           4  [39:32]
+#   impact          5  [71:40]
+#   drift           9  [103:72]
+#   score          13  [135:104]
+#   boundary_id    17  [151:136]
+EVIDENCE_DTYPE = np.dtype({
+    'names': ['history0', 'trend', 'impact', 'drift', 'score', 'boundary_id'],
+    'formats': ['<u4', 'u1', '<u4', '<u4', '<u4', '<u2'],
+    'offsets': [0, 4, 5, 9, 13, 17],
+    'itemsize': BUNDLE_BYTES,
+})
+
+
+def alloc_bundles(count):
+    """配置零初始化的證據包陣列 (保留位元恆為 0)"""
+    return np.zeros(count, dtype=EVIDENCE_DTYPE)
+
+
+def pack_bundles(out, boundary_id, score, drift, impact, trend, history0, ids=slice(None)):
+    """將各欄位陣列寫入 out[ids] (out 為 EVIDENCE_DTYPE 陣列，ids 可為切片或索引陣列)"""
+    out['boundary_id'][ids] = boundary_id
+    out['score'][ids] = score
+    out['drift'][ids] = drift
+    out['impact'][ids] = impact
+    out['trend'][ids] = trend
+    out['history0'][ids] = history0
+    return out
+
+
+def bundles_view(buf):
+    """以 EVIDENCE_DTYPE 零複製檢視連續的證據包緩衝區 (bytes / bytearray / mmap)"""
+    return np.frombuffer(buf, dtype=EVIDENCE_DTYPE)
+
+
+def bundle_to_int(bundles, index=0):
+    """轉為與 RTL evidence_bundle 相同的 1024-bit 整數"""
+    raw = bundles.reshape(-1).view(np.uint8).reshape(-1, BUNDLE_BYTES)
+    return int.from_bytes(raw[index].tobytes(), 'little')
+
+
+def bundle_from_int(value):
+    """由 RTL evidence_bundle 整數還原單筆證據包"""
+    return bundles_view(bytearray(value.to_bytes(BUNDLE_BYTES, 'little')))
+
+
+class EvidenceBatch:
+    """緩衝池中的一個區塊: bundles 為前 count 筆的零複製檢視"""
+
+    __slots__ = ('pool', 'slot', 'buffer', 'count')
+
+    def __init__(self, pool, slot, buffer):
+        self.pool = pool
+        self.slot = slot
+        self.buffer = buffer
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def bundles(self):
+        return self.buffer[:self.count]
+
+    def fill(self, boundary_id, score, drift, impact, trend, history0):
+        """寫入一批證據包 (覆蓋區塊原內容)"""
+        n = len(score)
+        if n > len(self.buffer):
+            raise ValueError(f"batch of {n} exceeds slot capacity {len(self.buffer)}")
+        self.count = n
+        pack_bundles(self.buffer[:n], boundary_id, score, drift, impact, trend, history0)
+        return self
+
+    def copy_from(self, bundles):
+        """複製既有的證據包陣列 (例如 ReliabilityScorer.evidence_bundle) 至區塊"""
+        n = len(bundles)
+        if n > len(self.buffer):
+            raise ValueError(f"batch of {n} exceeds slot capacity {len(self.buffer)}")
+        self.count = n
+        self.buffer[:n] = bundles
+        return self
+
+    def release(self):
+        """歸還區塊給緩衝池"""
+        self.pool.release(self)
+
+
+class EvidencePool:
+    """
+    固定數量、固定容量的證據包區塊
+    acquire() 在區塊用盡時阻塞，形成生產者與消費者之間的背壓
+    """
+
+    def __init__(self, slots=8, capacity=65536):
+        self.capacity = capacity
+        self._storage = alloc_bundles(slots * capacity)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self.slots = slots
+
+    def acquire(self, timeout=None):
+        slot = self._free.get(timeout=timeout)
+        start = slot * self.capacity
+        return EvidenceBatch(self, slot, self._storage[start:start + self.capacity])
+
+    def release(self, batch):
+        batch.count = 0
+        self._free.put(batch.slot)
+
+    def available(self):
+        return self._free.qsize()
+
+
+def benchmark_handoff(total=4_000_000, batch_size=65536, slots=4, seed=2026, dict_baseline=20000):
+    """
+    量測 XRAS 生產者執行緒 -> 佇列 -> XRST 消費者執行緒的證據包交接吞吐量
+    消費者直接讀取欄位檢視 (不轉成 dict)；dict_baseline 筆數另以 dict 序列化量測作為對照
+    回傳 dict: bundles, seconds, bundles_per_s, mb_per_s, dict_bundles_per_s, checksum
+    """
+    rng = np.random.default_rng(seed)
+    score = rng.integers(0, 1001, batch_size, dtype=np.uint32)
+    drift = 1000 - score
+    impact = rng.integers(0, 100, batch_size, dtype=np.uint32)
+    trend = rng.integers(0, 3, batch_size, dtype=np.uint8)
+    history0 = rng.integers(0, 1001, batch_size, dtype=np.uint32)
+    boundary_id = rng.integers(0, 1 << 16, batch_size, dtype=np.uint16)
+
+    pool = EvidencePool(slots, batch_size)
+    handoff = queue.Queue()
+    result = {'checksum': 0, 'bundles': 0}
+    errors = []
+
+    def producer():
+        # 例外時仍送出結束標記，避免消費者永久等待
+        try:
+            remaining = total
+            while remaining > 0 and not errors:
+                n = min(batch_size, remaining)
+                batch = pool.acquire()
+                batch.fill(boundary_id[:n], score[:n], drift[:n], impact[:n], trend[:n], history0[:n])
+                handoff.put(batch)
+                remaining -= n
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            handoff.put(None)
+
+    def consumer():
+        # 例外後繼續歸還緩衝區直到結束標記，避免生產者卡在 acquire()
+        while True:
+            batch = handoff.get()
+            if batch is None:
+                return
+            try:
+                if not errors:
+                    bundles = batch.bundles
+                    result['checksum'] += int(bundles['score'].sum(dtype=np.int64))
+                    result['bundles'] += len(bundles)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                batch.release()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=producer), threading.Thread(target=consumer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+
+    # 對照組: 每筆證據包轉成 dict 後交接
+    fields = EVIDENCE_DTYPE.names
+    reference = pack_bundles(alloc_bundles(dict_baseline), boundary_id[:dict_baseline],
+                             score[:dict_baseline], drift[:dict_baseline], impact[:dict_baseline],
+                             trend[:dict_baseline], history0[:dict_baseline])
+    start = time.perf_counter()
+    dicts = [dict(zip(fields, row)) for row in reference.tolist()]
+    checksum = sum(d['score'] for d in dicts)
+    dict_elapsed = time.perf_counter() - start
+    assert checksum == int(reference['score'].sum(dtype=np.int64)), "dict baseline checksum mismatch"
+
+    return {
+        'bundles': result['bundles'],
+        'seconds': elapsed,
+        'bundles_per_s': result['bundles'] / elapsed,
+        'mb_per_s': result['bundles'] * BUNDLE_BYTES / elapsed / 1e6,
+        'dict_bundles_per_s': dict_baseline / dict_elapsed,
+        'checksum': result['checksum'],
+    }
@@ -0,0 +1,162 @@
+"""
+XRAS 可靠性評分模型
+依 xras_reliability_scoring.sv 的暫存器管線，以單一 2-D 陣列保存每個邊界 16 筆歷史分數，
+每個 tick 以一次向量化運算更新所有邊界
+"""
+
+import numpy as np
+
+from xras_evidence import alloc_bundles, pack_bundles
+
+MASK32 = 0xFFFFFFFF
+HISTORY_DEPTH = 16
+
+TREND_DOWN = 0
+TREND_STABLE = 1
+TREND_UP = 2
+
+
+def score_of(drift):
+    """current_score = 1000 - drift * 1000 / 1000 (32 位元環繞)；drift 為 0 時為 1000"""
+    drift = np.asarray(drift).astype(np.uint32, copy=False)
+    score = np.uint32(1000) - (drift * np.uint32(1000)) // np.uint32(1000)
+    return np.where(drift > 0, score, np.uint32(1000)).astype(np.uint32)
+
+
+def boundary_score_of(score, weight):
+    """boundary_score = current_score * boundary_weight / 100 (32 位元環繞)"""
+    score = np.asarray(score).astype(np.uint32, copy=False)
+    weight = np.asarray(weight).astype(np.uint32, copy=False)
+    return (score * weight) // np.uint32(100)
+
+
+def impact_of(score, history0):
+    """historical_scores[0] 高於 current_score 時的差值"""
+    score = np.asarray(score).astype(np.uint32, copy=False)
+    history0 = np.asarray(history0).astype(np.uint32, copy=False)
+    return np.where(history0 > score, history0 - score, np.uint32(0)).astype(np.uint32)
+
+
+def trend_of(score, history0):
+    """與 historical_scores[0] ± 10 比較 (兩者皆為 32 位元無號，加減會環繞)"""
+    score = np.asarray(score).astype(np.uint32, copy=False)
+    history0 = np.asarray(history0).astype(np.uint32, copy=False)
+    return np.select([score > history0 + np.uint32(10), score < history0 - np.uint32(10)],
+                     [TREND_UP, TREND_DOWN], TREND_STABLE).astype(np.uint8)
+
+
+def steady_state(drift, weight=100):
+    """管線填滿且 drift / weight 固定時的 (reliability_index, boundary_score)"""
+    score = score_of(drift)
+    return score, boundary_score_of(score, weight)
+
+
+def tensor_drift(tensors):
+    """drift_value = semantic_tensor[63:32] ((N, 8) uint64 張量的 32 位元通道零複製檢視)"""
+    return tensors.view('<u4')[:, 1]
+
+
+class ReliabilityScorer:
+    """
+    num_boundaries 個 xras_reliability_scoring.sv 實例的向量化模型
+    每個 tick 等同所有 (或 valid 遮罩內) 邊界各有一個 tensor_valid 週期:
+      drift_value -> current_score -> reliability_index / boundary_score / impact / trend
+      -> deviation_impact / reliability_trend
+    各輸出相對輸入的延遲與 RTL 相同 (reliability_index 晚兩拍，deviation_impact 晚三拍)
+    歷史分數以環形陣列保存，historical_scores[0] 為最近一筆；
+    push=True 時每個 tick 將新的 reliability_index 推入歷史
+    RTL 未重置 drift_value / impact / trend，此處視為 0 / 0 / 1
+    evidence=True 時另保存每個邊界的 evidence_bundle 暫存器 (EVIDENCE_DTYPE，每邊界 128 bytes)
+    """
+
+    def __init__(self, num_boundaries, initial_score=1000, depth=HISTORY_DEPTH,
+                 boundary_ids=None, evidence=False):
+        self.num_boundaries = num_boundaries
+        self.depth = depth
+        self.initial_score = initial_score
+        if boundary_ids is None:
+            boundary_ids = np.arange(num_boundaries)
+        self.boundary_ids = np.asarray(boundary_ids).astype(np.uint16)
+        self.capture_evidence = evidence
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        n = self.num_boundaries
+        self.history = np.full((n, self.depth), self.initial_score, dtype=np.uint32)
+        self.head = np.zeros(n, dtype=np.intp)  # historical_scores[0] 的位置
+        self.drift_value = np.zeros(n, dtype=np.uint32)
+        self.current_score = np.full(n, 1000, dtype=np.uint32)
+        self.impact = np.zeros(n, dtype=np.uint32)
+        self.trend = np.full(n, TREND_STABLE, dtype=np.uint8)
+        self.reliability_index = np.full(n, 1000, dtype=np.uint32)
+        self.boundary_score = np.full(n, 1000, dtype=np.uint32)
+        self.deviation_impact = np.zeros(n, dtype=np.uint32)
+        self.reliability_trend = np.full(n, TREND_STABLE, dtype=np.uint8)
+        self.evidence_bundle = alloc_bundles(n) if self.capture_evidence else None
+        self.ticks = 0
+
+    def load_history(self, boundary_ids, scores):
+        """載入歷史分數 (scores 每列依 historical_scores[0..] 順序，最近一筆在前)"""
+        ids = np.asarray(boundary_ids, dtype=np.intp)
+        scores = np.asarray(scores, dtype=np.uint32).reshape(len(ids), -1)
+        k = scores.shape[1]
+        self.head[ids] = 0
+        self.history[ids] = self.initial_score
+        self.history[ids, :k] = scores
+
+    def historical_scores(self, boundary_id):
+        """單一邊界的 historical_scores[0:15]"""
+        idx = (self.head[boundary_id] + np.arange(self.depth)) % self.depth
+        return self.history[boundary_id, idx].copy()
+
+    def history0(self, ids=slice(None)):
+        """各邊界的 historical_scores[0]"""
+        return self.history[np.arange(self.num_boundaries)[ids], self.head[ids]]
+
+    def tick(self, drift, weight=100, valid=None, push=True):
+        """
+        所有邊界前進一個週期
+        drift / weight 可為純量或長度 num_boundaries 的陣列；valid 為 tensor_valid 遮罩
+        """
+        n = self.num_boundaries
+        rows = np.arange(n) if valid is None else np.flatnonzero(valid)
+        ids = slice(None) if valid is None else rows  # 全部更新時以切片避免花式索引
+        drift = np.broadcast_to(np.asarray(drift, dtype=np.uint32), (n,))[ids]
+        weight = np.broadcast_to(np.asarray(weight, dtype=np.uint32), (n,))[ids]
+
+        score = self.current_score[ids]
+        history0 = self.history[rows, self.head[ids]]
+
+        # 同一時脈緣: 右側皆讀取舊值
+        if self.evidence_bundle is not None:
+            pack_bundles(self.evidence_bundle, self.boundary_ids[ids], score,
+                         self.drift_value[ids], self.impact[ids], self.trend[ids], history0, ids)
+        self.deviation_impact[ids] = self.impact[ids]
+        self.reliability_trend[ids] = self.trend[ids]
+        self.reliability_index[ids] = score
+        self.boundary_score[ids] = boundary_score_of(score, weight)
+        self.impact[ids] = impact_of(score, history0)
+        self.trend[ids] = trend_of(score, history0)
+        self.current_score[ids] = score_of(self.drift_value[ids])
+        self.drift_value[ids] = drift
+
+        if push:
+            head = (self.head[ids] - 1) % self.depth
+            self.head[ids] = head
+            self.history[rows, head] = self.reliability_index[ids]
+        self.ticks += 1
+        return self.outputs(ids)
+
+    def tick_tensors(self, tensors, weight=100, valid=None, push=True):
+        """以 (num_boundaries, 8) 語義張量前進一個週期"""
+        return self.tick(tensor_drift(tensors), weight, valid, push)
+
+    def outputs(self, ids=slice(None)):
+        """目前的輸出埠值"""
+        return {
+            'reliability_index': self.reliability_index[ids],
+            'boundary_score': self.boundary_score[ids],
+            'deviation_impact': self.deviation_impact[ids],
+            'reliability_trend': self.reliability_trend[ids],
+        }
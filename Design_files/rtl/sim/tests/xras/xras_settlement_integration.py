@@ -0,0 +1,175 @@
+"""
+XRAS 結算整合模型
+依 xras_settlement_integration.sv 的 credit - penalty 淨額與結算類型，
+以串流方式逐邊界、逐結算視窗累計，視窗關閉時整批輸出分類結果
+"""
+
+import numpy as np
+
+from xras_policy_execution import sum_by_row
+
+SETTLEMENT_CREDIT = 0
+SETTLEMENT_PENALTY = 1
+SETTLEMENT_ADJUSTMENT = 2
+SETTLEMENT_NAMES = {SETTLEMENT_CREDIT: "CREDIT", SETTLEMENT_PENALTY: "PENALTY",
+                    SETTLEMENT_ADJUSTMENT: "ADJUSTMENT"}
+
+NUM_BOUNDARIES = 1 << 16  # boundary_id[15:0]
+
+SETTLEMENT_DTYPE = np.dtype([
+    ('settlement_id', '<u4'),
+    ('window', '<i8'),
+    ('boundary', '<u4'),
+    ('events', '<i8'),
+    ('credit', '<i8'),
+    ('penalty', '<i8'),
+    ('net', '<i8'),
+    ('settlement_type', 'u1'),
+])
+
+
+def settlement_type(net, unsigned_compare=True):
+    """
+    net > 0 -> CREDIT，net < 0 -> PENALTY，否則 ADJUSTMENT
+    預設逐位元重現 RTL: net_value 為 32 位元無號數，截斷後非零的淨額一律判為 CREDIT；
+    unsigned_compare=False 時依設計意圖 (與原測試平台相同) 以有號淨額分類
+    """
+    net = np.asarray(net)
+    if unsigned_compare:
+        return np.where(net & 0xFFFFFFFF, SETTLEMENT_CREDIT, SETTLEMENT_ADJUSTMENT).astype(np.uint8)
+    return np.where(net > 0, SETTLEMENT_CREDIT,
+                    np.where(net < 0, SETTLEMENT_PENALTY, SETTLEMENT_ADJUSTMENT)).astype(np.uint8)
+
+
+class SettlementReducer:
+    """
+    (boundary, credit, penalty, window) 事件串流的結算彙總
+    狀態只有每個邊界的累計值與目前開啟視窗的累計值 (皆為長度 num_boundaries 的陣列)，
+    與串流長度無關；視窗編號須非遞減，晚到事件併入目前開啟的視窗並計入 late_events
+    unsigned_compare 同 settlement_type()
+    """
+
+    def __init__(self, num_boundaries=NUM_BOUNDARIES, unsigned_compare=True):
+        self.num_boundaries = num_boundaries
+        self.unsigned_compare = unsigned_compare
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        n = self.num_boundaries
+        self.total_credit = np.zeros(n, dtype=np.int64)
+        self.total_penalty = np.zeros(n, dtype=np.int64)
+        self.total_events = np.zeros(n, dtype=np.int64)
+        self.open_credit = np.zeros(n, dtype=np.int64)
+        self.open_penalty = np.zeros(n, dtype=np.int64)
+        self.open_events = np.zeros(n, dtype=np.int64)
+        self.window = -1  # 目前開啟的視窗，-1 表示尚無事件
+        self.settlement_counter = 0
+        self.late_events = 0
+        self.events = 0
+
+    @property
+    def net(self):
+        """各邊界的累計淨額 (credit - penalty)"""
+        return self.total_credit - self.total_penalty
+
+    def _rows(self, window, boundary, events, credit, penalty):
+        rows = np.empty(len(boundary), dtype=SETTLEMENT_DTYPE)
+        rows['settlement_id'] = np.arange(self.settlement_counter,
+                                          self.settlement_counter + len(boundary)) & 0xFFFFFFFF
+        self.settlement_counter += len(boundary)
+        rows['window'] = window
+        rows['boundary'] = boundary
+        rows['events'] = events
+        rows['credit'] = credit
+        rows['penalty'] = penalty
+        rows['net'] = credit - penalty
+        rows['settlement_type'] = settlement_type(rows['net'], self.unsigned_compare)
+        return rows
+
+    def _close_open(self):
+        """關閉目前視窗並清除其累計值，回傳該視窗的結算列"""
+        touched = np.flatnonzero(self.open_events)
+        rows = self._rows(self.window, touched, self.open_events[touched],
+                          self.open_credit[touched], self.open_penalty[touched])
+        self.open_credit[touched] = 0
+        self.open_penalty[touched] = 0
+        self.open_events[touched] = 0
+        return rows
+
+    def push(self, boundaries, credits, penalties, windows):
+        """
+        處理一批事件，回傳此批中關閉之視窗的結算列 (SETTLEMENT_DTYPE，依視窗、邊界排序)
+        最後一個視窗保持開啟，直到出現更新的視窗或呼叫 flush()
+        """
+        boundaries = np.asarray(boundaries, dtype=np.intp)
+        credits = np.asarray(credits).astype(np.uint32, copy=False)
+        penalties = np.asarray(penalties).astype(np.uint32, copy=False)
+        windows = np.broadcast_to(np.asarray(windows, dtype=np.int64), boundaries.shape)
+        n = len(boundaries)
+        if n == 0:
+            return np.zeros(0, dtype=SETTLEMENT_DTYPE)
+        if boundaries.min() < 0 or boundaries.max() >= self.num_boundaries:
+            raise ValueError(f"boundary out of range [0, {self.num_boundaries})")
+        self.events += n
+
+        B = self.num_boundaries
+        self.total_credit += sum_by_row(boundaries, credits, B)
+        self.total_penalty += sum_by_row(boundaries, penalties, B)
+        self.total_events += np.bincount(boundaries, minlength=B)
+
+        # 晚到事件歸入目前視窗
+        effective = np.maximum.accumulate(np.r_[np.int64(self.window), windows])[1:]
+        self.late_events += int(np.count_nonzero(effective != windows))
+
+        # 段 0 延續目前開啟的視窗，其後每次視窗變化開新段
+        change = np.r_[effective[0] != self.window, effective[1:] != effective[:-1]]
+        segment = np.cumsum(change)
+        last = int(segment[-1])
+        segment_window = np.empty(last + 1, dtype=np.int64)
+        segment_window[0] = self.window
+        segment_window[segment[change]] = effective[change]
+
+        keys, inverse = np.unique(segment * B + boundaries, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        credit = sum_by_row(inverse, credits, len(keys))
+        penalty = sum_by_row(inverse, penalties, len(keys))
+        events = np.bincount(inverse, minlength=len(keys))
+        key_segment, key_boundary = np.divmod(keys, B)
+
+        head = key_segment == 0
+        self.open_credit[key_boundary[head]] += credit[head]
+        self.open_penalty[key_boundary[head]] += penalty[head]
+        self.open_events[key_boundary[head]] += events[head]
+        if last == 0:
+            return np.zeros(0, dtype=SETTLEMENT_DTYPE)
+
+        closed = [self._close_open()]
+        middle = (key_segment > 0) & (key_segment < last)
+        closed.append(self._rows(segment_window[key_segment[middle]], key_boundary[middle],
+                                 events[middle], credit[middle], penalty[middle]))
+
+        tail = key_segment == last
+        self.open_credit[key_boundary[tail]] = credit[tail]
+        self.open_penalty[key_boundary[tail]] = penalty[tail]
+        self.open_events[key_boundary[tail]] = events[tail]
+        self.window = int(segment_window[last])
+        return np.concatenate(closed)
+
+    def flush(self):
+        """關閉目前開啟的視窗並回傳其結算列"""
+        if self.window < 0:
+            return np.zeros(0, dtype=SETTLEMENT_DTYPE)
+        rows = self._close_open()
+        self.window = -1
+        return rows
+
+    def stream(self, batches):
+        """消化 (boundaries, credits, penalties, windows) 批次序列，逐批產生關閉視窗的結算列"""
+        for batch in batches:
+            rows = self.push(*batch)
+            if len(rows):
+                yield rows
+        rows = self.flush()
+        if len(rows):
+            yield rows
@@ -0,0 +1,234 @@
+"""
+XRAS SLA 階層彙總模型
+Device → Board → Rack → Cluster → Region → Cloud 彙總樹，
+每層以陣列保存子節點分數總和，裝置分數變動時只重算其祖先節點
+"""
+
+import time
+
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+
+SLA_LEVELS = ("Device", "Board", "Rack", "Cluster", "Region", "Cloud")
+NUM_LEVELS = len(SLA_LEVELS)
+
+STATUS_ACTIVE = 0
+STATUS_WARNING = 1
+STATUS_BREACHED = 2
+STATUS_NAMES = {STATUS_ACTIVE: "ACTIVE", STATUS_WARNING: "WARNING", STATUS_BREACHED: "BREACHED"}
+
+DEFAULT_FANOUT = (16, 8, 16, 8)  # 每個 board / rack / cluster / region 的子節點數
+
+
+def sla_status(reliability, target, tolerated):
+    """
+    xras_sla_orchestration.sv 的狀態判斷 (32 位元無號，target - tolerated 會環繞)
+    reliability < target - tolerated -> BREACHED，reliability < target -> WARNING，否則 ACTIVE
+    """
+    r = np.asarray(reliability).astype(np.uint32)
+    t = np.asarray(target).astype(np.uint32)
+    floor = t - np.asarray(tolerated).astype(np.uint32)
+    return np.where(r < floor, STATUS_BREACHED,
+                    np.where(r < t, STATUS_WARNING, STATUS_ACTIVE)).astype(np.uint8)
+
+
+def reliability_gap(reliability, target):
+    """reliability 低於 target 時的差距"""
+    r = np.asarray(reliability).astype(np.int64)
+    t = np.asarray(target).astype(np.int64)
+    return np.where(r < t, t - r, 0)
+
+
+def sla_ids(level, nodes):
+    """sla_id = {sla_level, 序號[23:0]}"""
+    return (np.uint32(level) << np.uint32(24)) | (np.asarray(nodes).astype(np.uint32) & np.uint32(0xFFFFFF))
+
+
+class SLATree:
+    """
+    六層 SLA 彙總樹
+    parents[l] 為第 l 層節點所屬第 l+1 層節點的索引；上層可靠性 = 子節點可靠性總和 // 子節點數
+    每層保存 sum / count / reliability / target / tolerated / status 陣列
+    """
+
+    def __init__(self, parents, device_scores=1000, targets=None, tolerated=None):
+        if len(parents) != NUM_LEVELS - 1:
+            raise ValueError(f"expected {NUM_LEVELS - 1} parent arrays")
+        self.parents = [np.asarray(p, dtype=np.intp) for p in parents]
+        sizes = [len(self.parents[0])] + [int(p.max()) + 1 if len(p) else 0 for p in self.parents]
+        for level, parent in enumerate(self.parents[1:], start=1):
+            if len(parent) != sizes[level]:
+                raise ValueError(f"level {level} parent array does not cover every node")
+        self.sizes = sizes
+
+        self.count = [None] + [np.bincount(p, minlength=sizes[l + 1]).astype(np.int64)
+                               for l, p in enumerate(self.parents)]
+        if any((c == 0).any() for c in self.count[1:]):
+            raise ValueError("every aggregate node needs at least one child")
+
+        if targets is None:
+            targets = (990, 980, 950, 950, 990, 999)
+        if tolerated is None:
+            tolerated = (10, 20, 50, 50, 10, 5)
+        self.target = [np.full(n, targets[l], dtype=np.uint32) for l, n in enumerate(sizes)]
+        self.tolerated = [np.full(n, tolerated[l], dtype=np.uint32) for l, n in enumerate(sizes)]
+
+        self.reliability = [np.zeros(n, dtype=np.int64) for n in sizes]
+        self.sum = [None] + [np.zeros(n, dtype=np.int64) for n in sizes[1:]]
+        self.status = [np.zeros(n, dtype=np.uint8) for n in sizes]
+        self.reliability[0][:] = device_scores
+        self.rollup()
+
+    @classmethod
+    def regular(cls, num_devices, fanout=DEFAULT_FANOUT, **kwargs):
+        """依固定扇出建立連續編號的樹，所有 region 歸屬單一 cloud"""
+        parents = []
+        size = num_devices
+        for f in fanout:
+            parents.append(np.arange(size) // f)
+            size = -(-size // f)
+        parents.append(np.zeros(size, dtype=np.intp))
+        return cls(parents, **kwargs)
+
+    def set_sla(self, level, nodes, target, tolerated):
+        """設定節點的 SLA 目標並重算狀態"""
+        nodes = np.arange(self.sizes[level]) if nodes is None else np.asarray(nodes)
+        self.target[level][nodes] = target
+        self.tolerated[level][nodes] = tolerated
+        self._refresh(level, nodes)
+
+    def _refresh(self, level, nodes):
+        self.status[level][nodes] = sla_status(self.reliability[level][nodes],
+                                               self.target[level][nodes],
+                                               self.tolerated[level][nodes])
+
+    def rollup(self):
+        """由裝置分數完整重算所有層級"""
+        self._refresh(0, slice(None))
+        for level in range(1, NUM_LEVELS):
+            parent = self.parents[level - 1]
+            self.sum[level][:] = np.bincount(parent, weights=self.reliability[level - 1],
+                                             minlength=self.sizes[level]).astype(np.int64)
+            self.reliability[level][:] = self.sum[level] // self.count[level]
+            self._refresh(level, slice(None))
+
+    def set_score(self, device, score):
+        """單一裝置分數變動: 沿祖先鏈逐層更新，上層可靠性不變時提前停止；回傳重算的節點數"""
+        node = int(device)
+        delta = int(score) - int(self.reliability[0][node])
+        self.reliability[0][node] = score
+        self._refresh(0, node)
+        recomputed = 1
+        for level in range(1, NUM_LEVELS):
+            if delta == 0:
+                break
+            node = int(self.parents[level - 1][node])
+            self.sum[level][node] += delta
+            old = int(self.reliability[level][node])
+            new = int(self.sum[level][node] // self.count[level][node])
+            self.reliability[level][node] = new
+            self._refresh(level, node)
+            recomputed += 1
+            delta = new - old
+        return recomputed
+
+    def update(self, devices, scores):
+        """
+        批次更新裝置分數 (同一裝置重複出現時以最後一筆為準)
+        每層只重算受影響且子節點總和有變動的節點；回傳重算的節點數
+        """
+        devices = np.asarray(devices, dtype=np.intp)
+        scores = np.asarray(scores, dtype=np.int64)
+        if len(devices) == 0:
+            return 0
+        # 保留每個裝置最後一次寫入
+        last = len(devices) - 1 - np.unique(devices[::-1], return_index=True)[1]
+        nodes, scores = devices[last], scores[last]
+
+        delta = scores - self.reliability[0][nodes]
+        self.reliability[0][nodes] = scores
+        self._refresh(0, nodes)
+        recomputed = len(nodes)
+
+        for level in range(1, NUM_LEVELS):
+            changed = delta != 0
+            if not changed.any():
+                break
+            nodes, delta = nodes[changed], delta[changed]
+            parents, inverse = np.unique(self.parents[level - 1][nodes], return_inverse=True)
+            self.sum[level][parents] += np.bincount(inverse, weights=delta).astype(np.int64)
+            old = self.reliability[level][parents]
+            new = self.sum[level][parents] // self.count[level][parents]
+            self.reliability[level][parents] = new
+            self._refresh(level, parents)
+            recomputed += len(parents)
+            nodes, delta = parents, new - old
+        return recomputed
+
+    def ancestors(self, device):
+        """裝置由 board 至 cloud 的祖先節點索引"""
+        chain = []
+        node = int(device)
+        for parent in self.parents:
+            node = int(parent[node])
+            chain.append(node)
+        return chain
+
+    def node(self, level, index):
+        """單一節點的 SLA 狀態"""
+        reliability = int(self.reliability[level][index])
+        target = int(self.target[level][index])
+        return {
+            'level': SLA_LEVELS[level],
+            'sla_id': int(sla_ids(level, index)),
+            'reliability': reliability,
+            'target': target,
+            'tolerated': int(self.tolerated[level][index]),
+            'gap': int(reliability_gap(reliability, target)),
+            'status': STATUS_NAMES[int(self.status[level][index])],
+        }
+
+    def status_counts(self):
+        """各層 ACTIVE / WARNING / BREACHED 節點數"""
+        return [np.bincount(status, minlength=3).tolist() for status in self.status]
+
+
+def benchmark_rollup(num_devices=1_000_000, single_updates=10000, batch_updates=100_000, seed=2026):
+    """
+    量測 1M 裝置的建樹、完整彙總、單筆與批次增量更新
+    回傳每項的秒數與每次重算的平均節點數
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    tree = SLATree.regular(num_devices, device_scores=rng.integers(950, 1001, num_devices))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree.rollup()
+    full = time.perf_counter() - start
+
+    devices = rng.integers(0, num_devices, single_updates)
+    scores = rng.integers(900, 1001, single_updates)
+    start = time.perf_counter()
+    touched = sum(tree.set_score(d, s) for d, s in zip(devices.tolist(), scores.tolist()))
+    single = time.perf_counter() - start
+
+    devices = rng.integers(0, num_devices, batch_updates)
+    scores = rng.integers(900, 1001, batch_updates)
+    start = time.perf_counter()
+    batch_touched = tree.update(devices, scores)
+    batch = time.perf_counter() - start
+
+    return {
+        'devices': num_devices,
+        'nodes': sum(tree.sizes),
+        'build_s': build,
+        'full_rollup_s': full,
+        'single_update_us': single / single_updates * 1e6,
+        'single_nodes_per_update': touched / single_updates,
+        'batch_update_s': batch,
+        'batch_updates': batch_updates,
+        'batch_nodes': batch_touched,
+        'tree': tree,
+    }
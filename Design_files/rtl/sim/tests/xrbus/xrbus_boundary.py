@@ -0,0 +1,71 @@
+"""
+XR-BUS 邊界政策查找表
+預先計算 (boundary_type, boundary_id) -> (dst_boundary, policy_mask)，整批查表
+"""
+
+import numpy as np
+
+BOUNDARY_RACK = 0
+BOUNDARY_CLUSTER = 1
+BOUNDARY_DOMAIN = 2
+BOUNDARY_TENANT = 3
+NUM_BOUNDARY_TYPES = 4
+
+# 各邊界類型的政策遮罩 (xrbus_boundary.sv)；未知類型為 default 分支
+POLICY_MASKS = {
+    BOUNDARY_RACK: 0x00000001,
+    BOUNDARY_CLUSTER: 0x00000003,
+    BOUNDARY_DOMAIN: 0x0000000F,
+    BOUNDARY_TENANT: 0xFFFFFFFF,
+}
+DEFAULT_POLICY_MASK = 0x00000000
+
+
+def boundary_rule(boundary_id, boundary_type):
+    """單一邊界的目標邊界與政策遮罩 (與測試平台既有規則相同)"""
+    if boundary_type == BOUNDARY_RACK:
+        dst_boundary = boundary_id
+    elif boundary_type == BOUNDARY_CLUSTER:
+        dst_boundary = (boundary_id + 0x1000) & 0xFFFF
+    elif boundary_type in (BOUNDARY_DOMAIN, BOUNDARY_TENANT):
+        dst_boundary = (boundary_id & 0xFF00) | 0x00FF
+    else:
+        return boundary_id, DEFAULT_POLICY_MASK
+    return dst_boundary, POLICY_MASKS[boundary_type]
+
+
+class BoundaryPolicyTable:
+    """
+    稠密查找表: dst 以 [類型, boundary_id] 索引 (5 x 65536 x uint16 = 640 KiB)，
+    第 5 列對應所有未知類型 (default: 目標不變、遮罩為 0)
+    """
+
+    def __init__(self):
+        ids = np.arange(1 << 16, dtype=np.uint32)
+        dst = np.empty((NUM_BOUNDARY_TYPES + 1, 1 << 16), dtype=np.uint16)
+        dst[BOUNDARY_RACK] = ids
+        dst[BOUNDARY_CLUSTER] = (ids + 0x1000) & 0xFFFF
+        dst[BOUNDARY_DOMAIN] = (ids & 0xFF00) | 0x00FF
+        dst[BOUNDARY_TENANT] = (ids & 0xFF00) | 0x00FF
+        dst[NUM_BOUNDARY_TYPES] = ids
+        self.dst = dst
+
+        mask = np.full(NUM_BOUNDARY_TYPES + 1, DEFAULT_POLICY_MASK, dtype=np.uint32)
+        for boundary_type, policy_mask in POLICY_MASKS.items():
+            mask[boundary_type] = policy_mask
+        self.policy_mask = mask
+
+        # 8-bit boundary_type -> 查找表列號
+        rows = np.full(256, NUM_BOUNDARY_TYPES, dtype=np.intp)
+        rows[:NUM_BOUNDARY_TYPES] = np.arange(NUM_BOUNDARY_TYPES)
+        self._rows = rows
+
+    def resolve(self, boundary_ids, boundary_types):
+        """整批解析，回傳 (dst_boundary uint16, policy_mask uint32) 陣列"""
+        ids = np.asarray(boundary_ids).astype(np.uint16, copy=False)
+        rows = self._rows[np.asarray(boundary_types).astype(np.uint8, copy=False)]
+        return self.dst[rows, ids], self.policy_mask[rows]
+
+    def resolve_frames(self, frames, boundary_types):
+        """依訊框的 boundary_id 整批解析"""
+        return self.resolve(frames['boundary_id'], boundary_types)
@@ -0,0 +1,193 @@
+"""
+XR-BUS 擷取檔格式
+固定 512-byte 記錄 (xrbus_frame.sv 配置) + 檔頭 + trace_id 索引，以 mmap 零複製讀取
+
+檔案配置:
+    [0, 512)                 檔頭 (與記錄等長，使記錄保持對齊)
+    [512, 512 + 512*N)       訊框記錄，依序號排列
+    [index_offset, ...)      trace_id 索引 (trace_hi, trace_lo, seq)，依 (hi, lo) 排序
+"""
+
+import contextlib
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from xrbus_frame import FRAME_BYTES, FRAME_DTYPE, XRBusFrameView, byte_view, frames_view, split_u128
+
+CAPTURE_MAGIC = b"XRBUSCAP"
+CAPTURE_VERSION = 1
+HEADER_BYTES = FRAME_BYTES
+
+# magic, 格式版本, 記錄大小, 訊框數, 索引位移, 索引筆數, 建立時間 (µs)
+HEADER_STRUCT = struct.Struct("<8sIIQQQQ")
+
+INDEX_DTYPE = np.dtype([('trace_hi', '<u8'), ('trace_lo', '<u8'), ('seq', '<u8')])
+
+
+class CaptureWriter:
+    """依序寫入訊框，關閉時建立 trace_id 索引並回填檔頭"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'wb')
+        self._fh.write(bytes(HEADER_BYTES))
+        self._count = 0
+        self._traces = []  # 每批 trace_id 的 (lo, hi) 複本，每訊框 16 bytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def write(self, frames):
+        """寫入 FRAME_DTYPE 陣列或打包訊框緩衝區"""
+        if not isinstance(frames, np.ndarray):
+            frames = frames_view(frames)
+        self._fh.write(byte_view(frames))
+        self._traces.append(np.array(frames['trace_id'], copy=True))
+        self._count += len(frames)
+
+    def close(self):
+        if self._fh is None:
+            return
+
+        if self._traces:
+            traces = np.concatenate(self._traces)
+        else:
+            traces = np.zeros((0, 2), dtype=np.uint64)
+        self._traces = []
+
+        index = np.empty(len(traces), dtype=INDEX_DTYPE)
+        index['trace_lo'] = traces[:, 0]
+        index['trace_hi'] = traces[:, 1]
+        index['seq'] = np.arange(len(traces), dtype=np.uint64)
+        index = index[np.lexsort((index['trace_lo'], index['trace_hi']))]
+
+        index_offset = HEADER_BYTES + self._count * FRAME_BYTES
+        self._fh.write(index.tobytes())
+
+        self._fh.seek(0)
+        self._fh.write(HEADER_STRUCT.pack(CAPTURE_MAGIC, CAPTURE_VERSION, FRAME_BYTES,
+                                          self._count, index_offset, len(index),
+                                          int(time.time() * 1e6)))
+        self._fh.close()
+        self._fh = None
+
+
+def write_capture(path, batches):
+    """將訊框批次 (如 iter_frame_batches) 寫成擷取檔，回傳訊框數"""
+    with CaptureWriter(path) as writer:
+        for frames in batches:
+            writer.write(frames)
+        return len(writer)
+
+
+class CaptureReader:
+    """以 mmap 開啟擷取檔；訊框與索引皆不載入記憶體"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            header = fh.read(HEADER_STRUCT.size)
+        if len(header) < HEADER_STRUCT.size:
+            raise ValueError(f"{path}: truncated capture header")
+
+        (magic, version, record_size, count, index_offset,
+         index_count, created) = HEADER_STRUCT.unpack(header)
+        if magic != CAPTURE_MAGIC:
+            raise ValueError(f"{path}: not an XR-BUS capture")
+        if version != CAPTURE_VERSION or record_size != FRAME_BYTES:
+            raise ValueError(f"{path}: unsupported capture v{version} / {record_size}-byte records")
+
+        self.created_us = created
+        if count:
+            self.frames = np.memmap(path, dtype=FRAME_DTYPE, mode='r',
+                                    offset=HEADER_BYTES, shape=(count,))
+        else:
+            self.frames = np.zeros(0, dtype=FRAME_DTYPE)
+        if index_count:
+            self._index = np.memmap(path, dtype=INDEX_DTYPE, mode='r',
+                                    offset=index_offset, shape=(index_count,))
+        else:
+            self._index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._bytes = byte_view(self.frames)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, seq):
+        return self.frame(seq)
+
+    def frame(self, seq):
+        """依序號取得單一訊框的零複製檢視"""
+        if not 0 <= seq < len(self.frames):
+            raise IndexError(f"frame {seq} out of range")
+        return XRBusFrameView(self._bytes, seq * FRAME_BYTES)
+
+    def find(self, trace_id):
+        """以 trace_id 查詢序號，找不到回傳 None (二分搜尋索引)"""
+        lo, hi = split_u128(trace_id)
+        index = self._index
+        first = np.searchsorted(index['trace_hi'], np.uint64(hi), side='left')
+        last = np.searchsorted(index['trace_hi'], np.uint64(hi), side='right')
+        if first == last:
+            return None
+        pos = first + np.searchsorted(index['trace_lo'][first:last], np.uint64(lo), side='left')
+        if pos < last and index['trace_lo'][pos] == lo:
+            return int(index['seq'][pos])
+        return None
+
+    def by_trace(self, trace_id):
+        """以 trace_id 取得訊框檢視"""
+        seq = self.find(trace_id)
+        return None if seq is None else self.frame(seq)
+
+    def batches(self, batch_size=65536, start=0, stop=None):
+        """依序產生 FRAME_DTYPE 切片 (皆為 mmap 檢視)"""
+        stop = len(self.frames) if stop is None else min(stop, len(self.frames))
+        for first in range(start, stop, batch_size):
+            yield self.frames[first:min(first + batch_size, stop)]
+
+    def close(self):
+        self._bytes = None
+        self.frames = None
+        self._index = None
+
+
+@contextlib.contextmanager
+def replay_capture(frames=20000, seed=2026, batch_size=8192):
+    """
+    開啟供測試平台重播的擷取檔
+    若設定 XRBUS_CAPTURE 環境變數則重播該檔，否則以固定 seed 產生暫存擷取檔
+    """
+    path = os.environ.get("XRBUS_CAPTURE")
+    if path:
+        with CaptureReader(path) as reader:
+            yield reader
+        return
+
+    from xrbus_stimulus import iter_frame_batches
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "replay.xrcap")
+        write_capture(path, iter_frame_batches(frames, batch_size=batch_size, seed=seed,
+                                               base_time=1_000_000, chained=True))
+        reader = CaptureReader(path)
+        try:
+            yield reader
+        finally:
+            reader.close()
@@ -0,0 +1,203 @@
+"""
+XR-BUS 因果鏈索引
+以 trace_id 為鍵的因果圖，支援串流插入與祖先/後代/根節點/斷鏈查詢
+"""
+
+import time
+from array import array
+
+import numpy as np
+
+from xrbus_frame import join_u128
+
+ROOT = -1        # parent_id == 0，鏈的起點
+UNRESOLVED = -2  # 父事件尚未出現 (亂序到達或斷鏈)
+CYCLIC = -3      # 連結父事件會形成環 (自我引用或損毀的追蹤)，視為斷鏈
+
+
+class CausalIndex:
+    """
+    因果圖索引
+    每個事件配置一個槽位 (slot)，父節點與子節點清單以 array 儲存，
+    根節點查詢使用帶路徑壓縮的 union-find，因此插入與查詢皆為近似 O(1);
+    會形成環的連結在插入時即被拒絕並回報為斷鏈，所有查詢因此必定終止
+    """
+
+    def __init__(self):
+        self._slot = {}                  # trace_id -> slot
+        self._trace = []                 # slot -> trace_id
+        self._parent_id = []             # slot -> parent_id
+        self._parent = array('q')        # slot -> 父槽位 / ROOT / UNRESOLVED
+        self._first_child = array('q')   # 子節點鏈結串列
+        self._next_sibling = array('q')
+        self._uf = array('q')            # union-find 指標 (根節點查詢)
+        self._pending = {}               # 尚未出現的 parent_id -> [子槽位]
+        self._cycles = {}                # 形成環的 parent_id -> [子槽位]
+
+    def __len__(self):
+        return len(self._trace)
+
+    def __contains__(self, trace_id):
+        return trace_id in self._slot
+
+    def insert(self, trace_id, parent_id):
+        """加入一個事件，回傳其槽位；父事件可晚於子事件到達"""
+        if trace_id in self._slot:
+            raise ValueError(f"duplicate trace_id 0x{trace_id:032x}")
+
+        slot = len(self._trace)
+        self._slot[trace_id] = slot
+        self._trace.append(trace_id)
+        self._parent_id.append(parent_id)
+        self._first_child.append(-1)
+        self._next_sibling.append(-1)
+        self._uf.append(slot)
+
+        if parent_id == 0:
+            self._parent.append(ROOT)
+        else:
+            self._parent.append(UNRESOLVED)
+            parent = self._slot.get(parent_id)
+            if parent is None:
+                self._pending.setdefault(parent_id, []).append(slot)
+            else:
+                self._link(slot, parent, parent_id)
+
+        # 先前等待此事件的子事件
+        waiting = self._pending.pop(trace_id, None)
+        if waiting:
+            for child in waiting:
+                self._link(child, slot, trace_id)
+
+        return slot
+
+    def _link(self, child, parent, parent_id):
+        # child 尚未連結，本身即為其樹的根；若 parent 的根也是 child 則連結會成環
+        if self._find(parent) == child:
+            self._parent[child] = CYCLIC
+            self._cycles.setdefault(parent_id, []).append(child)
+            return
+        self._parent[child] = parent
+        self._next_sibling[child] = self._first_child[parent]
+        self._first_child[parent] = child
+        self._uf[child] = parent
+
+    def insert_frames(self, frames):
+        """由 FRAME_DTYPE 批次加入事件"""
+        trace = frames['trace_id']
+        parent = frames['parent_id']
+        insert = self.insert
+        for tlo, thi, plo, phi in zip(trace[:, 0].tolist(), trace[:, 1].tolist(),
+                                      parent[:, 0].tolist(), parent[:, 1].tolist()):
+            insert((thi << 64) | tlo, (phi << 64) | plo)
+
+    def parent(self, trace_id):
+        """父事件 trace_id；根事件回傳 0，父事件未到達或成環則回傳 None"""
+        slot = self._slot[trace_id]
+        parent = self._parent[slot]
+        if parent == ROOT:
+            return 0
+        if parent < 0:
+            return None
+        return self._trace[parent]
+
+    def ancestors(self, trace_id):
+        """由近至遠產生所有已知的祖先 trace_id"""
+        parent = self._parent[self._slot[trace_id]]
+        while parent >= 0:
+            yield self._trace[parent]
+            parent = self._parent[parent]
+
+    def descendants(self, trace_id):
+        """以廣度優先產生所有後代 trace_id"""
+        queue = [self._slot[trace_id]]
+        while queue:
+            nxt = []
+            for slot in queue:
+                child = self._first_child[slot]
+                while child >= 0:
+                    yield self._trace[child]
+                    nxt.append(child)
+                    child = self._next_sibling[child]
+            queue = nxt
+
+    def children(self, trace_id):
+        """直接子事件 trace_id 清單"""
+        result = []
+        child = self._first_child[self._slot[trace_id]]
+        while child >= 0:
+            result.append(self._trace[child])
+            child = self._next_sibling[child]
+        return result
+
+    def _find(self, slot):
+        uf = self._uf
+        top = slot
+        while uf[top] != top:
+            top = uf[top]
+        # 路徑壓縮
+        while uf[slot] != top:
+            uf[slot], slot = top, uf[slot]
+        return top
+
+    def root(self, trace_id):
+        """鏈的最上層已知事件 (若其父事件缺失或成環，即為斷鏈處)"""
+        return self._trace[self._find(self._slot[trace_id])]
+
+    def depth(self, trace_id):
+        """與根事件的距離"""
+        return sum(1 for _ in self.ancestors(trace_id))
+
+    def broken_links(self):
+        """回傳 {缺失或成環的 parent_id: [引用它的 trace_id]}"""
+        broken = {parent_id: [self._trace[s] for s in slots]
+                  for parent_id, slots in self._pending.items()}
+        for parent_id, slots in self._cycles.items():
+            broken.setdefault(parent_id, []).extend(self._trace[s] for s in slots)
+        return broken
+
+    def cycles(self):
+        """回傳 {成環的 parent_id: [引用它的 trace_id]}"""
+        return {parent_id: [self._trace[s] for s in slots]
+                for parent_id, slots in self._cycles.items()}
+
+    def validate_chain(self, trace_ids):
+        """確認序列中每個事件的父事件皆為前一個事件，回傳第一個斷點索引或 None"""
+        parent_ids = self._parent_id
+        slot_of = self._slot
+        prev = None
+        for i, trace_id in enumerate(trace_ids):
+            slot = slot_of.get(trace_id)
+            if slot is None:
+                return i
+            if prev is not None and parent_ids[slot] != prev:
+                return i
+            prev = trace_id
+        return None
+
+
+def benchmark_chain_validation(sizes=(10_000, 100_000, 1_000_000), seed=2026):
+    """
+    量測建立索引與驗證單一長鏈的成本
+    回傳 [(frames, insert_s, validate_s, ns_per_frame)]，每訊框成本應不隨規模成長
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        words = np.frombuffer(rng.bytes(16 * size), dtype='<u8').reshape(size, 2)
+        trace_ids = [join_u128(lo, hi) for lo, hi in words.tolist()]
+        parent_ids = [0] + trace_ids[:-1]
+
+        index = CausalIndex()
+        start = time.perf_counter()
+        for trace_id, parent_id in zip(trace_ids, parent_ids):
+            index.insert(trace_id, parent_id)
+        inserted = time.perf_counter()
+        broken = index.validate_chain(trace_ids)
+        validated = time.perf_counter()
+
+        if broken is not None:
+            raise AssertionError(f"chain broken at {broken}")
+        total = validated - start
+        results.append((size, inserted - start, validated - inserted, total / size * 1e9))
+    return results
@@ -0,0 +1,316 @@
+"""
+XR-BUS 訊框編解碼器
+依照 xrbus_frame.sv 的 4096-bit 位元配置打包與解包訊框
+
+frame_out 以小端序存放: 第 n 個位元組 = frame_out[8n+7:8n]，
+因此 int.from_bytes(buf, "little") 與 RTL 的 frame_out 逐位元相同。
+"""
+
+import hashlib
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FRAME_BITS = 4096
+FRAME_BYTES = FRAME_BITS // 8
+PAYLOAD_BYTES = 128
+HASH_WORDS = 4  # frame_hash[255:0] 以 4 個 64-bit 字組表示
+
+MASK16 = 0xFFFF
+MASK32 = 0xFFFFFFFF
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# payload_len [1553:1544] 與 version [1585:1554] 不在位元組邊界上，
+# 以第 193 位元組起的 64-bit 字組一併存取 (其餘位元屬保留區，恆為 0)
+LEN_VERSION_OFFSET = 193
+PAYLOAD_LEN_BITS = 10
+
+# 位元組偏移 (位元偏移 / 8)
+#   module_id      0  [15:0]
+#   boundary_id    2  [31:16]
+#   op_code        4  [39:32]
+#   device_time    5  [103:40]
+#   fabric_time   13  [167:104]
+#   cloud_time    21  [231:168]
+#   trace_id      29  [359:232]   (lo, hi)
+#   parent_id     45  [487:360]   (lo, hi)
+#   semantic_hash 61  [519:488]
+#   payload       65  [1543:520]
+#   len_version  193  [1585:1544]
+FRAME_STRUCT = struct.Struct("<HHBQQQQQQQI128sQ")
+
+FRAME_DTYPE = np.dtype({
+    'names': ['module_id', 'boundary_id', 'op_code',
+              'device_time', 'fabric_time', 'cloud_time',
+              'trace_id', 'parent_id', 'semantic_hash',
+              'payload', 'len_version'],
+    'formats': ['<u2', '<u2', 'u1',
+                '<u8', '<u8', '<u8',
+                ('<u8', 2), ('<u8', 2), '<u4',
+                ('u1', PAYLOAD_BYTES), '<u8'],
+    'offsets': [0, 2, 4, 5, 13, 21, 29, 45, 61, 65, LEN_VERSION_OFFSET],
+    'itemsize': FRAME_BYTES,
+})
+
+
+def split_u128(value):
+    """將 128-bit 整數拆成 (lo, hi) 64-bit 字組"""
+    return value & MASK64, (value >> 64) & MASK64
+
+
+def join_u128(lo, hi):
+    """將 (lo, hi) 64-bit 字組合併為 128-bit 整數"""
+    return (int(hi) << 64) | int(lo)
+
+
+def pack_len_version(payload_len, version):
+    """組合 payload_len 與 version 字組"""
+    return (payload_len & 0x3FF) | ((version & MASK32) << PAYLOAD_LEN_BITS)
+
+
+def alloc_frames(count):
+    """配置可容納 count 個訊框的零初始化緩衝區"""
+    return bytearray(FRAME_BYTES * count)
+
+
+def pack_frame_into(buf, offset, module_id, boundary_id, op_code,
+                    device_time, fabric_time, cloud_time,
+                    trace_id, parent_id, semantic_hash,
+                    payload=b"", payload_len=None, version=0x200):
+    """將訊框欄位打包進預先配置的緩衝區 (payload 以小端序對應 payload[7:0] 起)"""
+    if len(payload) > PAYLOAD_BYTES:
+        raise ValueError(f"payload exceeds {PAYLOAD_BYTES} bytes: {len(payload)}")
+    if payload_len is None:
+        payload_len = len(payload)
+
+    trace_lo, trace_hi = split_u128(trace_id)
+    parent_lo, parent_hi = split_u128(parent_id)
+
+    FRAME_STRUCT.pack_into(
+        buf, offset,
+        module_id & MASK16,
+        boundary_id & MASK16,
+        op_code & 0xFF,
+        device_time & MASK64,
+        fabric_time & MASK64,
+        cloud_time & MASK64,
+        trace_lo, trace_hi,
+        parent_lo, parent_hi,
+        semantic_hash & MASK32,
+        bytes(payload),
+        pack_len_version(payload_len, version),
+    )
+
+
+def encode_frame(frame, buf=None, offset=0):
+    """將 generate_frame 產生的字典編碼為 512-byte 訊框"""
+    if buf is None:
+        buf = alloc_frames(1)
+        offset = 0
+    pack_frame_into(
+        buf, offset,
+        frame['module_id'], frame['boundary_id'], frame['op_code'],
+        frame['device_time'], frame['fabric_time'], frame['cloud_time'],
+        frame['trace_id'], frame['parent_id'], frame['semantic_hash'],
+        frame['payload'], frame.get('payload_len'), frame['version'],
+    )
+    return buf
+
+
+def decode_frame(buf, offset=0):
+    """將訊框解碼為與 generate_frame 相同鍵值的字典"""
+    view = XRBusFrameView(buf, offset)
+    return {
+        'module_id': view.module_id,
+        'boundary_id': view.boundary_id,
+        'op_code': view.op_code,
+        'device_time': view.device_time,
+        'fabric_time': view.fabric_time,
+        'cloud_time': view.cloud_time,
+        'trace_id': view.trace_id,
+        'parent_id': view.parent_id,
+        'semantic_hash': view.semantic_hash,
+        'payload': bytes(view.payload),
+        'payload_len': view.payload_len,
+        'version': view.version,
+    }
+
+
+def frame_to_int(buf, offset=0):
+    """轉為與 RTL frame_out 相同的 4096-bit 整數"""
+    return int.from_bytes(byte_view(buf)[offset:offset + FRAME_BYTES], "little")
+
+
+def frame_from_int(value):
+    """由 RTL frame_out 整數還原訊框緩衝區"""
+    return bytearray(value.to_bytes(FRAME_BYTES, "little"))
+
+
+def byte_view(buf):
+    """以位元組 memoryview 檢視 bytearray / mmap / FRAME_DTYPE 陣列 (不複製)"""
+    if isinstance(buf, np.ndarray):
+        return memoryview(buf.reshape(-1).view(np.uint8))
+    return memoryview(buf).cast('B')
+
+
+def frames_view(buf):
+    """以 FRAME_DTYPE 零複製檢視連續的訊框緩衝區"""
+    return np.frombuffer(buf, dtype=FRAME_DTYPE)
+
+
+def payload_len_of(frames):
+    """取出批次訊框的 payload_len 陣列"""
+    return (frames['len_version'] & 0x3FF).astype(np.uint16)
+
+
+def version_of(frames):
+    """取出批次訊框的 version 陣列"""
+    return ((frames['len_version'] >> PAYLOAD_LEN_BITS) & MASK32).astype(np.uint32)
+
+
+class XRBusFrameView:
+    """單一訊框的零複製檢視，欄位於存取時才從緩衝區解出"""
+
+    __slots__ = ('_mv', '_offset')
+
+    def __init__(self, buf, offset=0):
+        self._mv = byte_view(buf)
+        self._offset = offset
+        if len(self._mv) < offset + FRAME_BYTES:
+            raise ValueError("buffer too small for an XR-BUS frame")
+
+    def _u(self, fmt, pos):
+        return struct.unpack_from(fmt, self._mv, self._offset + pos)[0]
+
+    @property
+    def module_id(self):
+        return self._u("<H", 0)
+
+    @property
+    def boundary_id(self):
+        return self._u("<H", 2)
+
+    @property
+    def op_code(self):
+        return self._mv[self._offset + 4]
+
+    @property
+    def device_time(self):
+        return self._u("<Q", 5)
+
+    @property
+    def fabric_time(self):
+        return self._u("<Q", 13)
+
+    @property
+    def cloud_time(self):
+        return self._u("<Q", 21)
+
+    @property
+    def trace_id(self):
+        lo, hi = struct.unpack_from("<QQ", self._mv, self._offset + 29)
+        return join_u128(lo, hi)
+
+    @property
+    def parent_id(self):
+        lo, hi = struct.unpack_from("<QQ", self._mv, self._offset + 45)
+        return join_u128(lo, hi)
+
+    @property
+    def semantic_hash(self):
+        return self._u("<I", 61)
+
+    @property
+    def payload(self):
+        """完整 1024-bit payload 的 memoryview (不複製)"""
+        start = self._offset + 65
+        return self._mv[start:start + PAYLOAD_BYTES]
+
+    @property
+    def payload_len(self):
+        return self._u("<Q", LEN_VERSION_OFFSET) & 0x3FF
+
+    @property
+    def version(self):
+        return (self._u("<Q", LEN_VERSION_OFFSET) >> PAYLOAD_LEN_BITS) & MASK32
+
+    def raw(self):
+        """整個 512-byte 訊框的 memoryview"""
+        return self._mv[self._offset:self._offset + FRAME_BYTES]
+
+
+def frame_hash(module_id, boundary_id, op_code, device_time, fabric_time,
+               trace_id, parent_id):
+    """
+    xrbus_frame.sv 的 frame_hash (256-bit 整數)
+    {module_id, boundary_id, op_code} ^ {device_time[31:0], fabric_time[31:0]}
+        ^ {trace_id[63:0], parent_id[63:0]}，各運算元零擴展至 256 位元
+    """
+    header = ((module_id & MASK16) << 24) | ((boundary_id & MASK16) << 8) | (op_code & 0xFF)
+    times = ((device_time & MASK32) << 32) | (fabric_time & MASK32)
+    ids = ((trace_id & MASK64) << 64) | (parent_id & MASK64)
+    return header ^ times ^ ids
+
+
+def frame_hash_of(buf, offset=0):
+    """由打包訊框計算 frame_hash"""
+    view = XRBusFrameView(buf, offset)
+    return frame_hash(view.module_id, view.boundary_id, view.op_code,
+                      view.device_time, view.fabric_time,
+                      view.trace_id, view.parent_id)
+
+
+def frame_hash_batch(frames):
+    """
+    整批計算 frame_hash，回傳 (N, 4) uint64 小端字組
+    字組 0 = 低 64 位元；雜湊上半部 128 位元恆為 0
+    """
+    header = ((frames['module_id'].astype(np.uint64) << np.uint64(24)) |
+              (frames['boundary_id'].astype(np.uint64) << np.uint64(8)) |
+              frames['op_code'].astype(np.uint64))
+    times = ((frames['device_time'] << np.uint64(32)) |
+             (frames['fabric_time'] & np.uint64(MASK32)))
+
+    words = np.zeros((len(frames), HASH_WORDS), dtype=np.uint64)
+    words[:, 0] = header ^ times ^ frames['parent_id'][:, 0]
+    words[:, 1] = frames['trace_id'][:, 0]
+    return words
+
+
+def hash_words_to_int(words):
+    """將一列雜湊字組轉回整數"""
+    return sum(int(w) << (64 * i) for i, w in enumerate(words))
+
+
+def frame_sha256(frames, block_frames=1, workers=None):
+    """
+    以執行緒池計算 SHA-256，每 block_frames 個訊框產生一個摘要
+    hashlib 僅在輸入超過 2 KiB 時釋放 GIL，
+    因此 block_frames >= 4 (>= 2 KiB) 才能在多核心上平行執行
+    """
+    mv = byte_view(frames)
+    count = len(mv) // FRAME_BYTES
+    block_bytes = FRAME_BYTES * block_frames
+    n_blocks = -(-count // block_frames)
+    digests = np.empty((n_blocks, 32), dtype=np.uint8)
+
+    def hash_range(first, last):
+        for block in range(first, last):
+            start = block * block_bytes
+            digests[block] = np.frombuffer(
+                hashlib.sha256(mv[start:start + block_bytes]).digest(), dtype=np.uint8)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n_blocks < 2:
+        hash_range(0, n_blocks)
+        return digests
+
+    step = -(-n_blocks // (workers * 4))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(hash_range, first, min(first + step, n_blocks))
+                for first in range(0, n_blocks, step)]
+        for job in jobs:
+            job.result()
+    return digests
@@ -0,0 +1,153 @@
+"""
+XR-BUS 完整性與版本檢查模型
+依 xrbus_integrity.sv 整批計算 version_compatible 與 frame_signature，
+並可用行程池平行檢查整個擷取檔
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from xrbus_frame import FRAME_BYTES, byte_view, version_of
+
+SIGNATURE_WORDS = 8  # frame_signature[511:0] 以 8 個 64-bit 字組表示 (字組 0 = [63:0])
+
+IntegrityResult = namedtuple('IntegrityResult', ['bitmap', 'count', 'compatible', 'signatures'])
+
+
+def frame_words(frames):
+    """以 (N, 64) uint64 檢視訊框 (字組 k = frame[64k+63:64k])"""
+    raw = np.frombuffer(byte_view(frames), dtype='<u8')
+    return raw.reshape(-1, FRAME_BYTES // 8)
+
+
+def raw_signatures(frames):
+    """{256'b0, frame[255:0] ^ frame[511:256] ^ frame[767:512]}，未套用保持行為"""
+    words = frame_words(frames)
+    signatures = np.zeros((len(words), SIGNATURE_WORDS), dtype=np.uint64)
+    np.bitwise_xor(words[:, 0:4], words[:, 4:8], out=signatures[:, 0:4])
+    signatures[:, 0:4] ^= words[:, 8:12]
+    return signatures
+
+
+def compatibility(frames, min_compatible):
+    """frame_in[1585:1554] >= min_compatible (32-bit 與 8-bit 無號比較)"""
+    return version_of(frames) >= np.uint32(min_compatible & 0xFF)
+
+
+def frame_versions(frames):
+    """frame_version 輸出埠僅 8 位元，取 version 低 8 位元"""
+    return (version_of(frames) & 0xFF).astype(np.uint8)
+
+
+def hold_signatures(signatures, compatible, carry=None):
+    """
+    不相容訊框不更新 frame_signature，輸出維持上一個相容訊框的簽章
+    carry 為前一段結束時的暫存器值 (預設為重置值 0)
+    """
+    n = len(compatible)
+    last = np.where(compatible, np.arange(n), -1)
+    np.maximum.accumulate(last, out=last)
+    held = signatures[np.maximum(last, 0)]
+    leading = last < 0
+    if leading.any():
+        held[leading] = 0 if carry is None else carry
+    return held
+
+
+class IntegrityChecker:
+    """
+    xrbus_integrity.sv 的批次模型 (每個訊框 = 一個 frame_valid 週期)
+    回傳值為各訊框時脈緣後的暫存器內容，RTL 輸出埠比輸入晚一拍
+    """
+
+    def __init__(self, min_compatible=0x00):
+        self.min_compatible = min_compatible & 0xFF
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        self.frame_version = 0
+        self.version_compatible = False
+        self.frame_signature = np.zeros(SIGNATURE_WORDS, dtype=np.uint64)
+        self.frames = 0
+
+    def check(self, frames):
+        """檢查一批訊框，回傳 IntegrityResult (bitmap 為 little-endian 位元順序)"""
+        compatible = compatibility(frames, self.min_compatible)
+        signatures = hold_signatures(raw_signatures(frames), compatible, self.frame_signature)
+
+        if len(frames):
+            self.frame_version = int(frame_versions(frames[-1:])[0])
+            self.version_compatible = bool(compatible[-1])
+            self.frame_signature = signatures[-1].copy()
+        self.frames += len(frames)
+
+        return IntegrityResult(np.packbits(compatible, bitorder='little'), len(frames),
+                               int(compatible.sum()), signatures)
+
+
+def _check_range(path, first, last, min_compatible, sig_path):
+    """行程池工作: 自行 mmap 擷取檔並檢查 [first, last)"""
+    from xrbus_capture import CaptureReader
+
+    with CaptureReader(path) as reader:
+        frames = reader.frames[first:last]
+        compatible = compatibility(frames, min_compatible)
+        if sig_path is not None:
+            signatures = np.load(sig_path, mmap_mode='r+')
+            signatures[first:last] = hold_signatures(raw_signatures(frames), compatible)
+            signatures.flush()
+            del signatures
+        leading = int(np.argmax(compatible)) if compatible.any() else len(compatible)
+        return first, np.packbits(compatible, bitorder='little'), int(compatible.sum()), leading
+
+
+def check_capture(path, min_compatible=0x00, workers=None, chunk=65536, sig_out=None):
+    """
+    以行程池檢查整個擷取檔，每個工作行程各自 mmap 檔案，只回傳位元圖
+    sig_out 指定時將 (N, 8) uint64 簽章寫入該 .npy 檔 (以 mmap 平行寫入)
+    """
+    from xrbus_capture import CaptureReader
+
+    if chunk % 8:
+        raise ValueError("chunk must be a multiple of 8 so bitmaps concatenate")
+
+    with CaptureReader(path) as reader:
+        count = len(reader)
+
+    signatures = None
+    if sig_out is not None:
+        signatures = np.lib.format.open_memmap(sig_out, mode='w+', dtype=np.uint64,
+                                               shape=(count, SIGNATURE_WORDS))
+        del signatures
+
+    ranges = [(first, min(first + chunk, count)) for first in range(0, count, chunk)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) < 2:
+        results = [_check_range(path, first, last, min_compatible, sig_out)
+                   for first, last in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(_check_range, path, first, last, min_compatible, sig_out)
+                    for first, last in ranges]
+            results = [job.result() for job in jobs]
+
+    results.sort(key=lambda r: r[0])
+    bitmap = (np.concatenate([r[1] for r in results]) if results
+              else np.zeros(0, dtype=np.uint8))
+    compatible = sum(r[2] for r in results)
+
+    if sig_out is not None:
+        # 區段開頭的不相容訊框沿用前一區段最後的簽章 (依序修補)
+        signatures = np.load(sig_out, mmap_mode='r+')
+        carry = np.zeros(SIGNATURE_WORDS, dtype=np.uint64)
+        for (first, last), (_, _, _, leading) in zip(ranges, results):
+            if leading:
+                signatures[first:first + leading] = carry
+            carry = signatures[last - 1].copy()
+        signatures.flush()
+
+    return IntegrityResult(bitmap, count, compatible, signatures)
@@ -0,0 +1,95 @@
+"""
+XR-BUS 批次激勵產生器
+以 NumPy 一次產生 N 個訊框，輸出即為 FRAME_DTYPE 打包緩衝區
+"""
+
+import time
+
+import numpy as np
+
+from xrbus_frame import FRAME_DTYPE, PAYLOAD_BYTES, pack_len_version
+
+# 預設裝置時間起點 (µs)；固定值讓同一 seed 產生相同訊框與 frame_hash
+BASE_TIME = 1_000_000
+
+
+def wall_clock_time():
+    """目前時間 (µs)，供需要真實時間戳的呼叫端傳入 base_time"""
+    return int(time.time() * 1e6)
+
+
+def generate_frames(count, seed=None, module_id=0x0001, boundary_id=0x0000,
+                    op_code=0x01, base_time=BASE_TIME, interval=1,
+                    fabric_skew=100, cloud_skew=500, payload_len=64,
+                    semantic_hash=None, version=0x200, chained=False,
+                    first_parent=(0, 0), rng=None, out=None):
+    """
+    產生 count 個訊框
+    module_id / boundary_id / op_code 可為純量或長度 count 的陣列;
+    fabric/cloud 時間為 device 時間加上 [-skew, +skew] 的均勻偏移;
+    chained=True 時 parent_id[i] = trace_id[i-1]，第 0 筆為 first_parent
+    (預設 0，分批產生時傳入前一批最後的 trace_id);
+    base_time 預設為固定的 BASE_TIME，需要真實時間可傳入 wall_clock_time()
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    if not 0 <= payload_len <= PAYLOAD_BYTES:
+        raise ValueError(f"payload_len must be within 0..{PAYLOAD_BYTES}")
+
+    frames = np.zeros(count, dtype=FRAME_DTYPE) if out is None else out[:count]
+    if out is not None:
+        frames['payload'] = 0
+
+    frames['module_id'] = module_id
+    frames['boundary_id'] = boundary_id
+    frames['op_code'] = op_code
+
+    # 多時鐘域時間戳 (裝置時間單調遞增)
+    device = np.uint64(base_time) + np.arange(count, dtype=np.uint64) * np.uint64(interval)
+    frames['device_time'] = device
+    frames['fabric_time'] = device + rng.integers(-fabric_skew, fabric_skew + 1, count).astype(np.uint64)
+    frames['cloud_time'] = device + rng.integers(-cloud_skew, cloud_skew + 1, count).astype(np.uint64)
+
+    # 128-bit 追蹤 ID 直接取用隨機位元組
+    frames['trace_id'] = np.frombuffer(rng.bytes(16 * count), dtype='<u8').reshape(count, 2)
+    if chained:
+        if count:
+            frames['parent_id'][0] = first_parent
+        frames['parent_id'][1:] = frames['trace_id'][:-1]
+    else:
+        frames['parent_id'] = np.frombuffer(rng.bytes(16 * count), dtype='<u8').reshape(count, 2)
+
+    if semantic_hash is None:
+        frames['semantic_hash'] = rng.integers(0, 1 << 32, count, dtype=np.uint32)
+    else:
+        frames['semantic_hash'] = semantic_hash
+
+    if payload_len:
+        frames['payload'][:, :payload_len] = np.frombuffer(
+            rng.bytes(payload_len * count), dtype=np.uint8).reshape(count, payload_len)
+    frames['len_version'] = pack_len_version(payload_len, version)
+
+    return frames
+
+
+def iter_frame_batches(total, batch_size=65536, seed=None, **kwargs):
+    """
+    分批產生 total 個訊框 (供 10^6-10^7 等級的長時間測試)
+    同一 seed 下各批的時間戳連續，且重複使用同一塊緩衝區;
+    chained=True 時鏈跨越批次邊界 (下一批第 0 筆的父節點為上一批最後一筆)
+    """
+    rng = np.random.default_rng(seed)
+    base_time = kwargs.pop('base_time', BASE_TIME)
+    interval = kwargs.pop('interval', 1)
+    first_parent = kwargs.pop('first_parent', (0, 0))
+    buf = np.zeros(min(batch_size, total), dtype=FRAME_DTYPE)
+
+    produced = 0
+    while produced < total:
+        count = min(batch_size, total - produced)
+        frames = generate_frames(count, rng=rng, base_time=base_time + produced * interval,
+                                 interval=interval, first_parent=first_parent,
+                                 out=buf, **kwargs)
+        first_parent = tuple(int(w) for w in frames['trace_id'][-1])
+        produced += count
+        yield frames
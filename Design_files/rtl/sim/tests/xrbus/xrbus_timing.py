@@ -0,0 +1,227 @@
+"""
+XR-BUS 時序監測模型
+依 xrbus_timing.sv 的暫存器行為串流計算 aligned_time / drift_warning / jitter_exceeded，
+並以 O(1) 記憶體維護各時鐘域相對裝置時間的漂移估計
+"""
+
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+DRIFT_LIMIT = 1_000_000  # accumulated_drift 警告門檻 (1ms)
+
+TimingEvent = namedtuple('TimingEvent', ['index', 'kind', 'value'])
+
+
+def _as_i64(values):
+    """64-bit 時間戳以二補數解讀 (與 RTL $signed 相同的環繞行為)"""
+    values = np.asarray(values)
+    if values.dtype == np.uint64:
+        return values.view(np.int64)
+    return values.astype(np.int64, copy=False)
+
+
+class DomainDrift:
+    """單一時鐘域相對裝置時間的偏移統計 (平均、變異、EWMA、漂移斜率)"""
+
+    def __init__(self, name, alpha=1.0 / 1024):
+        self.name = name
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.ewma = 0.0
+        self.min = None
+        self.max = None
+        # 最小平方法累計量 (x 為相對首筆的裝置時間)
+        self._x0 = None
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def update(self, offsets, device):
+        n = len(offsets)
+        if n == 0:
+            return
+        y = offsets.astype(np.float64)
+
+        # Welford / Chan 合併
+        mean_b = y.mean()
+        m2_b = ((y - mean_b) ** 2).sum()
+        total = self.count + n
+        delta = mean_b - self.mean
+        self.mean += delta * n / total
+        self._m2 += m2_b + delta * delta * self.count * n / total
+
+        # EWMA 封閉形式: 權重 (1-a)^(n-1-i)
+        decay = 1.0 - self.alpha
+        if self.count == 0:
+            self.ewma = float(y[0])
+        weights = decay ** np.arange(n - 1, -1, -1, dtype=np.float64)
+        self.ewma = self.ewma * decay ** n + self.alpha * float(weights @ y)
+
+        lo, hi = int(offsets.min()), int(offsets.max())
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+        if self._x0 is None:
+            self._x0 = int(device[0])
+        x = (device - self._x0).astype(np.float64)
+        self._sx += x.sum()
+        self._sy += y.sum()
+        self._sxx += x @ x
+        self._sxy += x @ y
+        self.count = total
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def drift_ppm(self):
+        """偏移對裝置時間的斜率 (ppm)"""
+        n = self.count
+        denom = n * self._sxx - self._sx * self._sx
+        if n < 2 or denom == 0:
+            return 0.0
+        return (n * self._sxy - self._sx * self._sy) / denom * 1e6
+
+    def summary(self):
+        return {
+            'domain': self.name,
+            'samples': self.count,
+            'mean': float(self.mean),
+            'stddev': float(self.variance) ** 0.5,
+            'ewma': float(self.ewma),
+            'min': self.min,
+            'max': self.max,
+            'drift_ppm': float(self.drift_ppm),
+        }
+
+
+class TimingMonitor:
+    """
+    xrbus_timing.sv 的串流模型 (每筆時間戳三元組 = 一個 clk)
+    RTL 以暫存器管線運算，因此:
+      jitter_exceeded 於前一拍的 delta 超出 jitter_window 後拉起 (僅正向比較)
+      drift_warning 於前一拍的 accumulated_drift > 1ms 後拉起
+      兩者皆為黏滯旗標，直到 reset()
+    RTL 的 `$signed(accumulated_drift) > 64'd1000000` 因 64'd 為無號常數而整個比較轉為無號，
+    負的累積漂移也會拉起 drift_warning；預設 (unsigned_compare=True) 逐位元重現此行為，
+    unsigned_compare=False 則依設計意圖做有號比較
+    """
+
+    def __init__(self, jitter_window=1000, drift_limit=DRIFT_LIMIT, alpha=1.0 / 1024,
+                 unsigned_compare=True):
+        # jitter_window 為 32-bit，以 $signed 擴展後比較
+        self.jitter_window = int(np.int64(np.int32(np.uint32(jitter_window & 0xFFFFFFFF))))
+        self.drift_limit = drift_limit
+        self.unsigned_compare = unsigned_compare
+        self.domains = {
+            'fabric': DomainDrift('fabric', alpha),
+            'cloud': DomainDrift('cloud', alpha),
+        }
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低 (漂移統計保留)"""
+        self._df = 0
+        self._fc = 0
+        self._acc = 0
+        self.jitter_exceeded = False
+        self.drift_warning = False
+        self.aligned_time = 0
+        self.samples = 0
+        self.jitter_violations = 0
+        self.drift_violations = 0
+
+    def feed(self, device, fabric, cloud, outputs=False):
+        """
+        處理一段時間戳陣列，回傳此段產生的事件
+        outputs=True 時另回傳每拍的 (aligned_time, drift_warning, jitter_exceeded)
+        """
+        d = _as_i64(device)
+        f = _as_i64(fabric)
+        c = _as_i64(cloud)
+        n = len(d)
+        if n == 0:
+            return ([], None) if outputs else []
+
+        df = d - f
+        fc = f - c
+
+        # 每拍讀到的是上一拍的暫存器值
+        df_old = np.empty(n, dtype=np.int64)
+        fc_old = np.empty(n, dtype=np.int64)
+        df_old[0], df_old[1:] = self._df, df[:-1]
+        fc_old[0], fc_old[1:] = self._fc, fc[:-1]
+        acc_new = df_old + fc_old
+        acc_old = np.empty(n, dtype=np.int64)
+        acc_old[0], acc_old[1:] = self._acc, acc_new[:-1]
+
+        jitter_hit = (df_old > self.jitter_window) | (fc_old > self.jitter_window)
+        if self.unsigned_compare:
+            drift_hit = acc_old.view(np.uint64) > np.uint64(self.drift_limit)
+        else:
+            drift_hit = acc_old > self.drift_limit
+
+        events = []
+        if not self.jitter_exceeded and jitter_hit.any():
+            i = int(np.argmax(jitter_hit))
+            events.append(TimingEvent(self.samples + i, 'jitter_exceeded',
+                                      int(max(df_old[i], fc_old[i]))))
+        if not self.drift_warning and drift_hit.any():
+            i = int(np.argmax(drift_hit))
+            events.append(TimingEvent(self.samples + i, 'drift_warning', int(acc_old[i])))
+        events.sort()
+
+        if outputs:
+            aligned = (c + acc_old).view(np.uint64)
+            je = np.logical_or.accumulate(jitter_hit) | self.jitter_exceeded
+            dw = np.logical_or.accumulate(drift_hit) | self.drift_warning
+
+        self.jitter_violations += int(jitter_hit.sum())
+        self.drift_violations += int(drift_hit.sum())
+        self.jitter_exceeded = self.jitter_exceeded or bool(jitter_hit.any())
+        self.drift_warning = self.drift_warning or bool(drift_hit.any())
+        self.aligned_time = (int(c[-1]) + int(acc_old[-1])) & 0xFFFFFFFFFFFFFFFF
+        self._df, self._fc, self._acc = int(df[-1]), int(fc[-1]), int(acc_new[-1])
+        self.samples += n
+
+        self.domains['fabric'].update(f - d, d)
+        self.domains['cloud'].update(c - d, d)
+
+        if outputs:
+            return events, (aligned, dw, je)
+        return events
+
+    def feed_frames(self, frames, outputs=False):
+        """處理一批 FRAME_DTYPE 訊框"""
+        return self.feed(frames['device_time'], frames['fabric_time'], frames['cloud_time'], outputs)
+
+    def consume(self, source, chunk=65536):
+        """
+        串流處理 source 並逐一產生事件
+        source 可為 (device, fabric, cloud) 三元組的迭代器，或 FRAME_DTYPE 批次的迭代器
+        (例如 CaptureReader.batches())；僅保留單一 chunk 的暫存
+        """
+        source = iter(source)
+        first = next(source, None)
+        if first is None:
+            return
+        if isinstance(first, np.ndarray) and first.dtype.names:
+            for frames in itertools.chain([first], source):
+                yield from self.feed_frames(frames)
+            return
+
+        triples = itertools.chain([first], source)
+        while True:
+            flat = np.fromiter(itertools.chain.from_iterable(itertools.islice(triples, chunk)),
+                               dtype=np.int64)
+            if len(flat) == 0:
+                return
+            block = flat.reshape(-1, 3)
+            yield from self.feed(block[:, 0], block[:, 1], block[:, 2])
+
+    def drift_summary(self):
+        """各時鐘域漂移估計"""
+        return [domain.summary() for domain in self.domains.values()]
@@ -0,0 +1,203 @@
+"""
+XR-BUS 本地傳輸模型
+以 asyncio 模擬跨模組訊框傳遞: 每個模組為一個協程，
+模組之間以 credit 式背壓的有界佇列傳遞打包訊框批次
+"""
+
+import asyncio
+import inspect
+import time
+
+END_OF_STREAM = None
+
+
+class CreditLink:
+    """單向連結: 接收端處理完一批後才歸還 credit，未取得 credit 的傳送端會等待"""
+
+    def __init__(self, depth):
+        if depth < 1:
+            raise ValueError("link depth must be >= 1")
+        self.depth = depth
+        self._queue = asyncio.Queue()
+        self._credits = asyncio.Semaphore(depth)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.stall_time = 0.0
+
+    async def send(self, batch):
+        start = time.perf_counter()
+        await self._credits.acquire()
+        self.stall_time += time.perf_counter() - start
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self._queue.put_nowait((time.perf_counter(), batch))
+
+    async def recv(self):
+        return await self._queue.get()
+
+    def release(self):
+        """歸還一個 credit"""
+        self.in_flight -= 1
+        self._credits.release()
+
+
+class HopStats:
+    """單一模組的延遲與吞吐量計數器"""
+
+    def __init__(self, name, module_id):
+        self.name = name
+        self.module_id = module_id
+        self.frames = 0
+        self.batches = 0
+        self.latency_total = 0.0  # 佇列等待時間 (入列至出列)
+        self.latency_max = 0.0
+        self.busy_time = 0.0      # 處理函式耗時
+        self.stall_time = 0.0     # 等待下游 credit 的時間
+        self.max_in_flight = 0
+        self.depth = 0
+        self.first_start = None
+        self.last_end = None
+
+    def as_row(self):
+        elapsed = (self.last_end - self.first_start) if self.batches else 0.0
+        return {
+            'name': self.name,
+            'module_id': self.module_id,
+            'frames': self.frames,
+            'batches': self.batches,
+            'avg_latency_us': self.latency_total / self.batches * 1e6 if self.batches else 0.0,
+            'max_latency_us': self.latency_max * 1e6,
+            'busy_ms': self.busy_time * 1e3,
+            'stall_ms': self.stall_time * 1e3,
+            'throughput_fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'max_in_flight': self.max_in_flight,
+            'depth': self.depth,
+        }
+
+
+def tag_module(module_id):
+    """預設處理函式: 將訊框來源改寫為本模組"""
+    def handler(frames):
+        frames['module_id'] = module_id
+        return frames
+    return handler
+
+
+class XRBusLocalBus:
+    """
+    依 chain 串接的模組管線
+    handlers: {module_id: callable(frames)}，可為一般函式或協程函式；
+    offload=True 時一般函式改在執行緒池執行 (NumPy 大批次會釋放 GIL)
+    """
+
+    def __init__(self, chain, depth=8, handlers=None, names=None, offload=False):
+        if not chain:
+            raise ValueError("chain must contain at least one module")
+        self.chain = list(chain)
+        self.depths = list(depth) if isinstance(depth, (list, tuple)) else [depth] * len(self.chain)
+        if len(self.depths) != len(self.chain):
+            raise ValueError("one depth per module is required")
+        self.handlers = handlers or {}
+        self.names = names or {}
+        self.offload = offload
+        self.stats = []
+        self.elapsed = 0.0
+        self.delivered = 0
+
+    async def _stage(self, stats, handler, inbound, outbound):
+        loop = asyncio.get_running_loop()
+        while True:
+            sent_at, batch = await inbound.recv()
+            if batch is END_OF_STREAM:
+                inbound.release()
+                if outbound is not None:
+                    await outbound.send(END_OF_STREAM)
+                return
+
+            start = time.perf_counter()
+            latency = start - sent_at
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            if stats.first_start is None:
+                stats.first_start = start
+
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(batch)
+            elif self.offload:
+                result = await loop.run_in_executor(None, handler, batch)
+            else:
+                result = handler(batch)
+            result = batch if result is None else result
+
+            stats.busy_time += time.perf_counter() - start
+            stats.frames += len(result)
+            stats.batches += 1
+            inbound.release()
+
+            if outbound is not None:
+                await outbound.send(result)
+            stats.last_end = time.perf_counter()
+
+    async def _sink(self, inbound, sink):
+        while True:
+            _, batch = await inbound.recv()
+            inbound.release()
+            if batch is END_OF_STREAM:
+                return
+            self.delivered += len(batch)
+            if sink is not None:
+                sink(batch)
+
+    async def _source(self, outbound, batches, copy_source):
+        for batch in batches:
+            await outbound.send(batch.copy() if copy_source else batch)
+        await outbound.send(END_OF_STREAM)
+
+    async def run(self, batches, sink=None, copy_source=True):
+        """
+        將批次送入管線直到耗盡
+        copy_source=True 時先複製每批 (iter_frame_batches 會重複使用緩衝區);
+        任一階段 (含來源與 sink) 拋出例外時取消其餘協程並重新拋出該例外，
+        避免上游因等不到 credit 而永久阻塞
+        """
+        links = [CreditLink(d) for d in self.depths] + [CreditLink(self.depths[-1])]
+        self.stats = []
+        self.delivered = 0
+        tasks = []
+        for i, module_id in enumerate(self.chain):
+            stats = HopStats(self.names.get(module_id, f"0x{module_id:04x}"), module_id)
+            stats.depth = links[i].depth
+            self.stats.append(stats)
+            handler = self.handlers.get(module_id) or tag_module(module_id)
+            tasks.append(asyncio.create_task(
+                self._stage(stats, handler, links[i], links[i + 1])))
+        tasks.append(asyncio.create_task(self._sink(links[-1], sink)))
+
+        start = time.perf_counter()
+        tasks.append(asyncio.create_task(self._source(links[0], batches, copy_source)))
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        if pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                raise task.exception()
+        self.elapsed = time.perf_counter() - start
+
+        for i, stats in enumerate(self.stats):
+            stats.max_in_flight = links[i].max_in_flight
+            stats.stall_time = links[i + 1].stall_time
+        return self.report()
+
+    def run_sync(self, batches, sink=None, copy_source=True):
+        """同步包裝"""
+        return asyncio.run(self.run(batches, sink, copy_source))
+
+    def report(self):
+        """每個模組一列的統計資料"""
+        return [stats.as_row() for stats in self.stats]
+
+    def slowest_stage(self):
+        """處理時間最長的模組 (管線瓶頸)"""
+        return max(self.stats, key=lambda s: s.busy_time).name
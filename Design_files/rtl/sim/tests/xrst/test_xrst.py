@@ -4,8 +4,22 @@ XRST 測試平台
 測試證據接收、代幣化、Smart-SLA 和監管結算
 """
 
-import random
 import hashlib
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from xrst_audit_trail import RECORD_DTYPE, MerkleAuditTrail, settlement_records, verify_inclusion
+from xrst_evidence_intake import (EVIDENCE_PACKET_DTYPE, STATUS_NAMES as EVIDENCE_STATUS_NAMES, EvidenceIntake,
+                                  PacketFileSink, evidence_status, pack_evidence, packets_view,
+                                  rejection_reasons, select_packets)
+from xrst_regulated_settlement import REGULATORY_TAG, classify, regulatory_hashes, regulatory_summary
+from xrst_smart_sla import STATUS_NAMES as SLA_STATUS_NAMES, SmartSLA, settle
+from xrst_tokenization_engine import (TOKEN_NAMES, TOKEN_TAGS, TokenizationEngine, TokenLedger,
+                                      token_id_int)
 
 class XRSTTestBench:
     def __init__(self):
@@ -28,22 +42,83 @@ class XRSTTestBench:
             "penalty_amount": 5000,
             "credit_amount": 1000,
             "boundary_id": 0x7B,
-            "causal_chain": "0xCAFEBABE" * 8,
-            "compliance_proof": "0xDEADBEEF" * 8
+            "causal_chain": bytes.fromhex("CAFEBABE" * 8),
+            "compliance_proof": bytes.fromhex("DEADBEEF" * 8)
         }
         
         print("\nEvidence Packet:")
         for key, value in evidence.items():
-            print(f"  {key}: {value}")
+            print(f"  {key}: 0x{value.hex().upper()}" if isinstance(value, bytes) else f"  {key}: {value}")
+        
+        packet = pack_evidence(1, **{k: (list(v) if isinstance(v, bytes) else v) for k, v in evidence.items()})
+        value = int.from_bytes(packet.tobytes(), 'little')
+        assert (value >> 64) & 0xFFFFFFFF == 950, "reliability_score should sit at [95:64]"
+        assert (value >> 160) & 0xFFFF == 0x7B, "boundary_id should sit at [175:160]"
+        assert (value >> 176) & ((1 << 256) - 1) == int.from_bytes(evidence["causal_chain"], 'little'), \
+            "causal_chain should sit at [431:176]"
+        assert (value >> 688) & 0xFFFF == 0xCAFE, "Marker should sit at [703:688]"
         
         # 驗證證據
-        if evidence["reliability_score"] >= 900:
-            status = "VALID"
-            assert evidence["reliability_score"] >= 900, "Score too low"
-        else:
-            status = "INVALID"
+        intake = EvidenceIntake(min_score=900)
+        reasons = intake.validate(packet)
+        status = EVIDENCE_STATUS_NAMES[int(evidence_status(reasons)[0])]
         
         print(f"\nStatus: {status}")
+        assert status == "VALID", "Evidence with score >= 900 and marker 0xCAFE should be valid"
+        
+        # 串流驗證: 產生器寫入擷取檔，以 mmap 逐區塊驗證並分流至兩個輸出檔
+        rng = np.random.default_rng(2026)
+        num_packets, chunk = 100_000, 8192
+        now, max_age = 2_000_000, 1_000_000
+        
+        def generate():
+            for start in range(0, num_packets, chunk):
+                n = min(chunk, num_packets - start)
+                packets = pack_evidence(n, sla_id=0x5000 + np.arange(start, start + n) % 16,
+                                        timestamp=rng.integers(0, now, n),
+                                        reliability_score=rng.integers(850, 1001, n),
+                                        penalty_amount=rng.integers(0, 5000, n),
+                                        credit_amount=rng.integers(0, 5000, n),
+                                        boundary_id=rng.integers(0, 1 << 16, n))
+                packets['marker'][rng.random(n) < 0.01] = 0xBEEF
+                yield packets.tobytes()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "evidence.bin")
+            with PacketFileSink(source) as sink:
+                for buf in generate():
+                    sink(packets_view(buf))
+            
+            intake = EvidenceIntake(min_score=900, max_age=max_age)
+            valid_path, invalid_path = os.path.join(tmp, "valid.bin"), os.path.join(tmp, "invalid.bin")
+            start = time.perf_counter()
+            with PacketFileSink(valid_path) as valid, PacketFileSink(invalid_path) as invalid:
+                summary = intake.process(source, valid, invalid, chunk=chunk, now=now)
+            elapsed = time.perf_counter() - start
+            
+            packets = np.memmap(source, dtype=EVIDENCE_PACKET_DTYPE, mode='r')
+            expected = rejection_reasons(packets, 900, now, max_age)
+            accepted = np.memmap(valid_path, dtype=EVIDENCE_PACKET_DTYPE, mode='r')
+            rejected = np.memmap(invalid_path, dtype=EVIDENCE_PACKET_DTYPE, mode='r')
+            assert summary['total'] == num_packets, "Every packet should be validated"
+            assert summary['accepted'] == int((expected == 0).sum()) == len(accepted), "Accepted count mismatch"
+            assert summary['rejected'] == len(rejected), "Rejected count mismatch"
+            assert accepted.tobytes() == select_packets(packets, expected == 0).tobytes(), "Valid output should keep stream order"
+            for bit, name in ((1, 'marker'), (2, 'score'), (4, 'expired')):
+                assert summary['rejections'][name] == int(np.count_nonzero(expected & bit)), f"{name} count mismatch"
+            assert (rejection_reasons(rejected, 900, now, max_age) != 0).all(), "Invalid output should only hold rejects"
+            del packets, accepted, rejected
+            
+            # 零筆證據包的擷取檔為合法輸入
+            empty = os.path.join(tmp, "empty.bin")
+            with PacketFileSink(empty):
+                pass
+            empty_summary = EvidenceIntake(min_score=900).process(empty, chunk=chunk, now=now)
+            assert empty_summary['total'] == 0 and empty_summary['accepted'] == 0, \
+                "Empty capture should yield an empty summary"
+        
+        print(f"\nStreamed {num_packets} packets ({num_packets * 512 / 1e6:.0f} MB) in {elapsed * 1e3:.0f} ms: "
+              f"{summary['accepted']} valid, rejections {summary['rejections']}, status {summary['status']}")
         print("✅ Evidence Intake test PASSED")
         return True
     
@@ -57,30 +132,105 @@ class XRSTTestBench:
             ("Balanced", 500, 500, 0, 2, "Stake adjustment")
         ]
         
-        for name, credit, penalty, net, expected_type, desc in test_cases:
+        engine = TokenizationEngine(TokenLedger(num_boundaries=256))
+        out = engine.issue([0x7B] * len(test_cases), [case[1] for case in test_cases],
+                           [case[2] for case in test_cases])
+        
+        for i, (name, credit, penalty, net, expected_type, desc) in enumerate(test_cases):
             print(f"\n{name}:")
             print(f"  Credit: ${credit}")
             print(f"  Penalty: ${penalty}")
             print(f"  Net: ${net}")
             
-            if net > 0:
-                token_type = 0
-                tokens = net
-                token_name = "Credit"
-            elif net < 0:
-                token_type = 1
-                tokens = -net
-                token_name = "Penalty"
-            else:
-                token_type = 2
-                tokens = 0
-                token_name = "Stake"
-            
-            print(f"  Token Type: {token_name}")
+            token_type = int(out['token_type'][i])
+            tokens = int(out['credit_tokens'][i] + out['penalty_tokens'][i])
+            print(f"  Token Type: {TOKEN_NAMES[token_type].capitalize()}")
             print(f"  Tokens Issued: {tokens}")
+            print(f"  Stake Adjustment: {int(out['stake_adjustment'][i])}")
             print(f"  Description: {desc}")
             
             assert token_type == expected_type, f"Type should be {expected_type}"
+            assert tokens == abs(net), f"Tokens should be {abs(net)}"
+            expected_id = (0x7B << 240) | (i << 208) | TOKEN_TAGS[token_type]
+            assert token_id_int(out['token_id'][i]) == expected_id, "token_id layout mismatch"
+        assert out['stake_adjustment'].tolist() == [0, 80, 0], "Stake should hold, then reset on balance"
+        assert engine.ledger.balance(0x7B)['net'] == 0, "Ledger net should be credit - penalty"
+        
+        # 欄式帳本: 500 萬筆代幣分批附加至 mmap 目錄，重新開啟後直接使用已存的彙總
+        rng = np.random.default_rng(2026)
+        num_tokens, batch_size, num_boundaries = 5_000_000, 250_000, 4096
+        boundary = rng.integers(0, num_boundaries, num_tokens)
+        credit = rng.integers(0, 2000, num_tokens, dtype=np.uint32)
+        penalty = rng.integers(0, 2000, num_tokens, dtype=np.uint32)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger")
+            ledger = TokenLedger(path, num_boundaries=num_boundaries)
+            engine = TokenizationEngine(ledger)
+            start = time.perf_counter()
+            for i in range(0, num_tokens, batch_size):
+                sl = slice(i, i + batch_size)
+                engine.issue(boundary[sl], credit[sl], penalty[sl], timestamp=i // batch_size)
+            ledger.sync()
+            elapsed = time.perf_counter() - start
+            checkpoint = len(ledger)
+            engine.issue(boundary[:1000], credit[:1000], penalty[:1000], timestamp=99)
+            delta = ledger.delta_since(checkpoint)
+            ledger.close()
+            
+            start = time.perf_counter()
+            ledger = TokenLedger(path)
+            net = ledger.net_balances()
+            reopen = time.perf_counter() - start
+            
+            signed = credit.astype(np.int64) - penalty
+            expected = np.bincount(boundary, weights=signed, minlength=num_boundaries).astype(np.int64)
+            tail = np.bincount(boundary[:1000], weights=signed[:1000], minlength=num_boundaries).astype(np.int64)
+            assert not ledger.rebuilt, "Reopen should load aggregates, not rescan"
+            assert len(ledger) == num_tokens + 1000, "Ledger length mismatch"
+            assert ledger.token_counter == num_tokens + 1000, "Token counter should persist"
+            assert (net == expected + tail).all(), "Per-boundary net mismatch"
+            assert (delta == tail).all(), "Delta since checkpoint mismatch"
+            stake = np.where(penalty > credit, (penalty - credit) // 10, 0)
+            stakes = np.bincount(np.r_[boundary, boundary[:1000]], weights=np.r_[stake, stake[:1000]],
+                                 minlength=num_boundaries).astype(np.int64)
+            assert (ledger.stakes == stakes).all(), "Per-boundary stake mismatch"
+            amounts, counts = ledger.type_totals()
+            assert counts.sum() == len(ledger), "Every token should be counted once"
+            assert (ledger.column('timestamp')[-1000:] == 99).all(), "Timestamp column mismatch"
+            
+            replayed = sum(len(chunk['amount']) for chunk in ledger.replay(chunk=1 << 20))
+            assert replayed == len(ledger), "Replay should visit every token"
+            ledger.close()
+            
+            # 接近 u4 上限的金額: 單一邊界總額超過 2^53 時彙總仍須精確 (含重建路徑)
+            path = os.path.join(tmp, "large")
+            large = 3_000_000
+            big = rng.integers(0xFFFF0000, 1 << 32, large, dtype=np.uint32)
+            kinds = np.where(np.arange(large) % 4 == 0, 1, 0).astype(np.uint8)
+            ledger = TokenLedger(path, num_boundaries=4)
+            ledger.append(np.zeros(large, dtype=np.uint16), kinds, big, stake=big)
+            expected_credit = int(big[kinds == 0].sum(dtype=np.int64))
+            expected_penalty = int(big[kinds == 1].sum(dtype=np.int64))
+            assert expected_credit > 1 << 53, "Large-amount check should exceed float64 precision"
+            balance = ledger.balance(0)
+            assert balance['credit'] == expected_credit, "Large credit balance not exact"
+            assert balance['penalty'] == expected_penalty, "Large penalty balance not exact"
+            assert balance['stake'] == int(big.sum(dtype=np.int64)), "Large stake total not exact"
+            assert int(ledger.delta_since(0)[0]) == expected_credit - expected_penalty, \
+                "Large delta not exact"
+            ledger.sync()
+            ledger.close()
+            os.remove(os.path.join(path, 'aggregates.npy'))
+            ledger = TokenLedger(path)
+            assert ledger.rebuilt, "Missing aggregates should trigger a rebuild"
+            assert ledger.balance(0) == balance, "Rebuilt large balances not exact"
+            ledger.close()
+        
+        print(f"\nLedger: {num_tokens} tokens appended in {elapsed * 1e3:.0f} ms "
+              f"({num_tokens / elapsed / 1e6:.1f} M tokens/s), reopened in {reopen * 1e3:.1f} ms")
+        print(f"Totals: credit {int(amounts[0])}, penalty {int(amounts[1])}, "
+              f"tokens {counts.tolist()}")
         
         print("\n✅ Tokenization Engine test PASSED")
         return True
@@ -108,33 +258,80 @@ class XRSTTestBench:
             (750, "Critical Breach", {0x1001: -5000, 0x2001: 0, 0x3001: 0})
         ]
         
-        for score, name, expected in test_scores:
+        # 四個情境一次結算: credit_tokens 1000 / penalty_tokens 5000 / stake_adjustment 500
+        result = settle([case[0] for case in test_scores], list(sla_config["weights"].values()),
+                        credits=1000, penalties=5000, stake_adjustments=500, stakes=sla_config["stake"])
+        
+        for i, (score, name, expected) in enumerate(test_scores):
             print(f"\n{name} (Score: {score}/1000):")
+            print(f"  Weighted Score: {int(result.weighted_score[i])}")
             
-            # 計算加權評分
-            weighted = (score * 50 + score * 30 + score * 20) // 100
-            print(f"  Weighted Score: {weighted}")
-            
-            # 根據評分分配
-            if weighted >= 950:
-                settlement = {0x1001: 500, 0x2001: 300, 0x2001: 200}
-                status = "COMPLIANT"
-            elif weighted >= 900:
-                settlement = {0x1001: 400, 0x2001: 400, 0x2001: 200}
-                status = "COMPLIANT"
-            elif weighted >= 800:
-                settlement = {0x1001: -3000, 0x2001: -1500, 0x2001: -500}
-                status = "BREACHED"
-            else:
-                settlement = {0x1001: -5000, 0x2001: 0, 0x2001: 0}
-                status = "BREACHED"
+            settlement = dict(zip(participants.values(), result.settlements[i].tolist()))
+            status = SLA_STATUS_NAMES[int(result.status[i])]
             
             print(f"  Status: {status}")
             for participant, amount in settlement.items():
                 print(f"  Participant 0x{participant:04x}: ${amount}")
+            print(f"  Remaining Stake: ${int(result.remaining_stake[i])}")
             
+            assert settlement == expected, f"Settlement should be {expected}"
             # 驗證 CSP 總是承擔最多
             assert settlement[0x1001] <= 0 or settlement[0x1001] >= settlement[0x2001], "CSP should bear most risk"
+        assert result.remaining_stake.tolist() == [10000, 10000, 9500, 9000], "Stake draw-down mismatch"
+        
+        # 10 萬個 SLA × 8 個參與者，每個 SLA 各自的權重與分配表
+        rng = np.random.default_rng(2026)
+        num_slas, num_participants = 100_000, 8
+        scores = rng.integers(700, 1001, num_slas)
+        weights = rng.integers(20, 40, (num_slas, 3))
+        credits = rng.integers(0, 10_000, num_slas)
+        penalties = rng.integers(0, 10_000, num_slas)
+        raw = rng.random((num_slas, 4, num_participants))
+        shares = (raw / raw.sum(axis=-1, keepdims=True) * 100).astype(np.int64)
+        start = time.perf_counter()
+        fleet = settle(scores, weights, credits, penalties, credits // 10, 50_000, shares)
+        elapsed = time.perf_counter() - start
+        
+        for i in rng.choice(num_slas, 200, replace=False):
+            weighted = sum(int(scores[i]) * int(w) for w in weights[i]) // 100
+            tier = 3 if weighted >= 950 else 2 if weighted >= 900 else 1 if weighted >= 800 else 0
+            base = int(credits[i]) if tier >= 2 else int(penalties[i])
+            sign = 1 if tier >= 2 else -1
+            expected = [sign * (base * int(p) // 100) for p in shares[i, tier]]
+            assert fleet.settlements[i].tolist() == expected, f"SLA {i} settlement mismatch"
+            assert int(fleet.remaining_stake[i]) == 50_000 - int(credits[i]) // 10 * [2, 1, 0, 0][tier], \
+                f"SLA {i} stake mismatch"
+        print(f"\nFleet: {num_slas} SLAs x {num_participants} participants settled in {elapsed * 1e3:.1f} ms, "
+              f"breached {int(fleet.status.sum())}")
+        
+        # 三參與者 RTL 模式: 級距使用上一週期的 weighted_score，32 位元環繞，信用級距保持 remaining_stake
+        sla = SmartSLA(tuple(sla_config["weights"].values()), sla_config["stake"])
+        cycles = 5000
+        scores = rng.integers(700, 1001, cycles)
+        credits = rng.integers(0, 1 << 32, cycles, dtype=np.uint64)
+        penalties = rng.integers(0, 1 << 32, cycles, dtype=np.uint64)
+        adjust = rng.integers(0, 1 << 32, cycles, dtype=np.uint64)
+        out = sla.execute(scores, credits, penalties, adjust)
+        
+        weighted, remaining = 0, 0
+        for t in range(cycles):
+            c, p, adj = int(credits[t]), int(penalties[t]), int(adjust[t])
+            if weighted >= 950:
+                expected = (c * 50 & 0xFFFFFFFF) // 100, (c * 30 & 0xFFFFFFFF) // 100, (c * 20 & 0xFFFFFFFF) // 100
+            elif weighted >= 900:
+                expected = (c * 40 & 0xFFFFFFFF) // 100, (c * 40 & 0xFFFFFFFF) // 100, (c * 20 & 0xFFFFFFFF) // 100
+            elif weighted >= 800:
+                expected = (p * 60 & 0xFFFFFFFF) // 100, (p * 30 & 0xFFFFFFFF) // 100, (p * 10 & 0xFFFFFFFF) // 100
+                remaining = (10000 - adj) & 0xFFFFFFFF
+            else:
+                expected = p, 0, 0
+                remaining = (10000 - adj * 2) & 0xFFFFFFFF
+            s_t = int(scores[t])
+            weighted = (s_t * 50 + s_t * 30 + s_t * 20) // 100
+            actual = (int(out['settlement_a'][t]), int(out['settlement_b'][t]), int(out['settlement_c'][t]))
+            assert actual == expected, f"Cycle {t} settlement mismatch"
+            assert int(out['remaining_stake'][t]) == remaining, f"Cycle {t} remaining stake mismatch"
+        print(f"RTL mode: {cycles} cycles match the register-level reference")
         
         print("\n✅ Smart-SLA Execution test PASSED")
         return True
@@ -152,19 +349,19 @@ class XRSTTestBench:
             "stake_remaining": 9500
         }
         
-        # 計算風險指數
-        if settlement["reliability"] >= 950:
-            risk = 10
-            compliance = 100
-        elif settlement["reliability"] >= 900:
-            risk = 30
-            compliance = 90
-        elif settlement["reliability"] >= 800:
-            risk = 60
-            compliance = 75
-        else:
-            risk = 90
-            compliance = 50
+        # 計算風險指數 (斷點表查表)
+        risk, compliance = (int(v[0]) for v in classify([settlement["reliability"]]))
+        
+        boundary_scores = [0, 799, 800, 899, 900, 949, 950, 1000, 0xFFFFFFFF]
+        risks, levels = classify(boundary_scores)
+        assert risks.tolist() == [90, 90, 60, 60, 30, 30, 10, 10, 10], "Risk breakpoints mismatch"
+        assert levels.tolist() == [50, 50, 75, 75, 90, 90, 100, 100, 100], "Compliance breakpoints mismatch"
+        
+        words = regulatory_hashes([settlement["timestamp"]], [settlement["reliability"]])[0]
+        # 288 位元串接指定給 256 位元輸出，最高的 sla_id 被截去
+        expected_hash = (settlement["sla_id"] << 256 | settlement["timestamp"] << 224 |
+                         settlement["reliability"] << 192 | REGULATORY_TAG) & ((1 << 256) - 1)
+        assert sum(int(w) << (64 * i) for i, w in enumerate(words)) == expected_hash, "Regulatory hash mismatch"
         
         print("\nSettlement Summary:")
         print(f"  SLA ID: 0x{settlement['sla_id']:04x}")
@@ -172,10 +369,109 @@ class XRSTTestBench:
         print(f"  Risk Index: {risk}")
         print(f"  Compliance Level: {compliance}%")
         
-        # 產生審計軌跡
-        audit_hash = hashlib.sha256(f"{settlement}".encode()).hexdigest()[:16]
+        # 產生審計軌跡: 標準二進位紀錄的 Merkle 樹根，與 dict 的鍵順序無關
+        records = settlement_records(settlement["sla_id"], settlement["timestamp"], settlement["reliability"],
+                                     settlement["settlements"], settlement["stake_remaining"], risk, compliance)
+        trail = MerkleAuditTrail()
+        trail.append_batch(records)
+        audit_hash = trail.root().hex()[:16]
         print(f"  Audit Hash: {audit_hash}")
         
+        reordered = dict(reversed(list(settlement["settlements"].items())))
+        again = MerkleAuditTrail()
+        again.append_batch(settlement_records(settlement["sla_id"], settlement["timestamp"],
+                                              settlement["reliability"], reordered,
+                                              settlement["stake_remaining"], risk, compliance))
+        assert again.root() == trail.root(), "Audit root should not depend on dict order"
+        for i in range(len(records)):
+            assert verify_inclusion(trail.leaf(i), i, len(trail), trail.inclusion_proof(i), trail.root()), \
+                "Participant record should be provable"
+        
+        # RFC 6962 已知值: 空樹與單一空葉
+        empty = MerkleAuditTrail()
+        assert empty.root().hex().startswith("e3b0c442"), "Empty tree root mismatch"
+        empty.append(b"")
+        assert empty.root().hex().startswith("6e340b9c"), "Single empty leaf root mismatch"
+        
+        # 與逐層重算的參考實作比對所有前綴的樹根與包含證明
+        def reference_root(leaves):
+            if len(leaves) == 1:
+                return leaves[0]
+            k = 1 << ((len(leaves) - 1).bit_length() - 1)
+            return hashlib.sha256(b"\x01" + reference_root(leaves[:k]) + reference_root(leaves[k:])).digest()
+        
+        rng = np.random.default_rng(2026)
+        small = np.zeros(70, dtype=RECORD_DTYPE)
+        small['sla_id'] = np.arange(70)
+        small['amount'] = rng.integers(-5000, 5000, 70)
+        trail = MerkleAuditTrail()
+        trail.append_batch(small, chunk=16)
+        leaves = [hashlib.sha256(b"\x00" + r.tobytes()).digest() for r in small]
+        for size in range(1, 71):
+            root = trail.root(size)
+            assert root == reference_root(leaves[:size]), f"Root mismatch at size {size}"
+            for index in range(0, size, 7):
+                assert verify_inclusion(leaves[index], index, size, trail.inclusion_proof(index, size), root), \
+                    f"Proof for leaf {index} of {size} should verify"
+        assert not verify_inclusion(leaves[1], 0, 70, trail.inclusion_proof(0), trail.root()), "Wrong leaf should fail"
+        
+        # 20 萬筆批次附加 (執行緒池) 與檢查點續接
+        num_records = 200_000
+        bulk = np.zeros(num_records, dtype=RECORD_DTYPE)
+        bulk['sla_id'] = np.arange(num_records) // 3
+        bulk['participant'] = 0x1001 + np.arange(num_records) % 3 * 0x1000
+        bulk['amount'] = rng.integers(-5000, 5000, num_records)
+        trail = MerkleAuditTrail()
+        start = time.perf_counter()
+        trail.append_batch(bulk[:150_001], workers=4)
+        elapsed = time.perf_counter() - start
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "audit.ckpt")
+            trail.save_checkpoint(checkpoint)
+            resumed = MerkleAuditTrail.load_checkpoint(checkpoint)
+        resumed.append_batch(bulk[150_001:], workers=4)
+        
+        sequential = MerkleAuditTrail()
+        for record in bulk[:5000]:
+            sequential.append(record.tobytes())
+        assert sequential.root() == resumed.root(5000), "Batch and single appends should agree"
+        start = time.perf_counter()
+        for index in rng.integers(0, num_records, 100).tolist():
+            proof = resumed.inclusion_proof(index)
+            assert verify_inclusion(resumed.leaf(index), index, num_records, proof, resumed.root()), \
+                f"Proof for record {index} should verify"
+        proof_us = (time.perf_counter() - start) / 100 * 1e6
+        print(f"  Audit Trail: {num_records} records, batch hashing "
+              f"{150_001 / elapsed / 1e3:.0f} k records/s, proof ({len(proof)} hashes) {proof_us:.0f} µs")
+        
+        # 夜間監管報表: 500 萬筆結算彙總為每個 SLA 一列
+        num_settlements, num_slas = 5_000_000, 1_000_000
+        sla_ids = rng.integers(0, num_slas, num_settlements).astype(np.uint32)
+        timestamps = np.arange(num_settlements, dtype=np.uint32)
+        scores = rng.integers(700, 1001, num_settlements)
+        settled = rng.integers(-5000, 5000, num_settlements)
+        stakes = rng.integers(0, 10_000, num_settlements)
+        status = (scores < 900).astype(np.uint8)
+        start = time.perf_counter()
+        report = regulatory_summary(sla_ids, timestamps, scores, settled, stakes, status)
+        elapsed = time.perf_counter() - start
+        
+        for sla in rng.choice(report['sla_id'], 50, replace=False):
+            rows = np.flatnonzero(sla_ids == sla)
+            row = report[np.searchsorted(report['sla_id'], sla)]
+            worst = int(scores[rows].min())
+            assert row['settlements'] == len(rows), f"SLA {sla} settlement count mismatch"
+            assert row['min_reliability'] == worst, f"SLA {sla} min reliability mismatch"
+            assert row['risk_index'] == classify([worst])[0][0], f"SLA {sla} risk mismatch"
+            assert row['breaches'] == int(status[rows].sum()), f"SLA {sla} breach count mismatch"
+            assert row['total_settled'] == int(settled[rows].sum()), f"SLA {sla} total mismatch"
+            assert row['remaining_stake'] == stakes[rows[-1]], f"SLA {sla} remaining stake mismatch"
+            assert abs(row['mean_reliability'] - scores[rows].mean()) < 1e-9, f"SLA {sla} mean mismatch"
+        print(f"  Nightly Report: {num_settlements} settlements -> {len(report)} SLA rows "
+              f"in {elapsed * 1e3:.0f} ms, risk histogram "
+              f"{dict(zip(*(a.tolist() for a in np.unique(report['risk_index'], return_counts=True))))}")
+        
         # 產生監管報告
         print("\nRegulatory Report:")
         print("  • All settlements verified")
@@ -231,9 +527,10 @@ class XRSTTestBench:
         
         # 4. 監管結算
         print("\n4. Regulated Settlement:")
-        risk = 30 if evidence['reliability'] >= 900 else 60
+        risk, compliance = (int(v[0]) for v in classify([evidence['reliability']]))
         print(f"   • Risk Index: {risk}")
-        print(f"   • Compliance Level: 95%")
+        print(f"   • Compliance Level: {compliance}%")
+        assert (risk, compliance) == (30, 90), "Score 920 should map to risk 30 / compliance 90"
         print(f"   • Regulatory Hash: 0x{hashlib.sha256(b'settlement').hexdigest()[:16]}")
         
         # 5. 最終輸出
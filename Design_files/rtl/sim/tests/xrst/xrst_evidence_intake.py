@@ -0,0 +1,178 @@
+"""
+XRST 證據接收模型
+xrst_evidence_intake.sv 的 4096-bit evidence_packet 以 512-byte 記錄表示，
+由產生器或 mmap 檔逐區塊向量化驗證，VALID / INVALID 分流輸出並依原因累計拒收數
+"""
+
+import os
+
+import numpy as np
+
+PACKET_BITS = 4096
+PACKET_BYTES = PACKET_BITS // 8
+EVIDENCE_MARKER = 0xCAFE
+
+STATUS_VALID = 0
+STATUS_INVALID = 1
+STATUS_EXPIRED = 2
+STATUS_NAMES = {STATUS_VALID: "VALID", STATUS_INVALID: "INVALID", STATUS_EXPIRED: "EXPIRED"}
+
+# 拒收原因 (位元遮罩)；一筆證據可同時有多個原因
+REJECT_MARKER = 1      # evidence_packet[703:688] != 16'hCAFE
+REJECT_SCORE = 2       # reliability_score 低於門檻
+REJECT_EXPIRED = 4     # timestamp 超過有效期限
+REJECT_REASONS = {REJECT_MARKER: "marker", REJECT_SCORE: "score", REJECT_EXPIRED: "expired"}
+
+MIN_SCORE = 900
+
+# evidence_packet 欄位 (全部落在位元組邊界上，第 n 個位元組 = packet[8n+7:8n])
+EVIDENCE_PACKET_DTYPE = np.dtype({
+    'names': ['sla_id', 'timestamp', 'reliability_score', 'penalty_amount', 'credit_amount',
+              'boundary_id', 'causal_chain', 'compliance_proof', 'marker'],
+    'formats': ['<u4', '<u4', '<u4', '<u4', '<u4', '<u2', 'V32', 'V32', '<u2'],
+    'offsets': [0, 4, 8, 12, 16, 20, 22, 54, 86],
+    'itemsize': PACKET_BYTES,
+})
+
+
+def pack_evidence(count, **fields):
+    """配置零初始化的證據包並寫入欄位 (marker 預設為 0xCAFE)"""
+    packets = np.zeros(count, dtype=EVIDENCE_PACKET_DTYPE)
+    packets['marker'] = EVIDENCE_MARKER
+    for name, values in fields.items():
+        if name in ('causal_chain', 'compliance_proof'):
+            raw = packets[name].view(np.uint8).reshape(count, 32)
+            raw[:] = np.asarray(values, dtype=np.uint8).reshape(-1, 32)
+        else:
+            packets[name] = values
+    return packets
+
+
+def packets_view(buf):
+    """以 EVIDENCE_PACKET_DTYPE 零複製檢視連續的證據包緩衝區"""
+    return np.frombuffer(buf, dtype=EVIDENCE_PACKET_DTYPE)
+
+
+def select_packets(packets, mask):
+    """
+    以遮罩選取證據包並保留整筆 512 bytes
+    (結構化 dtype 的花式索引不複製欄位以外的保留位元組)
+    """
+    raw = np.ascontiguousarray(packets).view(np.dtype((np.void, PACKET_BYTES)))
+    return raw[mask].view(EVIDENCE_PACKET_DTYPE)
+
+
+def rejection_reasons(packets, min_score=MIN_SCORE, now=None, max_age=None):
+    """
+    每筆證據的拒收原因遮罩 (0 表示有效)
+    RTL 只檢查 marker；分數門檻依測試平台，有效期限僅在提供 now / max_age 時檢查 (32 位元環繞)
+    """
+    reasons = np.where(packets['marker'] != EVIDENCE_MARKER, REJECT_MARKER, 0).astype(np.uint8)
+    reasons |= np.where(packets['reliability_score'] < min_score, REJECT_SCORE, 0).astype(np.uint8)
+    if now is not None and max_age is not None:
+        age = np.uint32(now & 0xFFFFFFFF) - packets['timestamp']
+        reasons |= np.where(age > max_age, REJECT_EXPIRED, 0).astype(np.uint8)
+    return reasons
+
+
+def evidence_status(reasons):
+    """evidence_status: marker 或分數不符為 INVALID，僅過期為 EXPIRED"""
+    return np.where(reasons & (REJECT_MARKER | REJECT_SCORE), STATUS_INVALID,
+                    np.where(reasons & REJECT_EXPIRED, STATUS_EXPIRED, STATUS_VALID)).astype(np.uint8)
+
+
+def iter_packets(source, chunk=8192):
+    """
+    將來源切成 EVIDENCE_PACKET_DTYPE 區塊
+    source 可為擷取檔路徑 (以 mmap 讀取)、陣列，或產生 bytes / 陣列的可疊代物件
+    """
+    if isinstance(source, (str, os.PathLike)):
+        # 空擷取檔無法 mmap，視為零筆證據包
+        if os.path.getsize(source) == 0:
+            return
+        packets = np.memmap(source, dtype=EVIDENCE_PACKET_DTYPE, mode='r')
+        for start in range(0, len(packets), chunk):
+            yield packets[start:start + chunk]
+        return
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk):
+            yield source[start:start + chunk]
+        return
+    for item in source:
+        yield item if isinstance(item, np.ndarray) else packets_view(item)
+
+
+class PacketFileSink:
+    """將證據包依序附加寫入檔案"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'wb')
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __call__(self, packets):
+        self._fh.write(np.ascontiguousarray(packets).tobytes())
+        self.count += len(packets)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class EvidenceIntake:
+    """
+    串流證據接收: 每個區塊一次向量化驗證，有效與無效的證據包分別交給 on_valid / on_invalid
+    只保留計數，不累積整個串流；rejections 依原因計數 (一筆可計入多個原因)
+    """
+
+    def __init__(self, min_score=MIN_SCORE, max_age=None):
+        self.min_score = min_score
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self):
+        self.total = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.rejections = {name: 0 for name in REJECT_REASONS.values()}
+        self.status_counts = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+
+    def validate(self, packets, now=None):
+        """驗證單一區塊並更新計數，回傳拒收原因遮罩"""
+        reasons = rejection_reasons(packets, self.min_score, now, self.max_age)
+        self.total += len(packets)
+        valid = int(np.count_nonzero(reasons == 0))
+        self.accepted += valid
+        self.rejected += len(packets) - valid
+        for bit, name in REJECT_REASONS.items():
+            self.rejections[name] += int(np.count_nonzero(reasons & bit))
+        self.status_counts += np.bincount(evidence_status(reasons), minlength=len(STATUS_NAMES))
+        return reasons
+
+    def process(self, source, on_valid=None, on_invalid=None, chunk=8192, now=None):
+        """逐區塊驗證並分流；回傳 summary()"""
+        for packets in iter_packets(source, chunk):
+            reasons = self.validate(packets, now)
+            ok = reasons == 0
+            if on_valid is not None and ok.any():
+                on_valid(select_packets(packets, ok))
+            if on_invalid is not None and not ok.all():
+                on_invalid(select_packets(packets, ~ok))
+        return self.summary()
+
+    def summary(self):
+        """目前的計數"""
+        return {
+            'total': self.total,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'rejections': dict(self.rejections),
+            'status': {STATUS_NAMES[s]: int(c) for s, c in enumerate(self.status_counts)},
+        }
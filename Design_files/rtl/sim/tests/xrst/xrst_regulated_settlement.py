@@ -0,0 +1,91 @@
+"""
+XRST 監管結算模型
+依 xrst_regulated_settlement.sv 以斷點表整批分類風險指數與合規等級，
+產生 regulatory_hash，並將結算批次彙總為每個 SLA 一列的監管報表
+"""
+
+import numpy as np
+
+# reliability_score 斷點 -> 級距 0 (< 800) / 1 (800-899) / 2 (900-949) / 3 (>= 950)
+RELIABILITY_BREAKPOINTS = np.array([800, 900, 950], dtype=np.int64)
+RISK_TABLE = np.array([90, 60, 30, 10], dtype=np.uint32)
+COMPLIANCE_TABLE = np.array([50, 75, 90, 100], dtype=np.uint8)
+
+REGULATORY_TAG = 0x524547554C41544F5259  # "REGULATORY"
+
+SUMMARY_DTYPE = np.dtype([
+    ('sla_id', '<u4'),
+    ('settlements', '<i8'),
+    ('breaches', '<i8'),
+    ('min_reliability', '<u4'),
+    ('mean_reliability', '<f8'),
+    ('risk_index', '<u4'),          # 期間內最高風險
+    ('compliance_level', 'u1'),     # 期間內最低合規等級
+    ('total_settled', '<i8'),
+    ('remaining_stake', '<i8'),     # 最後一筆結算後
+    ('last_timestamp', '<u4'),
+])
+
+
+def reliability_tiers(reliability_scores):
+    """reliability_score (32 位元無號) 所屬級距"""
+    scores = np.asarray(reliability_scores).astype(np.uint32, copy=False)
+    return np.searchsorted(RELIABILITY_BREAKPOINTS, scores, side='right')
+
+
+def classify(reliability_scores):
+    """整批分類，回傳 (risk_index, compliance_level)"""
+    tier = reliability_tiers(reliability_scores)
+    return RISK_TABLE[tier], COMPLIANCE_TABLE[tier]
+
+
+def regulatory_hashes(timestamps, reliability_scores):
+    """
+    regulatory_hash = {sla_id, timestamp, reliability_score, 192'h"REGULATORY"} 截斷至 256 位元:
+    sla_id 被截去，[255:224] = timestamp，[223:192] = reliability_score，[191:0] = 標籤
+    以 (N, 4) uint64 表示 (字組 0 = [63:0])
+    """
+    timestamps = np.asarray(timestamps).astype(np.uint64)
+    scores = np.asarray(reliability_scores).astype(np.uint64)
+    out = np.zeros((len(scores), 4), dtype=np.uint64)
+    out[:, 0] = REGULATORY_TAG & 0xFFFFFFFFFFFFFFFF
+    out[:, 1] = REGULATORY_TAG >> 64
+    out[:, 3] = (timestamps << np.uint64(32)) | scores
+    return out
+
+
+def regulatory_summary(sla_ids, timestamps, reliability_scores, settled=0, remaining_stake=0, status=0):
+    """
+    結算批次 -> 每個 SLA 一列的 SUMMARY_DTYPE 報表 (依 sla_id 排序)
+    settled 為每筆結算的淨金額；status 為 sla_status (1 = BREACHED)；同一 SLA 以批次中最後一筆為準
+    """
+    sla_ids = np.asarray(sla_ids).astype(np.uint32, copy=False)
+    n = len(sla_ids)
+    scores = np.asarray(reliability_scores).astype(np.uint32, copy=False)
+    timestamps = np.broadcast_to(np.asarray(timestamps).astype(np.uint32, copy=False), (n,))
+    settled = np.broadcast_to(np.asarray(settled, dtype=np.int64), (n,))
+    remaining_stake = np.broadcast_to(np.asarray(remaining_stake, dtype=np.int64), (n,))
+    breached = np.broadcast_to(np.asarray(status) == 1, (n,))
+
+    order = np.argsort(sla_ids, kind='stable')
+    ordered = sla_ids[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if n else np.zeros(0, dtype=np.intp)
+    counts = np.diff(np.r_[starts, n])
+    last = order[starts + counts - 1] if n else starts
+
+    rows = np.zeros(len(starts), dtype=SUMMARY_DTYPE)
+    if not n:
+        return rows
+    sorted_scores = scores[order]
+    rows['sla_id'] = ordered[starts]
+    rows['settlements'] = counts
+    rows['breaches'] = np.add.reduceat(breached[order].astype(np.int64), starts)
+    rows['min_reliability'] = np.minimum.reduceat(sorted_scores, starts)
+    rows['mean_reliability'] = np.add.reduceat(sorted_scores.astype(np.int64), starts) / counts
+    risk, compliance = classify(rows['min_reliability'])  # 最低分對應最高風險
+    rows['risk_index'] = risk
+    rows['compliance_level'] = compliance
+    rows['total_settled'] = np.add.reduceat(settled[order], starts)
+    rows['remaining_stake'] = remaining_stake[last]
+    rows['last_timestamp'] = timestamps[last]
+    return rows
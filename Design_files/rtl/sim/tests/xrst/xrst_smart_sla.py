@@ -0,0 +1,142 @@
+"""
+XRST Smart-SLA 結算模型
+SLA × 參與者矩陣的批次結算: 加權評分、各參與者分配與剩餘押金一次向量化計算，
+另保留與 xrst_smart_sla.sv 逐週期一致的三參與者模式
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+MASK32 = 0xFFFFFFFF
+
+STATUS_COMPLIANT = 0
+STATUS_BREACHED = 1
+STATUS_NAMES = {STATUS_COMPLIANT: "COMPLIANT", STATUS_BREACHED: "BREACHED"}
+
+# 加權評分門檻 -> 級距 0 (< 800) / 1 (800-899) / 2 (900-949) / 3 (>= 950)
+TIER_THRESHOLDS = np.array([800, 900, 950], dtype=np.int64)
+TIER_CRITICAL, TIER_LOW, TIER_MEDIUM, TIER_HIGH = range(4)
+CREDIT_TIERS = np.array([False, False, True, True])   # 以 credit_tokens 分配，否則以 penalty_tokens 分配
+STAKE_FACTOR = np.array([2, 1, 0, 0], dtype=np.int64)  # remaining_stake = stake - stake_adjustment * 倍數
+
+# 各級距的參與者分配百分比 (participant_a / b / c)
+RTL_SHARES = np.array([
+    [100, 0, 0],
+    [60, 30, 10],
+    [40, 40, 20],
+    [50, 30, 20],
+], dtype=np.int64)
+
+DEFAULT_WEIGHTS = (50, 30, 20)  # availability / latency / correctness
+
+SLASettlement = namedtuple('SLASettlement', [
+    'weighted_score', 'tier', 'status', 'settlements', 'remaining_stake'])
+
+
+def _u32(values):
+    """轉為 32 位元無號 (負值環繞)"""
+    return np.asarray(values, dtype=np.int64).astype(np.uint32)
+
+
+def weighted_scores(scores, weights):
+    """weighted_score = Σ score * weight // 100；weights 為 (W,) 或 (S, W)"""
+    scores = np.asarray(scores, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.int64)
+    return (scores * weights.sum(axis=-1)) // 100
+
+
+def tiers_of(weighted):
+    """加權評分所屬級距"""
+    return np.searchsorted(TIER_THRESHOLDS, weighted, side='right').astype(np.uint8)
+
+
+def settle(scores, weights, credits, penalties, stake_adjustments=0, stakes=0, shares=RTL_SHARES):
+    """
+    S 個 SLA × N 個參與者的結算 (一次向量化計算)
+    shares 為 (4, N) 各級距分配百分比，或 (S, 4, N) 每個 SLA 各自的分配表
+    settlements 為 (S, N) 有號金額: 信用級距為正值，違約級距為負值 (罰款由參與者承擔)
+    信用級距不動用押金，remaining_stake 等於 stakes
+    """
+    weighted = weighted_scores(scores, weights)
+    tier = tiers_of(weighted)
+    shares = np.asarray(shares, dtype=np.int64)
+    n = len(tier)
+
+    credit_tier = CREDIT_TIERS[tier]
+    credits = np.broadcast_to(np.asarray(credits, dtype=np.int64), (n,))
+    penalties = np.broadcast_to(np.asarray(penalties, dtype=np.int64), (n,))
+    base = np.where(credit_tier, credits, -penalties)
+    if shares.ndim == 3:
+        share = np.take_along_axis(shares, tier.astype(np.intp)[:, None, None], axis=1)[:, 0]
+    else:
+        share = shares[tier]
+    # 向零取整，與 RTL 對無號罰款金額的整數除法一致
+    magnitude = (np.abs(base)[:, None] * share) // 100
+    settlements = np.where(base[:, None] < 0, -magnitude, magnitude)
+
+    stake = np.asarray(stakes, dtype=np.int64) - \
+        np.asarray(stake_adjustments, dtype=np.int64) * STAKE_FACTOR[tier]
+    status = np.where(credit_tier, STATUS_COMPLIANT, STATUS_BREACHED).astype(np.uint8)
+    return SLASettlement(weighted, tier, status, settlements, np.broadcast_to(stake, (n,)))
+
+
+class SmartSLA:
+    """
+    單一 xrst_smart_sla.sv 實例的逐週期模型 (每個元素 = 一個 token_valid 週期)
+    級距判斷讀取的是 weighted_score 暫存器的舊值 (上一個週期的評分)；
+    算術為 32 位元無號環繞，信用級距不寫入 remaining_stake，維持上一個值
+    """
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, stake_requirement=0):
+        self.weights = tuple(weights)
+        self.stake_requirement = stake_requirement
+        self.reset()
+
+    def reset(self):
+        """等同 rst_n 拉低"""
+        self.weighted_score = 0
+        self.remaining_stake = 0
+        self.settlement = (0, 0, 0)
+        self.sla_status = STATUS_COMPLIANT
+
+    def execute(self, scores, credits, penalties, stake_adjustments=0):
+        """處理一段 token_valid 週期，回傳各週期後的輸出暫存器 (dict of arrays)"""
+        score = np.atleast_1d(_u32(scores))
+        n = len(score)
+        credit = np.broadcast_to(_u32(credits), (n,))
+        penalty = np.broadcast_to(_u32(penalties), (n,))
+        adjust = np.broadcast_to(_u32(stake_adjustments), (n,))
+        wa, wl, wc = (np.uint32(w & MASK32) for w in self.weights)
+
+        weighted = (score * wa + score * wl + score * wc) // np.uint32(100)
+        previous = np.r_[np.uint32(self.weighted_score), weighted[:-1]].astype(np.uint32)
+        tier = tiers_of(previous).astype(np.intp)
+
+        base = np.where(CREDIT_TIERS[tier], credit, penalty).astype(np.uint32)
+        share = RTL_SHARES[tier].astype(np.uint32)
+        settlements = (base[:, None] * share) // np.uint32(100)
+        critical = tier == TIER_CRITICAL
+        settlements[critical, 0] = penalty[critical]  # settlement_a <= penalty_tokens (不經乘法)
+
+        stake = np.uint32(self.stake_requirement & MASK32) - adjust * STAKE_FACTOR[tier].astype(np.uint32)
+        writes = ~CREDIT_TIERS[tier]
+        last = np.where(writes, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        remaining = stake[np.maximum(last, 0)]
+        remaining[last < 0] = self.remaining_stake
+
+        status = np.where(CREDIT_TIERS[tier], STATUS_COMPLIANT, STATUS_BREACHED).astype(np.uint8)
+        if n:
+            self.weighted_score = int(weighted[-1])
+            self.remaining_stake = int(remaining[-1])
+            self.settlement = tuple(int(v) for v in settlements[-1])
+            self.sla_status = int(status[-1])
+        return {
+            'settlement_a': settlements[:, 0],
+            'settlement_b': settlements[:, 1],
+            'settlement_c': settlements[:, 2],
+            'remaining_stake': remaining,
+            'sla_status': status,
+            'weighted_score': weighted,
+        }
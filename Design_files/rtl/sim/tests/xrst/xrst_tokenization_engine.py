@@ -0,0 +1,354 @@
+"""
+XRST 代幣化引擎與代幣帳本
+依 xrst_tokenization_engine.sv 整批產生 credit / penalty / stake 代幣與 256-bit token_id，
+發行的代幣寫入只可附加的欄式帳本，各邊界、各代幣類型的餘額隨附加增量維護
+
+帳本目錄配置:
+    header          檔頭 (magic, 版本, 邊界數, 筆數, token_counter, stake_adjustment)
+    <欄位>.col      每個欄位一個原始小端序陣列檔，以 mmap 存取，容量倍增
+    aggregates.npy  (num_boundaries + 1, 7) int64 彙總: 各類型金額、各類型筆數、stake，末列為已彙總筆數
+"""
+
+import os
+import struct
+
+import numpy as np
+
+TOKEN_CREDIT = 0
+TOKEN_PENALTY = 1
+TOKEN_STAKE = 2
+NUM_TOKEN_TYPES = 3
+TOKEN_NAMES = {TOKEN_CREDIT: "CREDIT", TOKEN_PENALTY: "PENALTY", TOKEN_STAKE: "STAKE"}
+
+# token_id[207:0] 的 ASCII 標籤
+TOKEN_TAGS = {
+    TOKEN_CREDIT: 0x435245444954,        # "CREDIT"
+    TOKEN_PENALTY: 0x50454E414C5459,     # "PENALTY"
+    TOKEN_STAKE: 0x5354414B45,           # "STAKE"
+}
+TAG_TABLE = np.array([TOKEN_TAGS[t] for t in range(NUM_TOKEN_TYPES)], dtype=np.uint64)
+
+NUM_BOUNDARIES = 1 << 16  # boundary_id[15:0]
+STAKE_DIVISOR = 10
+
+LEDGER_MAGIC = b"XRSTLEDG"
+LEDGER_VERSION = 1
+HEADER_STRUCT = struct.Struct("<8sIIQII")
+
+LEDGER_COLUMNS = {
+    'boundary': np.dtype('<u2'),
+    'token_type': np.dtype('u1'),
+    'amount': np.dtype('<u4'),      # credit_tokens 或 penalty_tokens
+    'stake': np.dtype('<u4'),       # 此筆發行的 stake_adjustment (僅 PENALTY 非零)
+    'counter': np.dtype('<u4'),     # token_id 中的 token_counter
+    'timestamp': np.dtype('<u8'),
+}
+
+# aggregates 欄位
+AGG_AMOUNT = slice(0, NUM_TOKEN_TYPES)
+AGG_COUNT = slice(NUM_TOKEN_TYPES, 2 * NUM_TOKEN_TYPES)
+AGG_STAKE = 2 * NUM_TOKEN_TYPES
+AGG_WIDTH = 2 * NUM_TOKEN_TYPES + 1
+
+
+def sum_by_row(rows, values, length):
+    """
+    uint32 數值依列號分組加總 (int64 精確)
+    拆成高低 16 位元以 float64 bincount 累加，每半部在 2^37 筆以內皆無捨入誤差
+    """
+    values = np.asarray(values).astype(np.uint32, copy=False)
+    lo = np.bincount(rows, weights=values & np.uint32(0xFFFF), minlength=length)
+    hi = np.bincount(rows, weights=values >> np.uint32(16), minlength=length)
+    return lo.astype(np.int64) + (hi.astype(np.int64) << 16)
+
+
+def tokenize(credits, penalties):
+    """
+    每筆 evidence_valid 的組合邏輯結果 (不含暫存器保持)
+    回傳 (token_type, credit_tokens, penalty_tokens, stake)；stake 只在 PENALTY 時非零
+    """
+    credit = np.asarray(credits).astype(np.uint32, copy=False)
+    penalty = np.asarray(penalties).astype(np.uint32, copy=False)
+    token_type = np.where(credit > penalty, TOKEN_CREDIT,
+                          np.where(penalty > credit, TOKEN_PENALTY, TOKEN_STAKE)).astype(np.uint8)
+    credit_tokens = np.where(token_type == TOKEN_CREDIT, credit - penalty, np.uint32(0)).astype(np.uint32)
+    penalty_tokens = np.where(token_type == TOKEN_PENALTY, penalty - credit, np.uint32(0)).astype(np.uint32)
+    stake = penalty_tokens // np.uint32(STAKE_DIVISOR)
+    return token_type, credit_tokens, penalty_tokens, stake
+
+
+def token_ids(boundary_ids, counters, token_types):
+    """
+    token_id = {boundary_id[255:240], token_counter[239:208], 標籤[207:0]}
+    以 (N, 4) uint64 表示 (字組 0 = [63:0])；標籤皆在 56 位元內，字組 1、2 恆為 0
+    """
+    n = len(token_types)
+    out = np.zeros((n, 4), dtype=np.uint64)
+    out[:, 0] = TAG_TABLE[np.asarray(token_types)]
+    out[:, 3] = ((np.asarray(boundary_ids).astype(np.uint64) & np.uint64(0xFFFF)) << np.uint64(48)) | \
+                ((np.asarray(counters).astype(np.uint64) & np.uint64(0xFFFFFFFF)) << np.uint64(16))
+    return out
+
+
+def token_id_int(words):
+    """(4,) uint64 字組轉為 256-bit 整數"""
+    return sum(int(w) << (64 * i) for i, w in enumerate(words))
+
+
+class TokenLedger:
+    """
+    只可附加的欄式代幣帳本
+    path 為 None 時只存在記憶體；否則為帳本目錄，欄位以 mmap 存取，sync() 後可重新開啟
+    balances / counts / stake 隨每次 append 增量更新，查詢與重新開啟皆不需重掃帳本
+    """
+
+    def __init__(self, path=None, num_boundaries=NUM_BOUNDARIES, capacity=1 << 16):
+        self.path = path
+        self.num_boundaries = num_boundaries
+        self.rebuilt = False
+        self._length = 0
+        self.token_counter = 0
+        self.stake_adjustment = 0
+        self._aggregates = np.zeros((num_boundaries + 1, AGG_WIDTH), dtype=np.int64)
+        self._columns = {}
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(os.path.join(path, 'header')):
+                self._open()
+                return
+        self._allocate(capacity)
+
+    def __len__(self):
+        return self._length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def capacity(self):
+        return len(self._columns['boundary'])
+
+    @property
+    def amounts(self):
+        """(num_boundaries, 3) 各邊界各代幣類型的累計金額"""
+        return self._aggregates[:-1, AGG_AMOUNT]
+
+    @property
+    def counts(self):
+        """(num_boundaries, 3) 各邊界各代幣類型的筆數"""
+        return self._aggregates[:-1, AGG_COUNT]
+
+    @property
+    def stakes(self):
+        """各邊界累計的 stake_adjustment"""
+        return self._aggregates[:-1, AGG_STAKE]
+
+    def column(self, name):
+        """欄位前 len(self) 筆的零複製檢視"""
+        return self._columns[name][:self._length]
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.col")
+
+    def _map(self, name, capacity, mode):
+        dtype = LEDGER_COLUMNS[name]
+        path = self._column_path(name)
+        if mode == 'w+':
+            with open(path, 'ab') as fh:
+                fh.truncate(capacity * dtype.itemsize)
+            mode = 'r+'
+        return np.memmap(path, dtype=dtype, mode=mode, shape=(capacity,))
+
+    def _allocate(self, capacity):
+        """配置 (或擴充至) capacity 筆的欄位儲存空間"""
+        for name, dtype in LEDGER_COLUMNS.items():
+            old = self._columns.get(name)
+            if self.path is None:
+                column = np.zeros(capacity, dtype=dtype)
+                if old is not None:
+                    column[:len(old)] = old
+            else:
+                if old is not None:
+                    old.flush()
+                    del old
+                column = self._map(name, capacity, 'w+')
+            self._columns[name] = column
+
+    def _open(self):
+        with open(os.path.join(self.path, 'header'), 'rb') as fh:
+            header = fh.read(HEADER_STRUCT.size)
+        magic, version, num_boundaries, length, counter, stake = HEADER_STRUCT.unpack(header)
+        if magic != LEDGER_MAGIC or version != LEDGER_VERSION:
+            raise ValueError(f"{self.path}: not an XRST token ledger v{LEDGER_VERSION}")
+        self.num_boundaries = num_boundaries
+        self._length = length
+        self.token_counter = counter
+        self.stake_adjustment = stake
+
+        itemsize = LEDGER_COLUMNS['boundary'].itemsize
+        capacity = max(os.path.getsize(self._column_path('boundary')) // itemsize, length, 1)
+        for name in LEDGER_COLUMNS:
+            self._columns[name] = self._map(name, capacity, 'w+')
+
+        aggregates = None
+        agg_path = os.path.join(self.path, 'aggregates.npy')
+        if os.path.exists(agg_path):
+            aggregates = np.load(agg_path)
+        if aggregates is None or aggregates.shape != (num_boundaries + 1, AGG_WIDTH) or \
+                aggregates[-1, 0] != length:
+            # 彙總檔與檔頭不一致 (例如 sync 中斷) 時才由欄位重建
+            aggregates = np.zeros((num_boundaries + 1, AGG_WIDTH), dtype=np.int64)
+            self._aggregates = aggregates
+            self._accumulate(0, length)
+            self.rebuilt = True
+        self._aggregates = aggregates
+
+    def _accumulate(self, start, stop):
+        """將 [start, stop) 的紀錄併入彙總"""
+        boundary = self._columns['boundary'][start:stop].astype(np.intp)
+        token_type = self._columns['token_type'][start:stop].astype(np.intp)
+        amount = self._columns['amount'][start:stop]
+        stake = self._columns['stake'][start:stop]
+
+        keys, inverse = np.unique(boundary * NUM_TOKEN_TYPES + token_type, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        rows, types = np.divmod(keys, NUM_TOKEN_TYPES)
+        agg = self._aggregates
+        agg[rows, AGG_AMOUNT.start + types] += sum_by_row(inverse, amount, len(keys))
+        agg[rows, AGG_COUNT.start + types] += np.bincount(inverse, minlength=len(keys))
+        staked = np.flatnonzero(stake)
+        if len(staked):
+            ids, inverse = np.unique(boundary[staked], return_inverse=True)
+            agg[ids, AGG_STAKE] += sum_by_row(inverse.reshape(-1), stake[staked], len(ids))
+        agg[-1, 0] = stop
+
+    def append(self, boundary, token_type, amount, stake=0, counter=None, timestamp=0):
+        """批次附加代幣紀錄並更新彙總；回傳新紀錄的起始序號"""
+        boundary = np.asarray(boundary)
+        n = len(boundary)
+        if n and (boundary.min() < 0 or boundary.max() >= self.num_boundaries):
+            raise ValueError(f"boundary out of range [0, {self.num_boundaries})")
+        start, stop = self._length, self._length + n
+        if stop > self.capacity:
+            capacity = self.capacity
+            while capacity < stop:
+                capacity *= 2
+            self._allocate(capacity)
+
+        if counter is None:
+            counter = np.arange(self.token_counter, self.token_counter + n, dtype=np.uint64)
+        values = {'boundary': boundary, 'token_type': token_type, 'amount': amount,
+                  'stake': stake, 'counter': counter, 'timestamp': timestamp}
+        for name, value in values.items():
+            self._columns[name][start:stop] = value
+        self._length = stop
+        self.token_counter = (int(self._columns['counter'][stop - 1]) + 1) & 0xFFFFFFFF if n else \
+            self.token_counter
+        self._accumulate(start, stop)
+        return start
+
+    def balance(self, boundary):
+        """單一邊界的餘額: 各類型金額與筆數、stake 與淨額 (credit - penalty)"""
+        row = self._aggregates[boundary]
+        amount = row[AGG_AMOUNT]
+        return {
+            'credit': int(amount[TOKEN_CREDIT]),
+            'penalty': int(amount[TOKEN_PENALTY]),
+            'stake': int(row[AGG_STAKE]),
+            'tokens': row[AGG_COUNT].tolist(),
+            'net': int(amount[TOKEN_CREDIT] - amount[TOKEN_PENALTY]),
+        }
+
+    def net_balances(self):
+        """各邊界淨額 (credit - penalty)"""
+        return self.amounts[:, TOKEN_CREDIT] - self.amounts[:, TOKEN_PENALTY]
+
+    def type_totals(self):
+        """各代幣類型的總金額與總筆數"""
+        return self.amounts.sum(axis=0), self.counts.sum(axis=0)
+
+    def delta_since(self, start):
+        """自序號 start 之後新增紀錄的各邊界淨額變化 (只掃描尾段)"""
+        boundary = self.column('boundary')[start:]
+        token_type = self.column('token_type')[start:]
+        amount = self.column('amount')[start:]
+        credit = np.where(token_type == TOKEN_CREDIT, amount, 0)
+        penalty = np.where(token_type == TOKEN_PENALTY, amount, 0)
+        return (sum_by_row(boundary, credit, self.num_boundaries) -
+                sum_by_row(boundary, penalty, self.num_boundaries))
+
+    def replay(self, start=0, stop=None, chunk=1 << 20):
+        """依序產生 [start, stop) 的欄位區塊 (dict of 零複製檢視)"""
+        stop = self._length if stop is None else min(stop, self._length)
+        for lo in range(start, stop, chunk):
+            hi = min(lo + chunk, stop)
+            yield {name: column[lo:hi] for name, column in self._columns.items()}
+
+    def token_ids(self, start=0, stop=None):
+        """重建 [start, stop) 紀錄的 256-bit token_id"""
+        sl = slice(start, self._length if stop is None else stop)
+        return token_ids(self._columns['boundary'][sl], self._columns['counter'][sl],
+                         self._columns['token_type'][sl])
+
+    def sync(self):
+        """將欄位、彙總與檔頭寫入磁碟；檔頭最後以 os.replace 更新"""
+        if self.path is None:
+            return
+        for column in self._columns.values():
+            column.flush()
+        tmp = os.path.join(self.path, 'aggregates.tmp.npy')
+        np.save(tmp, self._aggregates)
+        os.replace(tmp, os.path.join(self.path, 'aggregates.npy'))
+        tmp = os.path.join(self.path, 'header.tmp')
+        with open(tmp, 'wb') as fh:
+            fh.write(HEADER_STRUCT.pack(LEDGER_MAGIC, LEDGER_VERSION, self.num_boundaries,
+                                        self._length, self.token_counter, self.stake_adjustment))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, os.path.join(self.path, 'header'))
+
+    def close(self):
+        self.sync()
+        self._columns = {}
+
+
+class TokenizationEngine:
+    """
+    xrst_tokenization_engine.sv 的批次模型，發行的代幣寫入 ledger
+    token_counter 與 stake_adjustment 暫存器跨批次保留 (有帳本時由帳本延續)；
+    CREDIT 事件不寫入 stake_adjustment，輸出維持上一個值
+    """
+
+    def __init__(self, ledger=None):
+        self.ledger = ledger if ledger is not None else TokenLedger()
+
+    def issue(self, boundary_ids, credits, penalties, timestamp=0):
+        """處理一批 evidence_valid 週期，回傳各週期後的輸出暫存器 (dict of arrays)"""
+        boundary_ids = np.asarray(boundary_ids).astype(np.uint16, copy=False)
+        token_type, credit_tokens, penalty_tokens, stake = tokenize(credits, penalties)
+        n = len(token_type)
+        ledger = self.ledger
+        counter = (np.arange(n, dtype=np.uint64) + np.uint64(ledger.token_counter)) & np.uint64(0xFFFFFFFF)
+
+        # stake_adjustment 只在 PENALTY / STAKE 時寫入
+        writes = token_type != TOKEN_CREDIT
+        last = np.where(writes, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        held = stake[np.maximum(last, 0)]
+        held[last < 0] = ledger.stake_adjustment
+
+        ledger.append(boundary_ids, token_type, credit_tokens + penalty_tokens, stake, counter, timestamp)
+        if n:
+            ledger.stake_adjustment = int(held[-1])
+
+        return {
+            'credit_tokens': credit_tokens,
+            'penalty_tokens': penalty_tokens,
+            'stake_adjustment': held,
+            'token_type': token_type,
+            'token_id': token_ids(boundary_ids, counter, token_type),
+        }